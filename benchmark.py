@@ -0,0 +1,446 @@
+"""
+Benchmarks for everything_tool.
+
+Every benchmark runs against the local Everything instance, or with --synthetic N against a
+deterministic in-memory SyntheticBackend of N records (no Windows or Everything required).
+
+Usage:
+    python benchmark.py columns --keywords "*" --limit 1000000
+    python benchmark.py rows --keywords "*" --limit 200000
+    python benchmark.py --synthetic 1000000 suite --masks DEFAULT ALL --sorts NAME_ASCENDING SIZE_DESCENDING
+    python benchmark.py --synthetic 1000000 export --output export.out
+    python benchmark.py --synthetic 1000000 paths
+    python benchmark.py --synthetic 10000000 rollup --top 10
+    python benchmark.py duplicates --files 5000 --workers 1 4 16
+    python benchmark.py --synthetic 1000000 progressive --keywords report --repeat 5
+    python benchmark.py --synthetic 1000000 topk --key=-size,name --k 100 --per-group extension
+"""
+import argparse
+import contextlib
+import dataclasses
+import json
+import os
+import multiprocessing
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, Optional, Tuple
+
+import everything_tool as et
+
+
+def measure(func: Callable[[], object]) -> Tuple[float, int, object]:
+    """Runs func once and returns (elapsed seconds, peak traced bytes, return value)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    value = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, value
+
+
+def report(label: str, rows: int, elapsed: float, peak: int = 0) -> None:
+    rate = rows / elapsed if elapsed else float('inf')
+    memory = f"  peak {peak / 2 ** 20:8.1f} MiB" if peak else ""
+    print(f"{label:<24} {rows:>10} rows  {elapsed:8.3f} s  {rate:>12,.0f} rows/s{memory}")
+
+
+def bench_columns(client: et.Client, args: argparse.Namespace) -> None:
+    """Compares search() (row objects) with search_columns() (compact columns)."""
+    flags = et.Request[args.flags]
+    query = dict(keywords=args.keywords, limit=args.limit, flags=flags)
+
+    elapsed, peak, rows = measure(lambda: list(client.search(**query)))
+    report("search()", len(rows), elapsed, peak)
+    del rows
+
+    elapsed, peak, result = measure(lambda: client.search_columns(**query))
+    report("search_columns()", len(result), elapsed, peak)
+
+
+def _getter_dict_rows(client: et.Client, keywords: str, limit: int, flags: et.Request):
+    """The previous search() row loop: a getter dict per row splatted into SearchResult."""
+    num_results = client._execute_query(keywords, False, False, False, False, 0, limit, flags, et.Sort.NAME_ASCENDING)
+    active_getters = {key: func for flag, (key, func) in client._request_func_map.items() if flag in flags}
+    for i in range(num_results):
+        yield et.SearchResult(**{key: getter(i) for key, getter in active_getters.items()})
+
+
+def bench_rows(client: et.Client, args: argparse.Namespace) -> None:
+    """Rows/sec of the getter-dict loop vs the generated per-mask extractors."""
+    for flags in (et.Request.DEFAULT, et.Request.ALL):
+        print(f"-- flags={flags.name}")
+        cases = {
+            "getter dict (before)": lambda: list(_getter_dict_rows(client, args.keywords, args.limit, flags)),
+            "generated (after)": lambda: list(client.search(args.keywords, limit=args.limit, flags=flags)),
+            "generated, lazy": lambda: list(client.search(args.keywords, limit=args.limit, flags=flags, lazy=True)),
+        }
+        for label, func in cases.items():
+            start = time.perf_counter()
+            rows = func()
+            report(label, len(rows), time.perf_counter() - start)
+
+
+def peak_rss_mib() -> float:
+    """The process's peak resident set size in MiB, or 0.0 where it cannot be measured."""
+    try:
+        # Unlike ru_maxrss, VmHWM is reset in a forked child, so it measures just that child.
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 2 ** 10
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+def _run_in_child(func: Callable[[], Dict], conn) -> None:
+    try:
+        conn.send(func())
+    finally:
+        conn.close()
+
+
+def run_isolated(func: Callable[[], Dict]) -> Dict:
+    """
+    Runs func in a forked child so each case reports its own peak RSS; runs inline without fork.
+
+    The child inherits the already-built backend, so the reported baseline includes it.
+    """
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        return func()
+    context = multiprocessing.get_context('fork')
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_run_in_child, args=(func, sender))
+    process.start()
+    sender.close()
+    try:
+        return receiver.recv()
+    finally:
+        process.join()
+
+
+def _search_case(client: et.Client, keywords: str, limit: int, flags: et.Request, sort: et.Sort, lazy: bool) -> Dict:
+    baseline = peak_rss_mib()
+    start = time.perf_counter()
+    results = client.search(keywords, limit=limit, flags=flags, sort=sort, lazy=lazy)
+    rows = 0
+    first = None
+    for _ in results:
+        if first is None:
+            first = time.perf_counter() - start
+        rows += 1
+    elapsed = time.perf_counter() - start
+    peak = peak_rss_mib()
+    return {'rows': rows, 'elapsed': elapsed, 'ttfr': first or elapsed, 'peak_rss': peak, 'delta_rss': peak - baseline}
+
+
+def bench_suite(client: et.Client, args: argparse.Namespace) -> None:
+    """Rows/sec, time-to-first-result and peak RSS of search() for each Request mask and Sort."""
+    print(f"{'mask':<28} {'sort':<32} {'rows':>10} {'rows/s':>12} {'TTFR ms':>9} {'peak MiB':>9} {'Δ MiB':>8}")
+    for mask_name in args.masks:
+        for sort_name in args.sorts:
+            flags, sort = et.Request[mask_name], et.Sort[sort_name]
+            result = run_isolated(lambda: _search_case(client, args.keywords, args.limit, flags, sort, args.lazy))
+            rate = result['rows'] / result['elapsed'] if result['elapsed'] else float('inf')
+            print(f"{mask_name:<28} {sort_name:<32} {result['rows']:>10} {rate:>12,.0f} "
+                  f"{result['ttfr'] * 1000:>9.1f} {result['peak_rss']:>9.1f} {result['delta_rss']:>8.1f}")
+
+
+def _serialize_rows(client: et.Client, keywords: str, limit: int, flags: et.Request, path: str) -> et.ExportStats:
+    """The hand-rolled export: iterate search() and json.dumps() each SearchResult."""
+    start = time.perf_counter()
+    rows = 0
+    with open(path, 'w', encoding='utf-8') as output:
+        for item in client.search(keywords, limit=limit, flags=flags):
+            output.write(json.dumps(dataclasses.asdict(item), default=str, ensure_ascii=False) + "\n")
+            rows += 1
+    return et.ExportStats(rows, os.path.getsize(path), time.perf_counter() - start)
+
+
+def bench_export(client: et.Client, args: argparse.Namespace) -> None:
+    """Rows/sec and MB/s of each export sink vs serializing search() rows by hand."""
+    flags = et.Request[args.flags]
+    sinks = {
+        "search() + json.dumps": None,
+        "NDJSONSink": et.NDJSONSink,
+        "CSVSink": et.CSVSink,
+        "ArrowSink (ipc)": lambda path: et.ArrowSink(path, format='ipc'),
+        "ArrowSink (parquet)": lambda path: et.ArrowSink(path, format='parquet'),
+    }
+    try:
+        for label, make_sink in sinks.items():
+            if make_sink is None:
+                stats = _serialize_rows(client, args.keywords, args.limit, flags, args.output)
+            else:
+                try:
+                    sink = make_sink(args.output)
+                except ImportError as err:
+                    print(f"{label:<24} skipped: {err}")
+                    continue
+                stats = client.export(args.keywords, sink, limit=args.limit, flags=flags, batch_size=args.batch_size)
+            report(label, stats.rows, stats.elapsed)
+            print(f"{'':<24} {stats.bytes_written / 2 ** 20:10.1f} MiB  {stats.mb_per_sec:8.1f} MB/s")
+    finally:
+        if os.path.exists(args.output):
+            os.remove(args.output)
+
+
+_PATH_VARIANTS: Dict[str, Callable[[et.Client, str, int], object]] = {
+    "search()": lambda client, keywords, limit: list(client.search(keywords, limit=limit)),
+    "search(lazy)": lambda client, keywords, limit: list(client.search(keywords, limit=limit, lazy=True)),
+    "search(lazy, interned)": lambda client, keywords, limit: list(
+        client.search(keywords, limit=limit, lazy=True, intern_paths=True)),
+    "search_columns()": lambda client, keywords, limit: client.search_columns(keywords, limit=limit),
+    "search_columns(interned)": lambda client, keywords, limit: client.search_columns(
+        keywords, limit=limit, intern_paths=True),
+}
+
+
+def _paths_case(client: et.Client, keywords: str, limit: int, variant: str) -> Dict:
+    baseline = peak_rss_mib()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = _PATH_VARIANTS[variant](client, keywords, limit)
+    elapsed = time.perf_counter() - start
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'rows': len(result), 'elapsed': elapsed, 'retained': retained, 'delta_rss': peak_rss_mib() - baseline}
+
+
+def bench_paths(client: et.Client, args: argparse.Namespace) -> None:
+    """Memory held by DEFAULT-mask results with and without path interning."""
+    print(f"{'variant':<26} {'rows':>10} {'seconds':>8} {'held MiB':>9} {'B/row':>7} {'Δ RSS MiB':>10}")
+    for variant in _PATH_VARIANTS:
+        result = run_isolated(lambda: _paths_case(client, args.keywords, args.limit, variant))
+        per_row = result['retained'] / result['rows'] if result['rows'] else 0
+        print(f"{variant:<26} {result['rows']:>10} {result['elapsed']:>8.2f} "
+              f"{result['retained'] / 2 ** 20:>9.1f} {per_row:>7.0f} {result['delta_rss']:>10.1f}")
+
+
+def bench_rollup(client: et.Client, args: argparse.Namespace) -> None:
+    """Time and peak memory of folder_sizes(), plus the heaviest subtrees."""
+    rows = client.count(f'path:"{args.root}\\"' if args.root else "")
+    elapsed, peak, tree = measure(lambda: client.folder_sizes(args.root))
+    report("folder_sizes()", rows, elapsed, peak)
+    print(f"{len(tree):,} directories")
+    for entry in tree.top(args.top, depth=args.depth):
+        print(f"{entry.size / 2 ** 30:10.2f} GiB {entry.files:>10,} files  {entry.path}")
+
+
+def _make_duplicate_tree(root: str, files: int, duplicate_ratio: float, max_size: int, seed: int) -> None:
+    """
+    Writes `files` files under `root`: a share are copies of earlier files, and a few more have the
+    size and the first and last bytes of an earlier file but differ in the middle.
+    """
+    rng = random.Random(seed)
+    written = []
+    for n in range(files):
+        folder = os.path.join(root, f"dir{n % 37}", f"sub{n % 5}")
+        os.makedirs(folder, exist_ok=True)
+        roll = rng.random()
+        if written and roll < duplicate_ratio:
+            data = rng.choice(written)
+        elif written and roll < duplicate_ratio + 0.05:
+            data = bytearray(rng.choice(written))
+            if data:
+                data[len(data) // 2] ^= 0xFF
+        else:
+            data = rng.randbytes(min(int(rng.lognormvariate(11.0, 2.0)), max_size))
+        written.append(bytes(data))
+        with open(os.path.join(folder, f"file{n}.bin"), 'wb') as file:
+            file.write(data)
+
+
+def bench_duplicates(client: Optional[et.Client], args: argparse.Namespace) -> None:
+    """
+    find_duplicates() per I/O concurrency cap, on a generated local tree (or with --files 0, on
+    `client`). Files are read through the page cache, so later runs are warm.
+    """
+    with contextlib.ExitStack() as stack:
+        if args.files:
+            root = stack.enter_context(tempfile.TemporaryDirectory(prefix="everything-dups-"))
+            start = time.perf_counter()
+            _make_duplicate_tree(root, args.files, args.duplicate_ratio, args.max_size, args.seed)
+            print(f"Wrote {args.files:,} files in {time.perf_counter() - start:.1f} s")
+            client = stack.enter_context(et.Client(dll=et.DirectoryBackend(root)))
+        print(f"{'workers':>7} {'seconds':>8} {'groups':>7} {'candidates':>10} {'partial':>8} "
+              f"{'full':>7} {'MB read':>8} {'errors':>6}")
+        for workers in args.workers:
+            stats = et.DuplicateStats()
+            start = time.perf_counter()
+            for _ in client.find_duplicates(args.keywords, min_size=args.min_size, max_workers=workers, stats=stats):
+                pass
+            elapsed = time.perf_counter() - start
+            print(f"{workers:>7} {elapsed:>8.2f} {stats.groups:>7,} {stats.candidates:>10,} "
+                  f"{stats.partial_hashed:>8,} {stats.full_hashed:>7,} {stats.bytes_read / 1e6:>8.1f} {stats.errors:>6}")
+
+
+def _sorted_baseline(client: et.Client, keywords: str, keys, k: int, per_group):
+    """Materializes every row and sorts in Python, the way reports were built before top_k()."""
+    rows = list(client.search(keywords, flags=et.Request.ALL, lazy=True))
+    for spec in reversed(keys):
+        field = spec.lstrip('+-')
+        rows.sort(key=lambda row: getattr(row, field) or 0, reverse=spec.startswith('-'))
+    if per_group is None:
+        return rows[:k]
+    groups = {}
+    for row in rows:
+        group = groups.setdefault(getattr(row, per_group), [])
+        if len(group) < k:
+            group.append(row)
+    return groups
+
+
+def bench_topk(client: et.Client, args: argparse.Namespace) -> None:
+    """top_k() against sorting the materialized result set."""
+    rows = client.count(args.keywords)
+    cases = {
+        "top_k()": lambda: client.top_k(args.keywords, args.key, args.k, per_group=args.per_group),
+        "search() + sort": lambda: _sorted_baseline(client, args.keywords, args.key, args.k, args.per_group),
+    }
+    for label, func in cases.items():
+        elapsed, peak, _ = measure(func)
+        report(label, rows, elapsed, peak)
+
+
+def _percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _timed_search(client: et.Client, keywords: str) -> Tuple[float, float]:
+    start = time.perf_counter()
+    first = None
+    for _ in client.search(keywords):
+        if first is None:
+            first = time.perf_counter() - start
+    elapsed = time.perf_counter() - start
+    return first or elapsed, elapsed
+
+
+def _timed_progressive(client: et.Client, keywords: str, first_page: int, deadline) -> Tuple[float, float]:
+    start = time.perf_counter()
+    first = None
+    for page in client.search_progressive(keywords, first_page=first_page, deadline=deadline):
+        if first is None and page.rows:
+            first = time.perf_counter() - start
+    elapsed = time.perf_counter() - start
+    return first or elapsed, elapsed
+
+
+def bench_progressive(client: et.Client, args: argparse.Namespace) -> None:
+    """
+    p50/p99 time-to-first-row and time-to-last-row of search() and search_progressive(), over
+    every prefix of --keywords as if typed one key at a time.
+    """
+    prefixes = [args.keywords[:n] for n in range(1, len(args.keywords) + 1)]
+    cases = {
+        "search()": lambda keywords: _timed_search(client, keywords),
+        "search_progressive()": lambda keywords: _timed_progressive(client, keywords, args.first_page, args.deadline),
+    }
+    print(f"{'mode':<22} {'TTFR p50 ms':>12} {'TTFR p99 ms':>12} {'TTLR p50 ms':>12} {'TTLR p99 ms':>12}")
+    for label, func in cases.items():
+        timings = [func(keywords) for _ in range(args.repeat) for keywords in prefixes]
+        first, last = [t[0] * 1000 for t in timings], [t[1] * 1000 for t in timings]
+        print(f"{label:<22} {_percentile(first, 0.5):>12.1f} {_percentile(first, 0.99):>12.1f} "
+              f"{_percentile(last, 0.5):>12.1f} {_percentile(last, 0.99):>12.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dll", default=None, help="Path to Everything64.dll")
+    parser.add_argument("--synthetic", type=int, metavar="N", default=None,
+                        help="Benchmark against a SyntheticBackend of N records instead of Everything")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for --synthetic")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    columns = commands.add_parser("columns", help="search() vs search_columns()")
+    columns.add_argument("--keywords", default="*")
+    columns.add_argument("--limit", type=int, default=1_000_000)
+    columns.add_argument("--flags", default="DEFAULT", choices=list(et.Request.__members__))
+    columns.set_defaults(func=bench_columns)
+
+    rows = commands.add_parser("rows", help="getter-dict row loop vs generated extractors")
+    rows.add_argument("--keywords", default="*")
+    rows.add_argument("--limit", type=int, default=200_000)
+    rows.set_defaults(func=bench_rows)
+
+    suite = commands.add_parser("suite", help="rows/sec, TTFR and peak RSS per Request mask and Sort")
+    suite.add_argument("--keywords", default="*")
+    suite.add_argument("--limit", type=int, default=-1)
+    suite.add_argument("--masks", nargs="+", default=["FILE_NAME", "DEFAULT", "ALL"],
+                       choices=list(et.Request.__members__))
+    suite.add_argument("--sorts", nargs="+", default=["NAME_ASCENDING", "SIZE_DESCENDING", "DATE_MODIFIED_DESCENDING"],
+                       choices=list(et.Sort.__members__))
+    suite.add_argument("--lazy", action="store_true", help="Yield LazySearchResult rows")
+    suite.set_defaults(func=bench_suite)
+
+    export = commands.add_parser("export", help="throughput of the export sinks")
+    export.add_argument("--keywords", default="*")
+    export.add_argument("--limit", type=int, default=-1)
+    export.add_argument("--flags", default="DEFAULT", choices=list(et.Request.__members__))
+    export.add_argument("--batch-size", type=int, default=50_000)
+    export.add_argument("--output", default="export.out", help="Scratch file, removed afterwards")
+    export.set_defaults(func=bench_export)
+
+    paths = commands.add_parser("paths", help="memory of results with and without path interning")
+    paths.add_argument("--keywords", default="*")
+    paths.add_argument("--limit", type=int, default=-1)
+    paths.set_defaults(func=bench_paths)
+
+    rollup = commands.add_parser("rollup", help="recursive folder sizes and top-K subtrees")
+    rollup.add_argument("--root", default=None, help="Directory to summarize (default: everything)")
+    rollup.add_argument("--top", type=int, default=10)
+    rollup.add_argument("--depth", type=int, default=None, help="Only rank subtrees this many levels below the root")
+    rollup.set_defaults(func=bench_rollup)
+
+    duplicates = commands.add_parser("duplicates", help="find_duplicates() per I/O concurrency cap")
+    duplicates.add_argument("--files", type=int, default=2000,
+                            help="Files in the generated tree; 0 searches the selected backend instead")
+    duplicates.add_argument("--duplicate-ratio", type=float, default=0.3)
+    duplicates.add_argument("--max-size", type=int, default=16 * 2 ** 20)
+    duplicates.add_argument("--keywords", default="")
+    duplicates.add_argument("--min-size", type=int, default=1)
+    duplicates.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    duplicates.set_defaults(func=bench_duplicates)
+
+    progressive = commands.add_parser("progressive", help="time to first and last row, search() vs search_progressive()")
+    progressive.add_argument("--keywords", default="report", help="Each prefix is searched, as if typed")
+    progressive.add_argument("--repeat", type=int, default=5)
+    progressive.add_argument("--first-page", type=int, default=100)
+    progressive.add_argument("--deadline", type=float, default=None, help="Seconds before a progressive search is truncated")
+    progressive.set_defaults(func=bench_progressive)
+
+    topk = commands.add_parser("topk", help="top_k() vs sorting every result")
+    topk.add_argument("--keywords", default="")
+    topk.add_argument("--key", type=lambda text: text.split(","), default=["-size"],
+                      help="Comma-separated key fields, '-' prefix for descending, e.g. --key=-size,name")
+    topk.add_argument("--k", type=int, default=100)
+    topk.add_argument("--per-group", default=None, help="Field to group by, e.g. extension")
+    topk.set_defaults(func=bench_topk)
+
+    args = parser.parse_args()
+    if args.command == "duplicates" and args.files:
+        # Runs on its own generated tree; no Everything instance is needed.
+        args.func(None, args)
+        return
+    backend = None
+    if args.synthetic is not None:
+        start = time.perf_counter()
+        backend = et.SyntheticBackend(args.synthetic, seed=args.seed)
+        print(f"Generated {args.synthetic:,} synthetic records in {time.perf_counter() - start:.1f} s")
+    with et.Client(args.dll, dll=backend) as client:
+        args.func(client, args)
+
+
+if __name__ == '__main__':
+    main()
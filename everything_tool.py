@@ -5,13 +5,42 @@ Everything is required to run in the background.
 documentation   : https://www.voidtools.com/support/everything/sdk/
 dependency (SDK): https://www.voidtools.com/Everything-SDK.zip
 """
+import asyncio
+import bisect
+import csv
 import ctypes
 import datetime
+import fnmatch
+import functools
+import hashlib
+import heapq
+import io
+import itertools
+import json
+import mmap
+import operator
+import os
+import queue
+import random
+import re
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+import weakref
+from array import array
+from collections import Counter, OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from ctypes import wintypes
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import IntEnum, IntFlag
 from pathlib import Path
-from typing import Dict, Iterable, Iterator, Final, Callable, Tuple, Optional
+from typing import (
+    Dict, Iterable, Iterator, Final, Callable, Tuple, Optional, List, Union, TypeVar, Any, AsyncIterator, Protocol
+)
 
 WINDOWS_TICKS = 10_000_000  # 100 nanoseconds
 WINDOWS_EPOCH = datetime.datetime(1601, 1, 1)
@@ -161,6 +190,15 @@ class SDKError(Exception):
         super().__init__(f"[{self.error_code.name}] {self.message}")
 
 
+class ResultSetChangedError(Exception):
+    """Raised by a paged search when the total result count changes between windows."""
+
+    def __init__(self, expected: int, actual: int):
+        self.expected = expected
+        self.actual = actual
+        super().__init__(f"Result set changed while paging: expected {expected} results, found {actual}")
+
+
 @dataclass(frozen=True, slots=True)
 class SearchResult:
     """A structured, read-only object for a single search result."""
@@ -182,363 +220,5196 @@ class SearchResult:
     file_list_file_name: Optional[str] = None
 
 
-class Client:
-    def __init__(self, dll_path: Optional[str | Path] = None):
-        self.dll_path = str(dll_path or self._get_default_dll_path())
-        self.dll: Optional[ctypes.WinDLL] = None
-        self._buffers: Dict[str, ctypes._SimpleCData] = {}
-        self._request_func_map: Dict[Request, Tuple[str, Callable]] = {}
-
-    @property
-    def is_connected(self) -> bool:
-        """Checks if the client is connected to the Everything DLL."""
-        return self.dll is not None
+def _lazy_datetime(name: str, ticks_slot: str) -> property:
+    """Builds a property that decodes a raw ticks slot once and caches the datetime in '_<name>'."""
+    cache_slot = f'_{name}'
 
-    def connect(self) -> None:
-        """Loads the Everything DLL and initializes the SDK. Does nothing if already connected."""
-        if self.is_connected:
-            return
+    def getter(self) -> Optional[datetime.datetime]:
         try:
-            self.dll = ctypes.WinDLL(self.dll_path)
-        except FileNotFoundError as err:
-            raise FileNotFoundError(f"Could not find the Everything DLL at '{self.dll_path}'. "
-                                    f"Please ensure the SDK is downloaded and the path is correct.") from err
-        except OSError as err:
-            raise OSError(f"Failed to load DLL from '{self.dll_path}'. "
-                          f"Ensure it's a valid DLL and matches your Python architecture.") from err
-        self._initialize_sdk()
+            return getattr(self, cache_slot)
+        except AttributeError:
+            ticks = getattr(self, ticks_slot)
+            value = None if ticks is None else Client._ticks_to_datetime(ticks)
+            setattr(self, cache_slot, value)
+            return value
 
-    def close(self) -> None:
-        """Unloads the Everything DLL. Does nothing if not connected."""
-        if not self.is_connected:
-            return
-        if self.dll and hasattr(self.dll, "_handle"):
-            ctypes.windll.kernel32.FreeLibrary(self.dll._handle)
-        self.dll = None
+    return property(getter, doc=f"The {name.replace('_', ' ')} as a datetime, decoded on first access.")
 
-    def __enter__(self):
-        """Context manager entry point. Connects to the SDK."""
-        self.connect()
-        return self
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        """Context manager exit point. Closes the connection."""
-        self.close()
+def _raw_field(slot: str) -> property:
+    return property(lambda self: getattr(self, slot))
 
-    @staticmethod
-    def _get_default_dll_path() -> Path:
-        """Determines the default path for the Everything64.dll."""
-        return Path(__file__).parent / "dll" / "Everything64.dll"
 
-    @staticmethod
-    def _filetime_to_datetime(filetime: ctypes.c_ulonglong) -> Optional[datetime.datetime]:
-        """Converts a Windows FILETIME structure to a Python datetime object."""
-        win_ticks = filetime.value
-        if win_ticks == 0 or win_ticks == INVALID_FILETIME:
-            return None
-        try:
-            posix_timestamp = (win_ticks - WINDOWS_TICKS_TO_POSIX_EPOCH) / WINDOWS_TICKS
-            return datetime.datetime.fromtimestamp(posix_timestamp)
-        except (OSError, ValueError):
-            return None
+# SearchResult field -> LazySearchResult storage slot. Dates and attributes are stored raw.
+_LAZY_SLOTS: Final[Dict[str, str]] = {
+    'full_path': '_full_path',
+    'path': '_path',
+    'name': '_name',
+    'extension': '_extension',
+    'size': '_size',
+    'created_time': '_created_ticks',
+    'modified_time': '_modified_ticks',
+    'accessed_time': '_accessed_ticks',
+    'attributes': '_attr_bits',
+    'run_count': '_run_count',
+    'date_run': '_date_run_ticks',
+    'recently_changed': '_recently_changed_ticks',
+    'highlighted_full_path': '_highlighted_full_path',
+    'highlighted_path': '_highlighted_path',
+    'highlighted_name': '_highlighted_name',
+    'file_list_file_name': '_file_list_file_name',
+}
+# Fields whose decoded value is cached in a '_<field>' slot on first access.
+_LAZY_DECODED: Final[frozenset[str]] = frozenset(
+    {'created_time', 'modified_time', 'accessed_time', 'attributes', 'date_run', 'recently_changed'}
+)
 
-    def _ensure_connected(self):
-        if not self.is_connected or not self.dll:
-            raise RuntimeError("Client is not connected. Please call connect() or use a 'with' statement.")
 
-    def _check_for_errors(self):
-        """Centralized error checking to be called after critical operations."""
-        self._ensure_connected()
-        error_code_val = self.dll.Everything_GetLastError()
-        if error_code_val != EverythingError.OK:
-            raise SDKError(EverythingError(error_code_val))
+class LazySearchResult:
+    """
+    A read-only search result that keeps dates as raw FILETIME ticks and attributes as raw bits.
 
-    def _initialize_sdk(self):
-        """Prepare buffers, ctypes definitions, and function mappings."""
-        self._define_ctypes()
-        if not self.dll.Everything_IsDBLoaded():
-            self._check_for_errors()
-        self._create_buffers()
-        self._create_request_map()
+    Exposes the same fields as SearchResult; date and attribute fields are decoded on first access
+    and cached. The ``*_ticks``, ``attr_bits`` and ``is_dir`` accessors never decode.
 
-    def _create_buffers(self) -> None:
-        """Pre-allocates ctypes buffers for performance."""
-        self._buffers = {
-            'full_path': ctypes.create_unicode_buffer(MAX_PATH),
-            'size': ctypes.c_ulonglong(0),
-            'accessed_time': ctypes.c_ulonglong(0),
-            'created_time': ctypes.c_ulonglong(0),
-            'modified_time': ctypes.c_ulonglong(0),
-            'recently_changed': ctypes.c_ulonglong(0),
-            'date_run': ctypes.c_ulonglong(0),
-        }
+    Rows are instances of a slim subclass generated per Request mask (see ``row_type()``), which
+    only has slots for the requested fields; fields that were not requested read as None.
+    """
+    __slots__ = ()
+    _MASK: int = 0
+    _INTERNED: bool = False
+    _SEP: str = '\\'
+    _FIELDS: Tuple[str, ...] = ()
 
-    def _create_request_map(self) -> None:
-        """Maps Requests to the corresponding result key and getter method."""
-        self._request_func_map = {
-            Request.HIGHLIGHTED_FULL_PATH_AND_FILE_NAME: ('highlighted_full_path', self._get_highlighted_full_path),
-            Request.HIGHLIGHTED_PATH: ('highlighted_path', self._get_highlighted_path),
-            Request.HIGHLIGHTED_FILE_NAME: ('highlighted_name', self._get_highlighted_name),
-            Request.DATE_RECENTLY_CHANGED: ('recently_changed', self._get_recently_changed),
-            Request.DATE_RUN: ('date_run', self._get_date_run),
-            Request.RUN_COUNT: ('run_count', self._get_run_count),
-            Request.FILE_LIST_FILE_NAME: ('file_list_file_name', self._get_file_list_file_name),
-            Request.ATTRIBUTES: ('attributes', self._get_attributes),
-            Request.DATE_ACCESSED: ('accessed_time', self._get_accessed_time),
-            Request.DATE_MODIFIED: ('modified_time', self._get_modified_time),
-            Request.DATE_CREATED: ('created_time', self._get_created_time),
-            Request.SIZE: ('size', self._get_size),
-            Request.EXTENSION: ('extension', self._get_extension),
-            Request.FULL_PATH_AND_FILE_NAME: ('full_path', self._get_full_path),
-            Request.PATH: ('path', self._get_path),
-            Request.FILE_NAME: ('name', self._get_name),
-        }
+    @classmethod
+    def row_type(cls, flags: Request) -> type:
+        """Returns the slim row class for a Request mask, creating it on first use."""
+        return _lazy_row_type(int(flags))
 
-    def _define_ctypes(self) -> None:
-        """Define argument and return types for the DLL functions."""
-        if not self.dll:
-            return
+    full_path = _raw_field('_full_path')
+    path = _raw_field('_path')
+    name = _raw_field('_name')
+    extension = _raw_field('_extension')
+    size = _raw_field('_size')
+    run_count = _raw_field('_run_count')
+    highlighted_full_path = _raw_field('_highlighted_full_path')
+    highlighted_path = _raw_field('_highlighted_path')
+    highlighted_name = _raw_field('_highlighted_name')
+    file_list_file_name = _raw_field('_file_list_file_name')
 
-        BOOL = wintypes.BOOL
-        DWORD = wintypes.DWORD
-        LPCWSTR = wintypes.LPCWSTR
-        LPWSTR = wintypes.LPWSTR
-        HMODULE = wintypes.HMODULE
-        P_ULL = ctypes.POINTER(ctypes.c_ulonglong)
+    created_ticks = _raw_field('_created_ticks')
+    modified_ticks = _raw_field('_modified_ticks')
+    accessed_ticks = _raw_field('_accessed_ticks')
+    date_run_ticks = _raw_field('_date_run_ticks')
+    recently_changed_ticks = _raw_field('_recently_changed_ticks')
+    attr_bits = _raw_field('_attr_bits')
 
-        signatures = (
-            # Get String Results (Index -> String Pointer)
-            ([DWORD], LPCWSTR, [
-                "Everything_GetResultExtensionW", "Everything_GetResultFileNameW",
-                "Everything_GetResultPathW", "Everything_GetResultHighlightedFileNameW",
-                "Everything_GetResultHighlightedPathW", "Everything_GetResultHighlightedFullPathAndFileNameW",
-                "Everything_GetResultFileListFileNameW",
-            ]),
-            # Get Integer Results (Index -> Int)
-            ([DWORD], DWORD, ["Everything_GetResultRunCount", "Everything_GetResultAttributes"]),
-            # Get Numeric/Time Data (Index, Output Pointer -> Void)
-            ([DWORD, P_ULL], None, [
-                "Everything_GetResultDateCreated", "Everything_GetResultDateModified",
-                "Everything_GetResultDateAccessed", "Everything_GetResultSize",
-                "Everything_GetResultDateRecentlyChanged", "Everything_GetResultDateRun",
-            ]),
-            # Set Boolean Options (Bool -> Void)
-            ([BOOL], None, [
-                "Everything_SetMatchPath", "Everything_SetMatchCase",
-                "Everything_SetMatchWholeWord", "Everything_SetRegex",
-            ]),
-            # Set Numeric Options (Int -> Void)
-            ([DWORD], None, [
-                "Everything_SetRequestFlags", "Everything_SetSort",
-                "Everything_SetOffset", "Everything_SetMax",
-            ]),
-            # Get Global State/Versions (Void -> Int)
-            ([], DWORD, [
-                "Everything_GetMajorVersion", "Everything_GetMinorVersion",
-                "Everything_GetRevision", "Everything_GetBuildNumber",
-                "Everything_GetLastError", "Everything_GetNumResults",
-            ]),
-            # Set Search String (String -> Void)
-            ([LPCWSTR], None, ["Everything_SetSearchW"]),
-            # Void Actions (Void -> Void)
-            ([], None, ["Everything_Reset", "Everything_Exit"]),
-            # Check DB Status (Void -> Bool)
-            ([], BOOL, ["Everything_IsDBLoaded"]),
-            # Execute Query (Bool -> Bool)
-            ([BOOL], BOOL, ["Everything_QueryW"]),
-            # Get Full Path into Buffer (Index, Buffer, Size -> Void)
-            ([DWORD, LPWSTR, DWORD], None, ["Everything_GetResultFullPathNameW"]),
+    created_time = _lazy_datetime('created_time', '_created_ticks')
+    modified_time = _lazy_datetime('modified_time', '_modified_ticks')
+    accessed_time = _lazy_datetime('accessed_time', '_accessed_ticks')
+    date_run = _lazy_datetime('date_run', '_date_run_ticks')
+    recently_changed = _lazy_datetime('recently_changed', '_recently_changed_ticks')
+
+    @property
+    def attributes(self) -> Optional[str]:
+        """The attribute letters (e.g. 'AHR'), decoded on first access."""
+        try:
+            return self._attributes
+        except AttributeError:
+            bits = self._attr_bits
+            self._attributes = None if bits is None else Client._attributes_to_str(bits)
+            return self._attributes
+
+    @property
+    def is_dir(self) -> bool:
+        """Whether the DIRECTORY attribute bit is set. Requires Request.ATTRIBUTES."""
+        bits = self._attr_bits
+        return bits is not None and bool(bits & _DIRECTORY_BIT)
+
+    def _raw(self) -> tuple:
+        return tuple(getattr(self, slot) for slot in _LAZY_SLOTS.values())
+
+    def __eq__(self, other):
+        if isinstance(other, LazySearchResult):
+            return self._raw() == other._raw()
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self._raw())
+
+    def __reduce__(self):
+        row_type = type(self)
+        values = tuple(getattr(self, slot) for slot in row_type._FIELDS)
+        return _rebuild_lazy_row, (row_type._MASK, values, row_type._INTERNED, row_type._SEP)
+
+    def __repr__(self):
+        slots = type(self)._FIELDS
+        if type(self)._INTERNED:
+            slots = tuple(slot for slot in slots if slot not in ('_dir', '_leaf')) + ('_full_path',)
+        fields = ", ".join(
+            f"{slot.lstrip('_')}={getattr(self, slot)!r}" for slot in slots
         )
+        return f"{type(self).__name__}({fields})"
 
-        for arg_types, res_type, func_names in signatures:
-            for func_name in func_names:
-                func = getattr(self.dll, func_name, None)
-                if func:
-                    func.argtypes = arg_types
-                    func.restype = res_type
+    def to_search_result(self) -> SearchResult:
+        """Decodes every field and returns an equivalent SearchResult."""
+        return SearchResult(**{field: getattr(self, field) for field in SearchResult.__dataclass_fields__})
 
-        if hasattr(ctypes, "windll") and hasattr(ctypes.windll, "kernel32"):
-            try:
-                lib = ctypes.windll.kernel32.FreeLibrary
-                lib.argtypes = [HMODULE]
-                lib.restype = BOOL
-            except AttributeError:
-                pass
 
-    def _setup_query(
-            self, keywords: str, match_path: bool, match_case: bool,
-            whole_word: bool, regex: bool, offset: int, limit: int,
-            flags: Request, sort: Sort
-    ) -> None:
-        """Sets all query parameters before execution."""
-        self._ensure_connected()
-        self.dll.Everything_Reset()
-        self.dll.Everything_SetSearchW(keywords)
-        self.dll.Everything_SetMatchPath(match_path)
-        self.dll.Everything_SetMatchCase(match_case)
-        self.dll.Everything_SetMatchWholeWord(whole_word)
-        self.dll.Everything_SetRegex(regex)
-        self.dll.Everything_SetRequestFlags(flags.value)
-        self.dll.Everything_SetSort(sort.value)
-        if offset > 0:
-            self.dll.Everything_SetOffset(offset)
-        if limit >= 0:
-            self.dll.Everything_SetMax(limit)
+# Unrequested fields and decoding caches of unrequested fields fall back to these class defaults.
+for _slot in (*_LAZY_SLOTS.values(), *(f'_{field}' for field in _LAZY_DECODED)):
+    setattr(LazySearchResult, _slot, None)
+del _slot
+_DIRECTORY_BIT: Final[int] = FileAttribute.DIRECTORY.value
 
-    def _get_name(self, idx: int) -> str:
-        return self.dll.Everything_GetResultFileNameW(idx)
 
-    def _get_path(self, idx: int) -> str:
-        return self.dll.Everything_GetResultPathW(idx)
+class PackedStrings:
+    """An offset-packed string column: one concatenated buffer plus an array of end offsets."""
+    __slots__ = ('_data', '_offsets')
 
-    def _get_full_path(self, idx: int) -> str:
-        buffer = self._buffers['full_path']
-        self.dll.Everything_GetResultFullPathNameW(idx, buffer, MAX_PATH)
-        return buffer.value
+    _CHUNK = 65536
 
-    def _get_size(self, idx: int) -> int:
-        buffer = self._buffers['size']
-        self.dll.Everything_GetResultSize(idx, buffer)
-        return buffer.value
+    def __init__(self, strings: Iterable[str] = ()):
+        offsets = array('Q')
+        chunks: List[str] = []
+        pending: List[str] = []
+        end = 0
+        for value in strings:
+            if value is None:
+                value = ""
+            end += len(value)
+            offsets.append(end)
+            pending.append(value)
+            if len(pending) >= self._CHUNK:
+                chunks.append("".join(pending))
+                pending.clear()
+        chunks.append("".join(pending))
+        self._data = "".join(chunks)
+        self._offsets = offsets
 
-    def _get_extension(self, idx: int) -> str:
-        return self.dll.Everything_GetResultExtensionW(idx)
+    def __len__(self) -> int:
+        return len(self._offsets)
 
-    def _get_run_count(self, idx: int) -> int:
-        return self.dll.Everything_GetResultRunCount(idx)
+    def __getitem__(self, idx: int) -> str:
+        if idx < 0:
+            idx += len(self._offsets)
+        end = self._offsets[idx]
+        start = self._offsets[idx - 1] if idx > 0 else 0
+        return self._data[start:end]
 
-    def _get_attributes(self, idx: int) -> str:
-        attr_int = self.dll.Everything_GetResultAttributes(idx)
-        if attr_int == 0:
-            return ""
+    def __iter__(self) -> Iterator[str]:
+        data = self._data
+        start = 0
+        for end in self._offsets:
+            yield data[start:end]
+            start = end
 
-        attr_flags = FileAttribute(attr_int)
-        chars = [
-            ATTRIBUTE_MAP[flag]
-            for flag in attr_flags
-            if flag in ATTRIBUTE_MAP
-        ]
-        return "".join(sorted(chars))
+    @property
+    def nbytes(self) -> int:
+        """Approximate payload size: the character buffer plus the offset array."""
+        return len(self._data.encode('utf-16-le')) + self._offsets.itemsize * len(self._offsets)
 
-    def _get_file_list_file_name(self, idx: int) -> str:
-        return self.dll.Everything_GetResultFileListFileNameW(idx)
 
-    def _get_accessed_time(self, idx: int) -> Optional[datetime.datetime]:
-        buffer = self._buffers['accessed_time']
-        self.dll.Everything_GetResultDateAccessed(idx, buffer)
-        return self._filetime_to_datetime(buffer)
+class InternedStrings:
+    """A dictionary-encoded string column: a table of unique values plus a uint32 index per row."""
+    __slots__ = ('table', 'ids')
 
-    def _get_created_time(self, idx: int) -> Optional[datetime.datetime]:
-        buffer = self._buffers['created_time']
-        self.dll.Everything_GetResultDateCreated(idx, buffer)
-        return self._filetime_to_datetime(buffer)
+    def __init__(self, strings: Iterable[str] = ()):
+        lookup: Dict[str, int] = {}
+        table: List[str] = []
+        ids = array('I')
+        for value in strings:
+            key = lookup.get(value)
+            if key is None:
+                key = lookup[value] = len(table)
+                table.append(value)
+            ids.append(key)
+        self.table = table
+        self.ids = ids
 
-    def _get_modified_time(self, idx: int) -> Optional[datetime.datetime]:
-        buffer = self._buffers['modified_time']
-        self.dll.Everything_GetResultDateModified(idx, buffer)
-        return self._filetime_to_datetime(buffer)
+    def __len__(self) -> int:
+        return len(self.ids)
 
-    def _get_recently_changed(self, idx: int) -> Optional[datetime.datetime]:
-        buffer = self._buffers['recently_changed']
-        self.dll.Everything_GetResultDateRecentlyChanged(idx, buffer)
-        return self._filetime_to_datetime(buffer)
+    def __getitem__(self, idx: int) -> str:
+        return self.table[self.ids[idx]]
 
-    def _get_date_run(self, idx: int) -> Optional[datetime.datetime]:
-        buffer = self._buffers['date_run']
-        self.dll.Everything_GetResultDateRun(idx, buffer)
-        return self._filetime_to_datetime(buffer)
+    def __iter__(self) -> Iterator[str]:
+        table = self.table
+        return (table[key] for key in self.ids)
 
-    def _get_highlighted_name(self, idx: int) -> str:
-        return self.dll.Everything_GetResultHighlightedFileNameW(idx)
+    @property
+    def nbytes(self) -> int:
+        """Approximate payload size: the unique values plus the index array."""
+        return sum(len(s.encode('utf-16-le')) for s in self.table) + self.ids.itemsize * len(self.ids)
 
-    def _get_highlighted_path(self, idx: int) -> str:
-        return self.dll.Everything_GetResultHighlightedPathW(idx)
 
-    def _get_highlighted_full_path(self, idx: int) -> str:
-        return self.dll.Everything_GetResultHighlightedFullPathAndFileNameW(idx)
+def _join_path(directory: str, name: str, sep: str = '\\') -> str:
+    """Rebuilds a full path from Everything_GetResultPathW and Everything_GetResultFileNameW."""
+    return f"{directory}{sep}{name}" if directory else name
 
-    def version(self) -> str:
-        """Returns the version of the Everything instance."""
-        self._ensure_connected()
-        return "{}.{}.{}.{}".format(
-            self.dll.Everything_GetMajorVersion(),
-            self.dll.Everything_GetMinorVersion(),
-            self.dll.Everything_GetRevision(),
-            self.dll.Everything_GetBuildNumber()
-        )
 
-    def search(
-            self,
-            keywords: str,
-            match_path: bool = False,
-            match_case: bool = False,
+def _backend_sep(dll) -> str:
+    """The path separator of a backend: its `sep` attribute, or '\\' for the Everything SDK."""
+    return getattr(dll, 'sep', '\\')
+
+
+class InternedPaths:
+    """
+    A full path column stored as an interned directory column plus a packed file name column.
+
+    Large result sets share a few thousand parent directories, so each row costs a directory id
+    and its file name instead of a full copy of its path. Paths are joined on access with `sep`.
+    """
+    __slots__ = ('directories', 'names', 'sep')
+
+    def __init__(self, directories: InternedStrings, names: PackedStrings, sep: str = '\\'):
+        self.directories = directories
+        self.names = names
+        self.sep = sep
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __getitem__(self, idx: int) -> str:
+        return _join_path(self.directories[idx], self.names[idx], self.sep)
+
+    def __iter__(self) -> Iterator[str]:
+        sep = self.sep
+        return (_join_path(directory, name, sep) for directory, name in zip(self.directories, self.names))
+
+    def dir_id(self, idx: int) -> int:
+        """The row's index into ``directories.table``."""
+        return self.directories.ids[idx]
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate payload size of both columns."""
+        return self.directories.nbytes + self.names.nbytes
+
+
+Column = Union[array, PackedStrings, InternedStrings, InternedPaths]
+
+# Request -> (column name, DLL getter, storage kind). Date columns hold raw FILETIME ticks.
+COLUMN_SPECS: Final[Dict[Request, Tuple[str, str, str]]] = {
+    Request.FILE_NAME: ('name', 'Everything_GetResultFileNameW', 'packed'),
+    Request.PATH: ('path', 'Everything_GetResultPathW', 'interned'),
+    Request.FULL_PATH_AND_FILE_NAME: ('full_path', 'Everything_GetResultFullPathNameW', 'buffer'),
+    Request.EXTENSION: ('extension', 'Everything_GetResultExtensionW', 'interned'),
+    Request.SIZE: ('size', 'Everything_GetResultSize', 'u64'),
+    Request.DATE_CREATED: ('created_time', 'Everything_GetResultDateCreated', 'u64'),
+    Request.DATE_MODIFIED: ('modified_time', 'Everything_GetResultDateModified', 'u64'),
+    Request.DATE_ACCESSED: ('accessed_time', 'Everything_GetResultDateAccessed', 'u64'),
+    Request.ATTRIBUTES: ('attributes', 'Everything_GetResultAttributes', 'u32'),
+    Request.FILE_LIST_FILE_NAME: ('file_list_file_name', 'Everything_GetResultFileListFileNameW', 'interned'),
+    Request.RUN_COUNT: ('run_count', 'Everything_GetResultRunCount', 'u32'),
+    Request.DATE_RUN: ('date_run', 'Everything_GetResultDateRun', 'u64'),
+    Request.DATE_RECENTLY_CHANGED: ('recently_changed', 'Everything_GetResultDateRecentlyChanged', 'u64'),
+    Request.HIGHLIGHTED_FILE_NAME: ('highlighted_name', 'Everything_GetResultHighlightedFileNameW', 'packed'),
+    Request.HIGHLIGHTED_PATH: ('highlighted_path', 'Everything_GetResultHighlightedPathW', 'interned'),
+    Request.HIGHLIGHTED_FULL_PATH_AND_FILE_NAME: (
+        'highlighted_full_path', 'Everything_GetResultHighlightedFullPathAndFileNameW', 'packed'),
+}
+
+
+@dataclass(slots=True)
+class ColumnarResult:
+    """
+    A column-oriented result set with one compact column per requested field.
+
+    Integer fields are ``array('Q')`` (sizes and raw FILETIME ticks) or ``array('I')``
+    (attribute bits and run counts); string fields are ``PackedStrings`` or ``InternedStrings``,
+    and the full path is an ``InternedPaths`` when requested with ``intern_paths``.
+    """
+    count: int
+    columns: Dict[str, Column]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, name: str) -> Column:
+        return self.columns[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def row(self, idx: int) -> SearchResult:
+        """Decodes a single row into a SearchResult (dates become datetimes, attributes a string)."""
+        data = {}
+        for key, column in self.columns.items():
+            value = column[idx]
+            if key in _TICK_COLUMNS:
+                value = Client._ticks_to_datetime(value)
+            elif key == 'attributes':
+                value = Client._attributes_to_str(value)
+            data[key] = value
+        return SearchResult(**data)
+
+    def to_numpy(self) -> Dict[str, object]:
+        """
+        Returns zero-copy NumPy views of the integer columns (requires numpy).
+
+        64-bit columns are exposed as uint64 since INVALID_FILETIME does not fit in int64;
+        use ``.view('int64')`` if a signed view is preferred.
+        """
+        try:
+            import numpy
+        except ImportError as err:
+            raise ImportError("to_numpy() requires numpy. Install it with 'pip install numpy'.") from err
+        dtypes = {'Q': numpy.uint64, 'I': numpy.uint32}
+        return {
+            key: numpy.frombuffer(column, dtype=dtypes[column.typecode])
+            for key, column in self.columns.items()
+            if isinstance(column, array)
+        }
+
+
+_TICK_COLUMNS: Final[frozenset[str]] = frozenset(
+    key for key, _, kind in COLUMN_SPECS.values() if kind == 'u64' and key != 'size'
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _lazy_row_type(mask: int, intern_paths: bool = False, sep: str = '\\') -> type:
+    """
+    Generates a LazySearchResult subclass with slots for just the fields in a Request mask.
+
+    With `intern_paths`, a requested full path is stored as its (shared) directory string and its
+    file name, and joined with `sep` on access.
+    """
+    keys = [key for flag, (key, _, _) in COLUMN_SPECS.items() if flag & mask]
+    intern_paths = intern_paths and 'full_path' in keys
+    fields = tuple(itertools.chain.from_iterable(
+        ('_dir', '_leaf') if intern_paths and key == 'full_path' else (_LAZY_SLOTS[key],) for key in keys
+    ))
+    caches = tuple(f'_{key}' for key in keys if key in _LAZY_DECODED)
+    params = ", ".join(f"v{n}" for n in range(len(fields)))
+    body = "".join(f"\n    self.{slot} = v{n}" for n, slot in enumerate(fields)) or "\n    pass"
+    namespace: Dict[str, object] = {}
+    exec(f"def __init__(self, {params}):{body}", namespace)
+    attributes = {
+        '__slots__': fields + caches,
+        '__init__': namespace['__init__'],
+        '_MASK': mask,
+        '_INTERNED': intern_paths,
+        '_SEP': sep,
+        '_FIELDS': fields,
+    }
+    if intern_paths:
+        attributes['_full_path'] = property(lambda self: _join_path(self._dir, self._leaf, sep))
+    return type(f"LazySearchResult_{mask:04x}{'_interned' if intern_paths else ''}", (LazySearchResult,), attributes)
+
+
+def _rebuild_lazy_row(mask: int, values: tuple, intern_paths: bool = False, sep: str = '\\') -> LazySearchResult:
+    # Call with the same arguments as the extractors do, so lru_cache returns the same row class.
+    row_type = _lazy_row_type(mask, True, sep) if intern_paths else _lazy_row_type(mask)
+    return row_type(*values)
+
+
+@functools.lru_cache(maxsize=None)
+def _extractor_factory(mask: int, lazy: bool, intern_paths: bool = False) -> Callable:
+    """
+    Compiles a row extractor factory specialized for a Request mask.
+
+    Returns ``bind(dll, row_type)``, which looks up the getters and allocates the output buffers
+    once, then returns ``extract(index) -> row`` that calls only the requested getters and builds
+    the row directly, without an intermediate dict.
+
+    With `intern_paths` (lazy rows only), the full path is read as Everything_GetResultPathW plus
+    Everything_GetResultFileNameW, and equal directories share one string per bound extractor.
+    """
+    binds: List[str] = []
+    calls: List[str] = []
+    args: List[str] = []
+    intern_paths = intern_paths and lazy and bool(mask & Request.FULL_PATH_AND_FILE_NAME)
+    if intern_paths:
+        binds += ["f_dir = dll.Everything_GetResultPathW", "f_leaf = dll.Everything_GetResultFileNameW",
+                  "directories = {}", "intern = directories.setdefault"]
+        calls += ["d = f_dir(i)", "d = intern(d, d)", "leaf = f_leaf(i)"]
+    for flag, (key, func_name, kind) in COLUMN_SPECS.items():
+        if not flag & mask:
+            continue
+        if intern_paths and key in ('full_path', 'path', 'name'):
+            args.append({'full_path': "d, leaf", 'path': "d", 'name': "leaf"}[key])
+            continue
+        func = f"f_{key}"
+        binds.append(f"{func} = dll.{func_name}")
+        if kind == 'u64':
+            binds.append(f"b_{key} = c_ulonglong(0)")
+            calls.append(f"{func}(i, b_{key})")
+            value = f"b_{key}.value"
+            if not lazy and key in _TICK_COLUMNS:
+                value = f"to_datetime({value})"
+        elif kind == 'buffer':
+            binds.append(f"b_{key} = create_unicode_buffer(MAX_PATH)")
+            calls.append(f"{func}(i, b_{key}, MAX_PATH)")
+            value = f"b_{key}.value"
+        else:
+            value = f"{func}(i)"
+            if not lazy and key == 'attributes':
+                value = f"to_attributes({value})"
+        args.append(value if lazy else f"{key}={value}")
+
+    indent = "\n        "
+    source = (
+        "def bind(dll, row_type):\n"
+        + "".join(f"    {line}\n" for line in binds)
+        + "    def extract(i):"
+        + "".join(indent + line for line in calls)
+        + f"{indent}return row_type({', '.join(args)})\n"
+        + "    return extract\n"
+    )
+    namespace: Dict[str, object] = {
+        'c_ulonglong': ctypes.c_ulonglong,
+        'create_unicode_buffer': ctypes.create_unicode_buffer,
+        'MAX_PATH': MAX_PATH,
+        'to_datetime': Client._ticks_to_datetime,
+        'to_attributes': Client._attributes_to_str,
+    }
+    label = f"{mask:04x}{' lazy' if lazy else ''}{' interned' if intern_paths else ''}"
+    exec(compile(source, f"<extractor {label}>", "exec"), namespace)
+    return namespace['bind']
+
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize_query(keywords: str) -> str:
+    """Collapses runs of whitespace outside double quotes, so equivalent queries share a cache key."""
+    parts = keywords.strip().split('"')
+    parts[::2] = (_WHITESPACE.sub(" ", part) for part in parts[::2])
+    return '"'.join(parts)
+
+
+@dataclass(slots=True)
+class CacheStats:
+    """Counters for a QueryCache."""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+@dataclass(slots=True)
+class _CacheEntry:
+    rows: tuple
+    fingerprint: Optional[Tuple[int, int]]
+    expires: float
+
+
+class QueryCache:
+    """
+    A size-bounded LRU cache of materialized query results with a per-entry TTL.
+
+    Entries hold the results as a tuple of immutable rows plus an optional change fingerprint
+    (total result count and newest DATE_MODIFIED tick) used to revalidate them once their TTL
+    has passed.
+    """
+
+    def __init__(self, max_entries: int = 128, ttl: Optional[float] = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._clock = clock
+        self._entries: OrderedDict[tuple, _CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: tuple, stale: bool = False) -> Optional[_CacheEntry]:
+        """
+        Returns a live entry and marks it most recently used, or None (counted as a miss).
+
+        With `stale`, an expired entry is returned as well, for the caller to revalidate with
+        fresh() and then _refresh() or _demote() it.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not stale and entry.expires <= self._clock():
+                del self._entries[key]
+                self.stats.expirations += 1
+                entry = None
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return entry
+
+    def put(self, key: tuple, rows: tuple, fingerprint: Optional[Tuple[int, int]] = None) -> None:
+        """Stores an entry, evicting the least recently used ones beyond max_entries."""
+        expires = self._clock() + self.ttl if self.ttl is not None else float('inf')
+        with self._lock:
+            self._entries[key] = _CacheEntry(rows, fingerprint, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def invalidate(self, key: Optional[tuple] = None) -> None:
+        """Drops one entry, or every entry if no key is given."""
+        with self._lock:
+            if key is None:
+                self.stats.invalidations += len(self._entries)
+                self._entries.clear()
+            elif self._entries.pop(key, None) is not None:
+                self.stats.invalidations += 1
+
+    def fresh(self, entry: _CacheEntry) -> bool:
+        """Whether an entry is still within its TTL."""
+        return entry.expires > self._clock()
+
+    def _refresh(self, key: tuple) -> None:
+        """Restarts the TTL of an entry that passed revalidation."""
+        expires = self._clock() + self.ttl if self.ttl is not None else float('inf')
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.expires = expires
+
+    def _demote(self, key: tuple) -> None:
+        """Reclassifies a hit that failed validation as an invalidation and a miss."""
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.stats.invalidations += 1
+            self.stats.hits -= 1
+            self.stats.misses += 1
+
+
+@dataclass(slots=True)
+class QueryStats:
+    """
+    Timings (in seconds) and counters for one query, passed to QueryObserver.on_query().
+
+    Per-field timings and decoded strings/bytes are measured on every `sample_every`-th row
+    (see Client.add_observer) and extrapolated to all rows read. `cached` marks a search served
+    from the Client cache; its `query` time is that of the revalidation probe, if one ran.
+    """
+    keywords: str
+    flags: int
+    sort: int
+    setup: float = 0.0
+    query: float = 0.0
+    count: float = 0.0
+    extract: float = 0.0
+    rows: int = 0
+    sampled_rows: int = 0
+    field_times: Dict[str, float] = field(default_factory=dict)
+    strings_decoded: int = 0
+    bytes_decoded: int = 0
+    error: Optional[EverythingError] = None
+    cached: bool = False
+
+    @property
+    def total(self) -> float:
+        return self.setup + self.query + self.count + self.extract
+
+
+class QueryObserver:
+    """Base class for Client observers. Override the hooks you need; the defaults do nothing."""
+
+    def on_query(self, stats: QueryStats) -> None:
+        """Called once a query's results have been read (or the read stopped early or failed)."""
+
+    def on_error(self, error: EverythingError) -> None:
+        """Called for every SDK error code raised by Client._check_for_errors()."""
+
+
+class Histogram:
+    """A latency histogram with power-of-two microsecond buckets."""
+    __slots__ = ('buckets', 'count', 'total', 'min', 'max')
+
+    def __init__(self):
+        self.buckets: Counter = Counter()
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.buckets[int(seconds * 1e6).bit_length()] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q: float) -> float:
+        """The upper bound in seconds of the bucket holding the q-th percentile (0 < q <= 100)."""
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min((1 << bucket) / 1e6, self.max)
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'min': self.min if self.count else 0.0,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'buckets_us': {1 << bucket: n for bucket, n in sorted(self.buckets.items())},
+        }
+
+
+class MetricsObserver(QueryObserver):
+    """
+    Aggregates QueryStats into histograms and counters.
+
+    Histograms are kept per phase ('setup', 'query', 'count', 'extract', 'total') and per
+    field as the average per-row getter cost ('field.full_path', 'field.modified_time', ...).
+    Searches served from the Client cache are counted in `cache_hits` and left out of them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.histograms: Dict[str, Histogram] = {}
+            self.queries = 0
+            self.cache_hits = 0
+            self.rows = 0
+            self.strings_decoded = 0
+            self.bytes_decoded = 0
+            self.errors: Counter = Counter()
+
+    def _histogram(self, name: str) -> Histogram:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        return histogram
+
+    def on_query(self, stats: QueryStats) -> None:
+        with self._lock:
+            if stats.cached:
+                self.cache_hits += 1
+                return
+            self.queries += 1
+            self.rows += stats.rows
+            self.strings_decoded += stats.strings_decoded
+            self.bytes_decoded += stats.bytes_decoded
+            for phase in ('setup', 'query', 'count', 'extract', 'total'):
+                self._histogram(phase).record(getattr(stats, phase))
+            if stats.rows:
+                for key, seconds in stats.field_times.items():
+                    self._histogram(f'field.{key}').record(seconds / stats.rows)
+
+    def on_error(self, error: EverythingError) -> None:
+        with self._lock:
+            self.errors[error.name] += 1
+
+    def export(self) -> Dict[str, Any]:
+        """Returns every counter and histogram as plain data, ready for json.dumps()."""
+        with self._lock:
+            return {
+                'queries': self.queries,
+                'cache_hits': self.cache_hits,
+                'rows': self.rows,
+                'strings_decoded': self.strings_decoded,
+                'bytes_decoded': self.bytes_decoded,
+                'errors': dict(self.errors),
+                'histograms': {name: histogram.to_dict() for name, histogram in sorted(self.histograms.items())},
+            }
+
+
+@dataclass(slots=True)
+class ExportStats:
+    """Throughput of one Client.export() call."""
+    rows: int = 0
+    bytes_written: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def mb_per_sec(self) -> float:
+        return self.bytes_written / 1e6 / self.elapsed if self.elapsed else 0.0
+
+
+_STRING_KINDS: Final[frozenset[str]] = frozenset(('buffer', 'packed', 'interned', 'path'))
+
+
+class ExportSink:
+    """
+    Base class for Client.export() destinations.
+
+    A sink receives the output columns once through open(), then one column-major batch at a time
+    through write_batch(), and is closed once. Integer columns (sizes, attribute bits and raw
+    FILETIME ticks) arrive as arrays, string columns as packed or interned string columns.
+    `target` is a path, opened and closed by the sink, or an already open binary file.
+    """
+
+    def __init__(self, target: Union[str, Path, Any]):
+        self.target = target
+        self.bytes_written = 0
+        self._file = None
+        self._owns_file = False
+
+    def open(self, fields: List[Tuple[str, str]]) -> None:
+        """:param fields: (column name, COLUMN_SPECS kind) pairs in output order."""
+        if isinstance(self.target, (str, Path)):
+            self._file = open(self.target, 'wb')
+            self._owns_file = True
+        else:
+            self._file = self.target
+        self.fields = fields
+
+    def write_batch(self, columns: Dict[str, Column], rows: int) -> None:
+        raise NotImplementedError
+
+    def _write(self, data: bytes) -> None:
+        self._file.write(data)
+        self.bytes_written += len(data)
+
+    def close(self) -> None:
+        if self._file is None:
+            return
+        if self._owns_file:
+            self._file.close()
+        else:
+            self._file.flush()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class NDJSONSink(ExportSink):
+    """Writes one JSON object per line (UTF-8)."""
+
+    def open(self, fields: List[Tuple[str, str]]) -> None:
+        super().open(fields)
+        # Every row is rendered through one %-template; values are pre-encoded per column.
+        self._template = "{" + ",".join(f"{json.dumps(key)}:%s" for key, _ in fields) + "}\n"
+        self._encode_string = json.JSONEncoder(ensure_ascii=False).encode
+
+    def write_batch(self, columns: Dict[str, Column], rows: int) -> None:
+        encoded = []
+        for key, kind in self.fields:
+            column = columns[key]
+            if kind == 'interned':
+                table = [self._encode_string(value) for value in column.table]
+                encoded.append([table[i] for i in column.ids])
+            elif kind in _STRING_KINDS:
+                encoded.append(list(map(self._encode_string, column)))
+            else:
+                encoded.append(list(map(str, column)))
+        template = self._template
+        self._write("".join([template % row for row in zip(*encoded)]).encode('utf-8'))
+
+
+class CSVSink(ExportSink):
+    """Writes RFC 4180 CSV (UTF-8) with a header row."""
+
+    def __init__(self, target: Union[str, Path, Any], dialect: str = 'excel'):
+        super().__init__(target)
+        self.dialect = dialect
+
+    def open(self, fields: List[Tuple[str, str]]) -> None:
+        super().open(fields)
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, dialect=self.dialect)
+        self._writer.writerow([key for key, _ in fields])
+        self._flush()
+
+    def _flush(self) -> None:
+        self._write(self._buffer.getvalue().encode('utf-8'))
+        self._buffer.seek(0)
+        self._buffer.truncate()
+
+    def write_batch(self, columns: Dict[str, Column], rows: int) -> None:
+        self._writer.writerows(zip(*(columns[key] for key, _ in self.fields)))
+        self._flush()
+
+
+class ArrowSink(ExportSink):
+    """
+    Writes an Arrow IPC file or a Parquet file, one record batch (row group) per batch
+    (requires pyarrow). Integer columns are handed to Arrow without copying.
+
+    :param format: 'ipc' or 'parquet'.
+    :param compression: Parquet compression codec, e.g. 'snappy' or 'zstd'.
+    """
+
+    def __init__(self, target: Union[str, Path, Any], format: str = 'ipc', compression: Optional[str] = 'snappy'):
+        if format not in ('ipc', 'parquet'):
+            raise ValueError("format must be 'ipc' or 'parquet'")
+        try:
+            import pyarrow
+        except ImportError as err:
+            raise ImportError("ArrowSink requires pyarrow. Install it with 'pip install pyarrow'.") from err
+        super().__init__(target)
+        self.format = format
+        self.compression = compression
+        self._pa = pyarrow
+        self._writer = None
+
+    def open(self, fields: List[Tuple[str, str]]) -> None:
+        super().open(fields)
+        pa = self._pa
+        types = {'u64': pa.uint64(), 'u32': pa.uint32()}
+        self._schema = pa.schema([(key, types.get(kind, pa.large_string())) for key, kind in fields])
+        self._start = self._file.tell() if hasattr(self._file, 'tell') else 0
+        if self.format == 'parquet':
+            import pyarrow.parquet
+            self._writer = pyarrow.parquet.ParquetWriter(self._file, self._schema, compression=self.compression)
+        else:
+            self._writer = pa.ipc.new_file(self._file, self._schema)
+
+    def write_batch(self, columns: Dict[str, Column], rows: int) -> None:
+        pa = self._pa
+        arrays = []
+        for (key, kind), arrow_field in zip(self.fields, self._schema):
+            column = columns[key]
+            if kind in _STRING_KINDS:
+                arrays.append(pa.array(list(column), type=arrow_field.type))
+            else:
+                arrays.append(pa.Array.from_buffers(arrow_field.type, rows, [None, pa.py_buffer(column)]))
+        self._writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self._schema))
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            self.bytes_written = self._file.tell() - self._start
+        super().close()
+
+
+@dataclass(frozen=True, slots=True)
+class ChangeCursor:
+    """
+    A position in the DATE_RECENTLY_CHANGED feed of one scope, returned by Client.changes_since().
+
+    `ticks` is the newest recently-changed FILETIME tick seen so far. `seen` holds the
+    (full path, tick) pairs already reported within the rewind window below `ticks`, so entries
+    sharing a tick with the boundary, or re-scanned because of the window, are not reported twice.
+    Persist it with to_json() and restore it with from_json().
+    """
+    ticks: int = 0
+    seen: frozenset = frozenset()
+
+    def to_json(self) -> str:
+        return json.dumps({'ticks': self.ticks, 'seen': sorted(self.seen)}, ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, text: str) -> "ChangeCursor":
+        data = json.loads(text)
+        return cls(data['ticks'], frozenset((path, ticks) for path, ticks in data['seen']))
+
+
+@dataclass(frozen=True, slots=True)
+class ChangeSet:
+    """The entries changed since a cursor, newest first, and the cursor to resume from."""
+    results: Tuple[Union[SearchResult, "LazySearchResult"], ...]
+    cursor: ChangeCursor
+
+    def __len__(self) -> int:
+        return len(self.results)
+
+    def __iter__(self) -> Iterator[Union[SearchResult, "LazySearchResult"]]:
+        return iter(self.results)
+
+
+@dataclass(frozen=True, slots=True)
+class ProgressivePage:
+    """
+    One window of a progressive search. `offset` is the index of the first row, `total` the size
+    of the whole result set, and `elapsed` the seconds since the search started. The last page has
+    `final` set; `truncated` marks a final page cut short by the deadline, which may hold no rows.
+    """
+    rows: Tuple[Union[SearchResult, "LazySearchResult"], ...]
+    offset: int
+    total: int
+    elapsed: float
+    final: bool = False
+    truncated: bool = False
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __iter__(self) -> Iterator[Union[SearchResult, "LazySearchResult"]]:
+        return iter(self.rows)
+
+
+def _check_progressive(first_page: int, growth: int, max_page: int) -> None:
+    if first_page <= 0 or growth < 1 or max_page < first_page:
+        raise ValueError("first_page must be positive, growth at least 1 and max_page at least first_page")
+
+
+@dataclass(frozen=True, slots=True)
+class FolderSize:
+    """A directory's recursive totals, as returned by FolderTree."""
+    path: str
+    size: int
+    files: int
+
+
+class FolderTree:
+    """
+    Recursive directory sizes over a set of files, built by Client.folder_sizes().
+
+    Directories are numbered in creation order and every directory is created after its parent,
+    so totals are rolled up in a single reverse pass. Per-directory data lives in flat arrays;
+    the only per-directory objects are the path strings and their lookup table. Like Everything,
+    paths are matched case-insensitively; `paths` keeps the casing first seen. `sep` is the
+    backend's path separator.
+    """
+
+    def __init__(self, root: Optional[str] = None, sep: str = '\\'):
+        self.sep = sep
+        self.root = root.rstrip(sep) if root else None
+        self.paths: List[str] = []
+        self.parents = array('q')
+        self.depths = array('I')
+        self.own_size = array('Q')
+        self.own_files = array('Q')
+        self.total_size = array('Q')
+        self.total_files = array('Q')
+        self._ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def __contains__(self, path: str) -> bool:
+        return path.rstrip(self.sep).lower() in self._ids
+
+    def _node(self, path: str) -> int:
+        """Returns the id of a directory, creating it and any missing ancestors."""
+        node = self._ids.get(path.lower())
+        if node is not None:
+            return node
+        missing = []
+        while node is None:
+            missing.append(path)
+            parent, sep, _ = path.rpartition(self.sep)
+            if not sep or not parent:  # a drive ('C:') or a child of the POSIX root
+                node = -1
+                break
+            path = parent
+            node = self._ids.get(path.lower())
+        for path in reversed(missing):
+            self._ids[path.lower()] = len(self.paths)
+            self.paths.append(path)
+            self.parents.append(node)
+            self.depths.append(self.depths[node] + 1 if node >= 0 else 0)
+            self.own_size.append(0)
+            self.own_files.append(0)
+            node = len(self.paths) - 1
+        return node
+
+    def add_batch(self, directories: InternedStrings, sizes: array, attributes: array) -> None:
+        """Adds the files of one batch of (PATH, SIZE, ATTRIBUTES) columns; directory rows are skipped."""
+        nodes = [self._node(path) for path in directories.table]
+        own_size, own_files = self.own_size, self.own_files
+        for dir_key, size, bits in zip(directories.ids, sizes, attributes):
+            if bits & _DIRECTORY_BIT:
+                continue
+            node = nodes[dir_key]
+            own_size[node] += size
+            own_files[node] += 1
+
+    def roll_up(self) -> None:
+        """Computes the recursive totals (children always have larger ids than their parents)."""
+        self.total_size = array('Q', self.own_size)
+        self.total_files = array('Q', self.own_files)
+        total_size, total_files, parents = self.total_size, self.total_files, self.parents
+        for node in range(len(self.paths) - 1, -1, -1):
+            parent = parents[node]
+            if parent >= 0:
+                total_size[parent] += total_size[node]
+                total_files[parent] += total_files[node]
+
+    def _entry(self, node: int) -> FolderSize:
+        return FolderSize(self.paths[node], self.total_size[node], self.total_files[node])
+
+    def get(self, path: str) -> Optional[FolderSize]:
+        """The totals of one directory, or None if it holds none of the files."""
+        node = self._ids.get(path.rstrip(self.sep).lower())
+        return None if node is None else self._entry(node)
+
+    def children(self, path: str) -> List[FolderSize]:
+        """The immediate subdirectories of a directory, largest first."""
+        node = self._ids.get(path.rstrip(self.sep).lower())
+        if node is None:
+            return []
+        parents = self.parents
+        found = [child for child in range(node + 1, len(self.paths)) if parents[child] == node]
+        return [self._entry(child) for child in sorted(found, key=self.total_size.__getitem__, reverse=True)]
+
+    def top(self, k: int = 10, depth: Optional[int] = None) -> List[FolderSize]:
+        """
+        The k directories with the largest recursive size, using a bounded heap.
+
+        Only directories inside the root (excluding the root itself) are considered; if the root
+        holds none of the files, the result is empty.
+        :param depth: Only consider directories this many levels below the root (1 = its children).
+        """
+        root = self._ids.get(self.root.lower()) if self.root else None
+        if self.root and root is None:
+            return []
+        root_depth = self.depths[root] if root is not None else -1
+        depths = self.depths
+        if root is not None:
+            prefix = self.root.lower() + self.sep
+            nodes = (node for node in range(root + 1, len(self.paths))
+                     if depths[node] > root_depth and self.paths[node].lower().startswith(prefix))
+        else:
+            nodes = iter(range(len(self.paths)))
+        if depth is not None:
+            nodes = (node for node in nodes if depths[node] == root_depth + depth)
+        return [self._entry(node) for node in heapq.nlargest(k, nodes, key=self.total_size.__getitem__)]
+
+
+@dataclass(frozen=True, slots=True)
+class DuplicateGroup:
+    """Files with identical contents, as confirmed by Client.find_duplicates()."""
+    size: int
+    digest: str
+    paths: Tuple[str, ...]
+
+
+@dataclass(slots=True)
+class DuplicateStats:
+    """Counters filled in by Client.find_duplicates()."""
+    files: int = 0
+    candidates: int = 0
+    partial_hashed: int = 0
+    full_hashed: int = 0
+    bytes_read: int = 0
+    groups: int = 0
+    errors: int = 0
+
+
+_HASH_BUFFER: Final[int] = 2 ** 20
+
+
+def _file_digest(path: str, size: int, algorithm: str, block_size: int, partial: bool,
+                 buffer: bytearray, counters: Counter) -> Optional[bytes]:
+    """
+    Hashes a whole file, or only its first and last `block_size` bytes if `partial`.
+    Returns None (counted as an error) if the file cannot be read or no longer has `size` bytes.
+    """
+    digest = hashlib.new(algorithm)
+    view = memoryview(buffer)
+    try:
+        with open(path, 'rb', buffering=0) as file:
+            if os.fstat(file.fileno()).st_size != size:
+                counters['errors'] += 1
+                return None
+            if partial:
+                digest.update(file.read(block_size))
+                file.seek(size - block_size)
+                digest.update(file.read(block_size))
+                counters['bytes_read'] += 2 * block_size
+            else:
+                while read := file.readinto(buffer):
+                    digest.update(view[:read])
+                    counters['bytes_read'] += read
+    except OSError:
+        counters['errors'] += 1
+        return None
+    return digest.digest()
+
+
+def _confirm_duplicates(size: int, paths: List[str], algorithm: str,
+                        block_size: int) -> Tuple[List[DuplicateGroup], Counter]:
+    """Splits same-size files into groups of identical contents: partial hashes first, then full ones."""
+    counters: Counter = Counter()
+    buffer = bytearray(_HASH_BUFFER)
+    # Files of up to two blocks are read whole at once; the partial hash would cover them anyway.
+    stages = (False,) if size <= 2 * block_size else (True, False)
+    groups = [paths]
+    for partial in stages:
+        refined = []
+        for group in groups:
+            by_digest: Dict[bytes, List[str]] = {}
+            for path in group:
+                digest = _file_digest(path, size, algorithm, block_size, partial, buffer, counters)
+                if digest is not None:
+                    by_digest.setdefault(digest, []).append(path)
+            counters['partial_hashed' if partial else 'full_hashed'] += len(group)
+            refined.extend((digest, members) for digest, members in by_digest.items() if len(members) > 1)
+        groups = [members for _, members in refined]
+    return [DuplicateGroup(size, digest.hex(), tuple(members)) for digest, members in refined], counters
+
+
+_QUOTE_NEEDED = re.compile(r'[\s|<>!]')
+_DATE_MODIFIERS: Final[Dict[str, Tuple[str, Request]]] = {
+    'created_time': ('dc', Request.DATE_CREATED),
+    'modified_time': ('dm', Request.DATE_MODIFIED),
+    'accessed_time': ('da', Request.DATE_ACCESSED),
+    'recently_changed': ('rc', Request.DATE_RECENTLY_CHANGED),
+}
+
+
+def _quote(text: str) -> Optional[str]:
+    """Quotes a search value if needed; None if it contains '"', which Everything syntax cannot escape."""
+    if '"' in text:
+        return None
+    return f'"{text}"' if _QUOTE_NEEDED.search(text) else text
+
+
+def _local_datetime(value: datetime.date | datetime.datetime) -> datetime.datetime:
+    """Converts a date or datetime to the naive local datetime that results carry."""
+    if not isinstance(value, datetime.datetime):
+        return datetime.datetime(value.year, value.month, value.day)
+    return value.astimezone().replace(tzinfo=None) if value.tzinfo else value
+
+
+def _date_literal(value: datetime.datetime) -> str:
+    return value.date().isoformat() if value.time() == datetime.time() else value.isoformat(timespec='seconds')
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledQuery:
+    """
+    A Query split by Query.compile(): the Everything search string, the client-side filter for the
+    terms that could not be pushed down (None if there are none), and the fields that filter reads.
+    """
+    search: str
+    filter: Optional[Callable[[Any], bool]] = None
+    flags: Request = Request(0)
+
+
+@dataclass(frozen=True, slots=True)
+class Query:
+    """
+    A composable search, compiled to Everything syntax so filtering happens inside Everything.
+
+    Build terms with the constructors below and combine them with ``&``, ``|`` and ``~``::
+
+        query = (Query.under('D:\\\\Projects') & Query.ext('py', 'pyi')
+                 & Query.size(min=2 ** 20) & ~Query.attrib(FileAttribute.HIDDEN))
+        for item in client.find(query, sort=Sort.SIZE_DESCENDING):
+            ...
+
+    Terms that Everything syntax cannot express (Query.where() callables, values containing '"',
+    path regexes) become a client-side filter over the rows. Under '&' only those terms are
+    filtered in Python; an '|' or '~' containing one is evaluated in Python as a whole.
+    """
+    op: str = 'and'
+    terms: Tuple['Query', ...] = ()
+    search: Optional[str] = None
+    test: Optional[Callable[[Any], bool]] = None
+    fields: Request = Request(0)
+
+    @staticmethod
+    def _term(search: Optional[str], test: Optional[Callable[[Any], bool]], fields: Request) -> 'Query':
+        return Query('term', (), search, test, fields)
+
+    # Constructors.
+
+    @staticmethod
+    def raw(search: str) -> 'Query':
+        """Everything syntax passed through as is. It cannot be evaluated client-side."""
+        return Query._term(search, None, Request(0))
+
+    @staticmethod
+    def text(text: str, path: bool = False) -> 'Query':
+        """Names (or with `path`, full paths) containing `text`; '*' and '?' are wildcards."""
+        field = 'full_path' if path else 'name'
+        pattern = re.compile(fnmatch.translate(text.lower()), re.DOTALL) if '*' in text or '?' in text else None
+        needle = text.lower()
+
+        def test(row) -> bool:
+            value = (getattr(row, field) or '').lower()
+            return pattern.match(value) is not None if pattern else needle in value
+
+        quoted = _quote(text)
+        search = None if quoted is None else f'path:{quoted}' if path else quoted
+        return Query._term(search, test, Request.FULL_PATH_AND_FILE_NAME if path else Request.FILE_NAME)
+
+    @staticmethod
+    def files() -> 'Query':
+        return Query._term('file:', lambda row: 'D' not in (row.attributes or ''), Request.ATTRIBUTES)
+
+    @staticmethod
+    def folders() -> 'Query':
+        return Query._term('folder:', lambda row: 'D' in (row.attributes or ''), Request.ATTRIBUTES)
+
+    @staticmethod
+    def under(folder: str | Path) -> 'Query':
+        """Everything below `folder`, at any depth."""
+        prefix = str(folder).rstrip('\\') + '\\'
+        quoted, needle = _quote(prefix), prefix.lower()
+        return Query._term(None if quoted is None else f'path:{quoted}',
+                           lambda row: needle in (row.full_path or '').lower(), Request.FULL_PATH_AND_FILE_NAME)
+
+    @staticmethod
+    def parent(folder: str | Path) -> 'Query':
+        """The direct children of `folder`."""
+        folder = str(folder).rstrip('\\')
+        quoted, needle = _quote(folder), folder.lower()
+        return Query._term(None if quoted is None else f'parent:{quoted}',
+                           lambda row: (row.path or '').rstrip('\\').lower() == needle, Request.PATH)
+
+    @staticmethod
+    def ext(*extensions: str) -> 'Query':
+        """Files with any of the extensions (given with or without a leading dot)."""
+        names = [ext.lstrip('.').lower() for ext in extensions]
+        if not names:
+            raise ValueError("ext() needs at least one extension")
+        wanted = frozenset(names)
+        quoted = _quote(';'.join(names))
+        return Query._term(None if quoted is None else f'ext:{quoted}',
+                           lambda row: (row.extension or '').lower() in wanted, Request.EXTENSION)
+
+    @staticmethod
+    def size(min: Optional[int] = None, max: Optional[int] = None) -> 'Query':
+        """Files of `min` <= size <= `max` bytes; either bound may be omitted."""
+        if min is None and max is None:
+            raise ValueError("size() needs min, max or both")
+        if min is not None and max is not None:
+            search = f'size:{min}..{max}'
+        else:
+            search = f'size:>={min}' if max is None else f'size:<={max}'
+
+        def test(row) -> bool:
+            # Like Everything, size: only matches files.
+            return (row.size is not None and (min is None or row.size >= min) and (max is None or row.size <= max)
+                    and 'D' not in (row.attributes or ''))
+
+        return Query._term(search, test, Request.SIZE | Request.ATTRIBUTES)
+
+    @staticmethod
+    def _date(field: str, after: Optional[datetime.date | datetime.datetime],
+              before: Optional[datetime.date | datetime.datetime]) -> 'Query':
+        if after is None and before is None:
+            raise ValueError("Date ranges need after, before or both")
+        modifier, flag = _DATE_MODIFIERS[field]
+        low = None if after is None else _local_datetime(after)
+        high = None if before is None else _local_datetime(before)
+        parts = []
+        if low is not None:
+            parts.append(f'{modifier}:>={_date_literal(low)}')
+        if high is not None:
+            parts.append(f'{modifier}:<{_date_literal(high)}')
+
+        def test(row) -> bool:
+            value = getattr(row, field)
+            return value is not None and (low is None or value >= low) and (high is None or value < high)
+
+        return Query._term(' '.join(parts), test, flag)
+
+    @staticmethod
+    def created(after=None, before=None) -> 'Query':
+        """Created at or after `after` and before `before` (dates or datetimes; naive means local)."""
+        return Query._date('created_time', after, before)
+
+    @staticmethod
+    def modified(after=None, before=None) -> 'Query':
+        """Modified at or after `after` and before `before` (dates or datetimes; naive means local)."""
+        return Query._date('modified_time', after, before)
+
+    @staticmethod
+    def accessed(after=None, before=None) -> 'Query':
+        """Accessed at or after `after` and before `before` (dates or datetimes; naive means local)."""
+        return Query._date('accessed_time', after, before)
+
+    @staticmethod
+    def changed(after=None, before=None) -> 'Query':
+        """Recently changed at or after `after` and before `before` (dates or datetimes; naive means local)."""
+        return Query._date('recently_changed', after, before)
+
+    @staticmethod
+    def attrib(attributes: FileAttribute) -> 'Query':
+        """Entries with every one of the attribute bits set; negate with ~ to exclude them."""
+        if FileAttribute.DEVICE in attributes:
+            raise ValueError("FileAttribute.DEVICE cannot be searched for")
+        letters = ''.join(letter for flag, letter in ATTRIBUTE_MAP.items() if flag in attributes)
+        if not letters:
+            raise ValueError("attrib() needs at least one attribute")
+        return Query._term(f'attrib:{letters}', lambda row: all(c in (row.attributes or '') for c in letters),
+                           Request.ATTRIBUTES)
+
+    @staticmethod
+    def regex(pattern: str, path: bool = False, case: bool = False) -> 'Query':
+        """Names (or with `path`, full paths) matching a regular expression, case-insensitive by default."""
+        compiled = re.compile(pattern, 0 if case else re.IGNORECASE)
+        field = 'full_path' if path else 'name'
+        quoted = _quote(pattern)
+        # Everything applies regex: to names; full-path regexes are filtered client-side.
+        search = None if quoted is None or path else f'{"case:" if case else ""}regex:{quoted}'
+        return Query._term(search, lambda row: compiled.search(getattr(row, field) or '') is not None,
+                           Request.FULL_PATH_AND_FILE_NAME if path else Request.FILE_NAME)
+
+    @staticmethod
+    def where(predicate: Callable[[Any], bool], fields: Request) -> 'Query':
+        """A client-side predicate over result rows, reading the Request `fields`."""
+        return Query._term(None, predicate, fields)
+
+    @staticmethod
+    def all_of(*queries: 'Query') -> 'Query':
+        return Query('and', queries)
+
+    @staticmethod
+    def any_of(*queries: 'Query') -> 'Query':
+        return Query('or', queries)
+
+    def __and__(self, other: 'Query') -> 'Query':
+        left = self.terms if self.op == 'and' else (self,)
+        right = other.terms if other.op == 'and' else (other,)
+        return Query('and', left + right)
+
+    def __or__(self, other: 'Query') -> 'Query':
+        left = self.terms if self.op == 'or' else (self,)
+        right = other.terms if other.op == 'or' else (other,)
+        return Query('or', left + right)
+
+    def __invert__(self) -> 'Query':
+        return self.terms[0] if self.op == 'not' else Query('not', (self,))
+
+    def __str__(self) -> str:
+        return self.compile().search
+
+    # Compilation.
+
+    def _pushable(self) -> bool:
+        if self.op == 'term':
+            return self.search is not None
+        return all(term._pushable() for term in self.terms)
+
+    def _render(self, nested: bool = False) -> str:
+        if self.op == 'term':
+            text = self.search
+        elif self.op == 'not':
+            return f'!{self.terms[0]._render(True)}'
+        else:
+            text = (' ' if self.op == 'and' else ' | ').join(term._render(True) for term in self.terms)
+        if nested and len([token for token in _QUERY_TOKEN.findall(text) if token.strip()]) > 1:
+            return f'<{text}>'
+        return text
+
+    def _split(self) -> Tuple[List['Query'], List['Query']]:
+        """Splits an AND into the terms Everything can evaluate and the ones left to the filter."""
+        if self.op == 'and':
+            pushed, residual = [], []
+            for term in self.terms:
+                term_pushed, term_residual = term._split()
+                pushed += term_pushed
+                residual += term_residual
+            return pushed, residual
+        return ([self], []) if self._pushable() else ([], [self])
+
+    def _flags(self) -> Request:
+        flags = self.fields
+        for term in self.terms:
+            flags |= term._flags()
+        return flags
+
+    def _matcher(self) -> Callable[[Any], bool]:
+        if self.op == 'term':
+            if self.test is None:
+                raise ValueError(f"Query.raw({self.search!r}) cannot be evaluated client-side; "
+                                 f"keep it out of '|' and '~' that contain client-side terms")
+            return self.test
+        tests = [term._matcher() for term in self.terms]
+        if self.op == 'not':
+            inner = tests[0]
+            return lambda row: not inner(row)
+        if len(tests) == 1:
+            return tests[0]
+        if self.op == 'and':
+            return lambda row: all(test(row) for test in tests)
+        return lambda row: any(test(row) for test in tests)
+
+    def compile(self) -> CompiledQuery:
+        """Splits the query into the Everything search string and the client-side filter."""
+        if self.op == 'or' and not self.terms:
+            raise ValueError("any_of() needs at least one query")
+        pushed, residual = self._split()
+        search = ' '.join(term._render(True) for term in pushed)
+        if not residual:
+            return CompiledQuery(search)
+        rest = Query('and', tuple(residual))
+        return CompiledQuery(search, rest._matcher(), rest._flags())
+
+
+# top_k() key field -> (Request flag, ascending Sort or None if it cannot be pushed down, Client getter).
+# Dates compare as raw FILETIME ticks and attributes as raw bits.
+_TOP_K_KEYS: Final[Dict[str, Tuple[Request, Optional[Sort], str]]] = {
+    'name': (Request.FILE_NAME, Sort.NAME_ASCENDING, '_get_name'),
+    'path': (Request.PATH, Sort.PATH_ASCENDING, '_get_path'),
+    'full_path': (Request.FULL_PATH_AND_FILE_NAME, None, '_get_full_path'),
+    'extension': (Request.EXTENSION, Sort.EXTENSION_ASCENDING, '_get_extension'),
+    'size': (Request.SIZE, Sort.SIZE_ASCENDING, '_get_size'),
+    'created_time': (Request.DATE_CREATED, Sort.DATE_CREATED_ASCENDING, '_get_created_ticks'),
+    'modified_time': (Request.DATE_MODIFIED, Sort.DATE_MODIFIED_ASCENDING, '_get_modified_ticks'),
+    'accessed_time': (Request.DATE_ACCESSED, Sort.DATE_ACCESSED_ASCENDING, '_get_accessed_ticks'),
+    'recently_changed': (Request.DATE_RECENTLY_CHANGED, Sort.DATE_RECENTLY_CHANGED_ASCENDING,
+                         '_get_recently_changed_ticks'),
+    'date_run': (Request.DATE_RUN, Sort.DATE_RUN_ASCENDING, '_get_date_run_ticks'),
+    'run_count': (Request.RUN_COUNT, Sort.RUN_COUNT_ASCENDING, '_get_run_count'),
+    'attributes': (Request.ATTRIBUTES, Sort.ATTRIBUTES_ASCENDING, '_get_attribute_bits'),
+}
+_STRING_KEYS: Final[frozenset[str]] = frozenset(('name', 'path', 'full_path', 'extension'))
+
+
+@functools.total_ordering
+class _Descending:
+    """Inverts the ordering of a sort key component."""
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+
+class EverythingBackend(Protocol):
+    """
+    The subset of the Everything SDK that Client uses (see Client._define_ctypes).
+
+    A loaded Everything64.dll satisfies it, and so does any object with the same functions,
+    such as SyntheticBackend. Pass one to Client(dll=...).
+    """
+
+    def Everything_Reset(self) -> None: ...
+    def Everything_SetSearchW(self, search: str) -> None: ...
+    def Everything_SetMatchPath(self, enable: bool) -> None: ...
+    def Everything_SetMatchCase(self, enable: bool) -> None: ...
+    def Everything_SetMatchWholeWord(self, enable: bool) -> None: ...
+    def Everything_SetRegex(self, enable: bool) -> None: ...
+    def Everything_SetRequestFlags(self, flags: int) -> None: ...
+    def Everything_SetSort(self, sort: int) -> None: ...
+    def Everything_SetOffset(self, offset: int) -> None: ...
+    def Everything_SetMax(self, max_results: int) -> None: ...
+    def Everything_QueryW(self, wait: bool) -> bool: ...
+    def Everything_IsDBLoaded(self) -> bool: ...
+    def Everything_GetLastError(self) -> int: ...
+    def Everything_GetNumResults(self) -> int: ...
+    def Everything_GetTotResults(self) -> int: ...
+    def Everything_GetMajorVersion(self) -> int: ...
+    def Everything_GetMinorVersion(self) -> int: ...
+    def Everything_GetRevision(self) -> int: ...
+    def Everything_GetBuildNumber(self) -> int: ...
+    def Everything_Exit(self) -> None: ...
+    def Everything_GetResultFileNameW(self, index: int) -> Optional[str]: ...
+    def Everything_GetResultPathW(self, index: int) -> Optional[str]: ...
+    def Everything_GetResultExtensionW(self, index: int) -> Optional[str]: ...
+    def Everything_GetResultFullPathNameW(self, index: int, buffer: ctypes.Array, size: int) -> None: ...
+    def Everything_GetResultHighlightedFileNameW(self, index: int) -> Optional[str]: ...
+    def Everything_GetResultHighlightedPathW(self, index: int) -> Optional[str]: ...
+    def Everything_GetResultHighlightedFullPathAndFileNameW(self, index: int) -> Optional[str]: ...
+    def Everything_GetResultFileListFileNameW(self, index: int) -> Optional[str]: ...
+    def Everything_GetResultAttributes(self, index: int) -> int: ...
+    def Everything_GetResultRunCount(self, index: int) -> int: ...
+    def Everything_GetResultSize(self, index: int, out: ctypes.c_ulonglong) -> None: ...
+    def Everything_GetResultDateCreated(self, index: int, out: ctypes.c_ulonglong) -> None: ...
+    def Everything_GetResultDateModified(self, index: int, out: ctypes.c_ulonglong) -> None: ...
+    def Everything_GetResultDateAccessed(self, index: int, out: ctypes.c_ulonglong) -> None: ...
+    def Everything_GetResultDateRecentlyChanged(self, index: int, out: ctypes.c_ulonglong) -> None: ...
+    def Everything_GetResultDateRun(self, index: int, out: ctypes.c_ulonglong) -> None: ...
+
+
+class Client:
+    def __init__(self, dll_path: Optional[str | Path] = None, dll: Optional[EverythingBackend] = None):
+        """
+        :param dll_path: Path to Everything64.dll. Defaults to the copy in the 'dll' directory.
+        :param dll: An already-loaded DLL, or any EverythingBackend such as SyntheticBackend.
+                    When given, dll_path is not loaded or unloaded.
+        """
+        self.dll_path = str(dll_path or self._get_default_dll_path())
+        self.dll: Optional[ctypes.WinDLL] = None
+        self._dll_object = dll
+        self._generation = 0
+        self._buffers: Dict[str, ctypes._SimpleCData] = {}
+        self._request_func_map: Dict[Request, Tuple[str, Callable]] = {}
+        self._extractors: Dict[Tuple[int, bool], Callable[[int], object]] = {}
+        self.cache: Optional[QueryCache] = None
+        self._validate_cache = False
+        self._observers: List[QueryObserver] = []
+        self.sample_every = 64
+
+    @property
+    def is_connected(self) -> bool:
+        """Checks if the client is connected to the Everything DLL."""
+        return self.dll is not None
+
+    def connect(self) -> None:
+        """Loads the Everything DLL and initializes the SDK. Does nothing if already connected."""
+        if self.is_connected:
+            return
+        if self._dll_object is not None:
+            self.dll = self._dll_object
+            self._initialize_sdk()
+            return
+        try:
+            self.dll = ctypes.WinDLL(self.dll_path)
+        except FileNotFoundError as err:
+            raise FileNotFoundError(f"Could not find the Everything DLL at '{self.dll_path}'. "
+                                    f"Please ensure the SDK is downloaded and the path is correct.") from err
+        except OSError as err:
+            raise OSError(f"Failed to load DLL from '{self.dll_path}'. "
+                          f"Ensure it's a valid DLL and matches your Python architecture.") from err
+        self._initialize_sdk()
+
+    def close(self) -> None:
+        """Unloads the Everything DLL. Does nothing if not connected."""
+        if not self.is_connected:
+            return
+        if self._dll_object is None and hasattr(self.dll, "_handle"):
+            ctypes.windll.kernel32.FreeLibrary(self.dll._handle)
+        self.dll = None
+
+    def __enter__(self):
+        """Context manager entry point. Connects to the SDK."""
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit point. Closes the connection."""
+        self.close()
+
+    @staticmethod
+    def _get_default_dll_path() -> Path:
+        """Determines the default path for the Everything64.dll."""
+        return Path(__file__).parent / "dll" / "Everything64.dll"
+
+    @staticmethod
+    def _filetime_to_datetime(filetime: ctypes.c_ulonglong) -> Optional[datetime.datetime]:
+        """Converts a Windows FILETIME structure to a Python datetime object."""
+        return Client._ticks_to_datetime(filetime.value)
+
+    @staticmethod
+    def _ticks_to_datetime(win_ticks: int) -> Optional[datetime.datetime]:
+        """Converts raw FILETIME ticks (100ns since 1601) to a Python datetime object."""
+        if win_ticks == 0 or win_ticks == INVALID_FILETIME:
+            return None
+        try:
+            posix_timestamp = (win_ticks - WINDOWS_TICKS_TO_POSIX_EPOCH) / WINDOWS_TICKS
+            return datetime.datetime.fromtimestamp(posix_timestamp)
+        except (OSError, ValueError):
+            return None
+
+    def _ensure_connected(self):
+        if not self.is_connected or not self.dll:
+            raise RuntimeError("Client is not connected. Please call connect() or use a 'with' statement.")
+
+    def _check_for_errors(self):
+        """Centralized error checking to be called after critical operations."""
+        self._ensure_connected()
+        error_code_val = self.dll.Everything_GetLastError()
+        if error_code_val != EverythingError.OK:
+            error = EverythingError(error_code_val)
+            for observer in self._observers:
+                observer.on_error(error)
+            raise SDKError(error)
+
+    def _initialize_sdk(self):
+        """Prepare buffers, ctypes definitions, and function mappings."""
+        self._define_ctypes()
+        if not self.dll.Everything_IsDBLoaded():
+            self._check_for_errors()
+        self._create_buffers()
+        self._create_request_map()
+        self._extractors = {}
+
+    def _create_buffers(self) -> None:
+        """Pre-allocates ctypes buffers for performance."""
+        self._buffers = {
+            'full_path': ctypes.create_unicode_buffer(MAX_PATH),
+            'size': ctypes.c_ulonglong(0),
+            'accessed_time': ctypes.c_ulonglong(0),
+            'created_time': ctypes.c_ulonglong(0),
+            'modified_time': ctypes.c_ulonglong(0),
+            'recently_changed': ctypes.c_ulonglong(0),
+            'date_run': ctypes.c_ulonglong(0),
+        }
+
+    def _create_request_map(self) -> None:
+        """Maps Requests to the corresponding result key and getter method."""
+        self._request_func_map = {
+            Request.HIGHLIGHTED_FULL_PATH_AND_FILE_NAME: ('highlighted_full_path', self._get_highlighted_full_path),
+            Request.HIGHLIGHTED_PATH: ('highlighted_path', self._get_highlighted_path),
+            Request.HIGHLIGHTED_FILE_NAME: ('highlighted_name', self._get_highlighted_name),
+            Request.DATE_RECENTLY_CHANGED: ('recently_changed', self._get_recently_changed),
+            Request.DATE_RUN: ('date_run', self._get_date_run),
+            Request.RUN_COUNT: ('run_count', self._get_run_count),
+            Request.FILE_LIST_FILE_NAME: ('file_list_file_name', self._get_file_list_file_name),
+            Request.ATTRIBUTES: ('attributes', self._get_attributes),
+            Request.DATE_ACCESSED: ('accessed_time', self._get_accessed_time),
+            Request.DATE_MODIFIED: ('modified_time', self._get_modified_time),
+            Request.DATE_CREATED: ('created_time', self._get_created_time),
+            Request.SIZE: ('size', self._get_size),
+            Request.EXTENSION: ('extension', self._get_extension),
+            Request.FULL_PATH_AND_FILE_NAME: ('full_path', self._get_full_path),
+            Request.PATH: ('path', self._get_path),
+            Request.FILE_NAME: ('name', self._get_name),
+        }
+
+    def _define_ctypes(self) -> None:
+        """Define argument and return types for the DLL functions."""
+        if not isinstance(self.dll, ctypes.CDLL):
+            return
+
+        BOOL = wintypes.BOOL
+        DWORD = wintypes.DWORD
+        LPCWSTR = wintypes.LPCWSTR
+        LPWSTR = wintypes.LPWSTR
+        HMODULE = wintypes.HMODULE
+        P_ULL = ctypes.POINTER(ctypes.c_ulonglong)
+
+        signatures = (
+            # Get String Results (Index -> String Pointer)
+            ([DWORD], LPCWSTR, [
+                "Everything_GetResultExtensionW", "Everything_GetResultFileNameW",
+                "Everything_GetResultPathW", "Everything_GetResultHighlightedFileNameW",
+                "Everything_GetResultHighlightedPathW", "Everything_GetResultHighlightedFullPathAndFileNameW",
+                "Everything_GetResultFileListFileNameW",
+            ]),
+            # Get Integer Results (Index -> Int)
+            ([DWORD], DWORD, ["Everything_GetResultRunCount", "Everything_GetResultAttributes"]),
+            # Get Numeric/Time Data (Index, Output Pointer -> Void)
+            ([DWORD, P_ULL], None, [
+                "Everything_GetResultDateCreated", "Everything_GetResultDateModified",
+                "Everything_GetResultDateAccessed", "Everything_GetResultSize",
+                "Everything_GetResultDateRecentlyChanged", "Everything_GetResultDateRun",
+            ]),
+            # Set Boolean Options (Bool -> Void)
+            ([BOOL], None, [
+                "Everything_SetMatchPath", "Everything_SetMatchCase",
+                "Everything_SetMatchWholeWord", "Everything_SetRegex",
+            ]),
+            # Set Numeric Options (Int -> Void)
+            ([DWORD], None, [
+                "Everything_SetRequestFlags", "Everything_SetSort",
+                "Everything_SetOffset", "Everything_SetMax",
+            ]),
+            # Get Global State/Versions (Void -> Int)
+            ([], DWORD, [
+                "Everything_GetMajorVersion", "Everything_GetMinorVersion",
+                "Everything_GetRevision", "Everything_GetBuildNumber",
+                "Everything_GetLastError", "Everything_GetNumResults", "Everything_GetTotResults",
+            ]),
+            # Set Search String (String -> Void)
+            ([LPCWSTR], None, ["Everything_SetSearchW"]),
+            # Void Actions (Void -> Void)
+            ([], None, ["Everything_Reset", "Everything_Exit"]),
+            # Check DB Status (Void -> Bool)
+            ([], BOOL, ["Everything_IsDBLoaded"]),
+            # Execute Query (Bool -> Bool)
+            ([BOOL], BOOL, ["Everything_QueryW"]),
+            # Get Full Path into Buffer (Index, Buffer, Size -> Void)
+            ([DWORD, LPWSTR, DWORD], None, ["Everything_GetResultFullPathNameW"]),
+        )
+
+        for arg_types, res_type, func_names in signatures:
+            for func_name in func_names:
+                func = getattr(self.dll, func_name, None)
+                if func:
+                    func.argtypes = arg_types
+                    func.restype = res_type
+
+        if hasattr(ctypes, "windll") and hasattr(ctypes.windll, "kernel32"):
+            try:
+                lib = ctypes.windll.kernel32.FreeLibrary
+                lib.argtypes = [HMODULE]
+                lib.restype = BOOL
+            except AttributeError:
+                pass
+
+    def _setup_query(
+            self, keywords: str, match_path: bool, match_case: bool,
+            whole_word: bool, regex: bool, offset: int, limit: int,
+            flags: Request, sort: Sort
+    ) -> None:
+        """Sets all query parameters before execution."""
+        self._ensure_connected()
+        self._generation += 1
+        self.dll.Everything_Reset()
+        self.dll.Everything_SetSearchW(keywords)
+        self.dll.Everything_SetMatchPath(match_path)
+        self.dll.Everything_SetMatchCase(match_case)
+        self.dll.Everything_SetMatchWholeWord(whole_word)
+        self.dll.Everything_SetRegex(regex)
+        self.dll.Everything_SetRequestFlags(flags.value)
+        self.dll.Everything_SetSort(sort.value)
+        if offset > 0:
+            self.dll.Everything_SetOffset(offset)
+        if limit >= 0:
+            self.dll.Everything_SetMax(limit)
+
+    def _execute_query(
+            self, keywords: str, match_path: bool, match_case: bool,
+            whole_word: bool, regex: bool, offset: int, limit: int,
+            flags: Request, sort: Sort, stats: Optional[QueryStats] = None
+    ) -> int:
+        """
+        Sets up and runs a query, returning the number of results available for reading.
+
+        :param stats: If given, the setup, query and result count phases are timed into it.
+        """
+        self._ensure_connected()
+        if stats is None:
+            self._setup_query(keywords, match_path, match_case, whole_word, regex, offset, limit, flags, sort)
+            query_successful = self.dll.Everything_QueryW(True)
+            if not query_successful:
+                self._check_for_errors()
+            return self.dll.Everything_GetNumResults()
+
+        clock = time.perf_counter
+        start = clock()
+        self._setup_query(keywords, match_path, match_case, whole_word, regex, offset, limit, flags, sort)
+        stats.setup = clock() - start
+        start = clock()
+        try:
+            query_successful = self.dll.Everything_QueryW(True)
+            if not query_successful:
+                self._check_for_errors()
+        except SDKError as err:
+            stats.error = err.error_code
+            raise
+        finally:
+            stats.query = clock() - start
+        start = clock()
+        num_results = self.dll.Everything_GetNumResults()
+        stats.count = clock() - start
+        return num_results
+
+    def add_observer(self, observer: QueryObserver, sample_every: Optional[int] = None) -> QueryObserver:
+        """
+        Attaches an observer that receives a QueryStats for every search() and search_columns()
+        query and every SDK error code. With no observers attached, queries take the
+        uninstrumented path.
+
+        :param observer: A QueryObserver, e.g. a MetricsObserver.
+        :param sample_every: Time each field getter on every n-th row (default 64).
+        :return: The observer.
+        """
+        if sample_every is not None:
+            if sample_every <= 0:
+                raise ValueError("sample_every must be positive")
+            self.sample_every = sample_every
+        self._observers.append(observer)
+        return observer
+
+    def remove_observer(self, observer: QueryObserver) -> None:
+        """Detaches an observer added with add_observer()."""
+        self._observers.remove(observer)
+
+    def _notify(self, stats: QueryStats) -> None:
+        for observer in self._observers:
+            observer.on_query(stats)
+
+    def _field_getters(self, flags: Request, lazy: bool) -> List[Tuple[str, Callable[[int], object]]]:
+        """The per-field getters a row extractor for this mask calls, for sampling their cost."""
+        raw_getters = {
+            'created_time': self._get_created_ticks,
+            'modified_time': self._get_modified_ticks,
+            'accessed_time': self._get_accessed_ticks,
+            'attributes': self._get_attribute_bits,
+            'date_run': self._get_date_run_ticks,
+            'recently_changed': self._get_recently_changed_ticks,
+        } if lazy else {}
+        return [
+            (key, raw_getters.get(key, getter))
+            for flag, (key, getter) in self._request_func_map.items()
+            if flag in flags
+        ]
+
+    @staticmethod
+    def _sample_fields(idx: int, getters: List[Tuple[str, Callable[[int], object]]], stats: QueryStats) -> None:
+        """Times each field getter for one row and counts the strings it decodes."""
+        clock = time.perf_counter
+        field_times = stats.field_times
+        for key, getter in getters:
+            start = clock()
+            value = getter(idx)
+            field_times[key] = field_times.get(key, 0.0) + clock() - start
+            if value.__class__ is str:
+                stats.strings_decoded += 1
+                stats.bytes_decoded += 2 * len(value)
+        stats.sampled_rows += 1
+
+    def _observed_rows(
+            self, extract: Callable[[int], object], num_results: int, flags: Request, lazy: bool, stats: QueryStats
+    ) -> Iterator[SearchResult | LazySearchResult]:
+        """The search() row loop with extraction timing and sampled per-field timings."""
+        clock = time.perf_counter
+        getters = self._field_getters(flags, lazy)
+        sample_every = self.sample_every
+        generation = self._generation
+        try:
+            for i in range(num_results):
+                if self._generation != generation:
+                    self._raise_interleaved()
+                if i % sample_every == 0:
+                    self._sample_fields(i, getters, stats)
+                start = clock()
+                row = extract(i)
+                stats.extract += clock() - start
+                stats.rows += 1
+                yield row
+        finally:
+            if stats.sampled_rows:
+                scale = stats.rows / stats.sampled_rows
+                stats.field_times = {key: seconds * scale for key, seconds in stats.field_times.items()}
+                stats.strings_decoded = round(stats.strings_decoded * scale)
+                stats.bytes_decoded = round(stats.bytes_decoded * scale)
+            self._notify(stats)
+
+    def _get_extractor(self, flags: Request, lazy: bool, intern_paths: bool = False) -> Callable[[int], object]:
+        """
+        Returns the generated row extractor for a Request mask, bound to this client's DLL.
+
+        Extractors that intern paths are bound anew for each call, so their directory table
+        lives only as long as the rows of one query.
+        """
+        key = (int(flags), lazy)
+        if intern_paths:
+            if not lazy:
+                raise ValueError("intern_paths requires lazy=True")
+            return _extractor_factory(*key, True)(self.dll, _lazy_row_type(key[0], True, _backend_sep(self.dll)))
+        extractor = self._extractors.get(key)
+        if extractor is None:
+            row_type = _lazy_row_type(key[0]) if lazy else SearchResult
+            extractor = self._extractors[key] = _extractor_factory(*key)(self.dll, row_type)
+        return extractor
+
+    def _read_column(self, func_name: str, kind: str, start: int, stop: int) -> Column:
+        """Reads one field for the result indexes [start, stop) into a compact column."""
+        func = getattr(self.dll, func_name)
+        if kind == 'u64':
+            buffer = ctypes.c_ulonglong(0)
+            column = array('Q')
+            append = column.append
+            for i in range(start, stop):
+                func(i, buffer)
+                append(buffer.value)
+            return column
+        if kind == 'u32':
+            return array('I', map(func, range(start, stop)))
+        if kind == 'buffer':
+            buffer = ctypes.create_unicode_buffer(MAX_PATH)
+
+            def read(i: int) -> str:
+                func(i, buffer, MAX_PATH)
+                return buffer.value
+
+            return PackedStrings(map(read, range(start, stop)))
+        if kind == 'interned':
+            return InternedStrings(map(func, range(start, stop)))
+        if kind == 'path':
+            names = map(self.dll.Everything_GetResultFileNameW, range(start, stop))
+            return InternedPaths(InternedStrings(map(func, range(start, stop))), PackedStrings(names),
+                                 _backend_sep(self.dll))
+        return PackedStrings(map(func, range(start, stop)))
+
+    def _get_name(self, idx: int) -> str:
+        return self.dll.Everything_GetResultFileNameW(idx)
+
+    def _get_path(self, idx: int) -> str:
+        return self.dll.Everything_GetResultPathW(idx)
+
+    def _get_full_path(self, idx: int) -> str:
+        buffer = self._buffers['full_path']
+        self.dll.Everything_GetResultFullPathNameW(idx, buffer, MAX_PATH)
+        return buffer.value
+
+    def _get_size(self, idx: int) -> int:
+        buffer = self._buffers['size']
+        self.dll.Everything_GetResultSize(idx, buffer)
+        return buffer.value
+
+    def _get_extension(self, idx: int) -> str:
+        return self.dll.Everything_GetResultExtensionW(idx)
+
+    def _get_run_count(self, idx: int) -> int:
+        return self.dll.Everything_GetResultRunCount(idx)
+
+    def _get_attributes(self, idx: int) -> str:
+        return self._attributes_to_str(self.dll.Everything_GetResultAttributes(idx))
+
+    def _get_attribute_bits(self, idx: int) -> int:
+        return self.dll.Everything_GetResultAttributes(idx)
+
+    @staticmethod
+    def _attributes_to_str(attr_int: int) -> str:
+        """Converts raw attribute bits to a sorted string of attribute letters, e.g. 'AHR'."""
+        if attr_int == 0:
+            return ""
+
+        attr_flags = FileAttribute(attr_int)
+        chars = [
+            ATTRIBUTE_MAP[flag]
+            for flag in attr_flags
+            if flag in ATTRIBUTE_MAP
+        ]
+        return "".join(sorted(chars))
+
+    def _get_file_list_file_name(self, idx: int) -> str:
+        return self.dll.Everything_GetResultFileListFileNameW(idx)
+
+    def _get_accessed_time(self, idx: int) -> Optional[datetime.datetime]:
+        return self._ticks_to_datetime(self._get_accessed_ticks(idx))
+
+    def _get_accessed_ticks(self, idx: int) -> int:
+        buffer = self._buffers['accessed_time']
+        self.dll.Everything_GetResultDateAccessed(idx, buffer)
+        return buffer.value
+
+    def _get_created_time(self, idx: int) -> Optional[datetime.datetime]:
+        return self._ticks_to_datetime(self._get_created_ticks(idx))
+
+    def _get_created_ticks(self, idx: int) -> int:
+        buffer = self._buffers['created_time']
+        self.dll.Everything_GetResultDateCreated(idx, buffer)
+        return buffer.value
+
+    def _get_modified_time(self, idx: int) -> Optional[datetime.datetime]:
+        return self._ticks_to_datetime(self._get_modified_ticks(idx))
+
+    def _get_modified_ticks(self, idx: int) -> int:
+        buffer = self._buffers['modified_time']
+        self.dll.Everything_GetResultDateModified(idx, buffer)
+        return buffer.value
+
+    def _get_recently_changed(self, idx: int) -> Optional[datetime.datetime]:
+        return self._ticks_to_datetime(self._get_recently_changed_ticks(idx))
+
+    def _get_recently_changed_ticks(self, idx: int) -> int:
+        buffer = self._buffers['recently_changed']
+        self.dll.Everything_GetResultDateRecentlyChanged(idx, buffer)
+        return buffer.value
+
+    def _get_date_run(self, idx: int) -> Optional[datetime.datetime]:
+        return self._ticks_to_datetime(self._get_date_run_ticks(idx))
+
+    def _get_date_run_ticks(self, idx: int) -> int:
+        buffer = self._buffers['date_run']
+        self.dll.Everything_GetResultDateRun(idx, buffer)
+        return buffer.value
+
+    def _get_highlighted_name(self, idx: int) -> str:
+        return self.dll.Everything_GetResultHighlightedFileNameW(idx)
+
+    def _get_highlighted_path(self, idx: int) -> str:
+        return self.dll.Everything_GetResultHighlightedPathW(idx)
+
+    def _get_highlighted_full_path(self, idx: int) -> str:
+        return self.dll.Everything_GetResultHighlightedFullPathAndFileNameW(idx)
+
+    def version(self) -> str:
+        """Returns the version of the Everything instance."""
+        self._ensure_connected()
+        return "{}.{}.{}.{}".format(
+            self.dll.Everything_GetMajorVersion(),
+            self.dll.Everything_GetMinorVersion(),
+            self.dll.Everything_GetRevision(),
+            self.dll.Everything_GetBuildNumber()
+        )
+
+    def search(
+            self,
+            keywords: str,
+            match_path: bool = False,
+            match_case: bool = False,
+            whole_word: bool = False,
+            regex: bool = False,
+            offset: int = 0,
+            limit: int = -1,
+            flags: Request = Request.DEFAULT,
+            sort: Sort = Sort.NAME_ASCENDING,
+            lazy: bool = False,
+            intern_paths: bool = False
+    ) -> Iterator[SearchResult | LazySearchResult]:
+        """
+        Performs a search query and yields results one by one.
+
+        :param keywords: Search query, supports Everything search syntax.
+        :param match_path: Match path instead of just the filename.
+        :param match_case: Case-sensitive search.
+        :param whole_word: Match whole words only.
+        :param regex: Enable regular expression syntax.
+        :param offset: The zero-based index of the first result to return.
+        :param limit: The maximum number of results to return. -1 means all results.
+        :param flags: A Request bitmask specifying which fields to retrieve.
+        :param sort: A Sort enum member specifying the sort order.
+        :param lazy: Yield LazySearchResult objects that keep raw FILETIME ticks and attribute
+                     bits and decode them only on first access.
+        :param intern_paths: With lazy, store each full path as a directory string shared by every
+                             row in that directory plus the file name, joined on access.
+        :return: An iterator yielding SearchResult (or LazySearchResult) objects.
+        """
+        if self.cache is not None:
+            yield from self._search_cached(
+                keywords, match_path, match_case, whole_word, regex, offset, limit, flags, sort, lazy, intern_paths
+            )
+            return
+
+        if self._observers:
+            stats = QueryStats(keywords, int(flags), int(sort))
+            try:
+                num_results = self._execute_query(
+                    keywords, match_path, match_case, whole_word, regex, offset, limit, flags, sort, stats
+                )
+            except SDKError:
+                self._notify(stats)
+                raise
+            extract = self._get_extractor(flags, lazy, intern_paths)
+            yield from self._observed_rows(extract, num_results, flags, lazy, stats)
+            return
+
+        num_results = self._execute_query(
+            keywords, match_path, match_case, whole_word, regex, offset, limit, flags, sort
+        )
+        extract = self._get_extractor(flags, lazy, intern_paths)
+        generation = self._generation
+        for i in range(num_results):
+            if self._generation != generation:
+                self._raise_interleaved()
+            yield extract(i)
+
+    @staticmethod
+    def _raise_interleaved():
+        raise RuntimeError("Another query ran on this client while results were still being read. "
+                           "The SDK keeps a single global result set; finish or materialize one "
+                           "search before starting the next, or use a QueryExecutor.")
+
+    def enable_cache(self, max_entries: int = 128, ttl: Optional[float] = 30.0, validate: bool = True) -> QueryCache:
+        """
+        Caches the materialized results of search() and the wrappers built on it.
+
+        :param max_entries: The maximum number of cached queries (least recently used are evicted).
+        :param ttl: Seconds an entry stays valid, or None for no expiry.
+        :param validate: Once an entry's TTL has passed, probe the query's total count and newest
+                         DATE_MODIFIED with a one-row query; serve the entry again for another TTL
+                         if neither changed, refetch otherwise. Without it, expired entries are
+                         dropped. Entries within their TTL are served without probing.
+        :return: The QueryCache, for inspecting stats or invalidating entries.
+        """
+        self.cache = QueryCache(max_entries, ttl)
+        self._validate_cache = validate
+        return self.cache
+
+    def disable_cache(self) -> None:
+        """Stops caching and drops the cache."""
+        self.cache = None
+
+    def _probe_changes(
+            self, keywords: str, match_path: bool, match_case: bool, whole_word: bool, regex: bool
+    ) -> Tuple[int, int]:
+        """Returns (total results, newest modified tick) for a query using a one-row query."""
+        num_results = self._execute_query(
+            keywords, match_path, match_case, whole_word, regex, 0, 1,
+            Request.DATE_MODIFIED, Sort.DATE_MODIFIED_DESCENDING
+        )
+        newest = self._get_modified_ticks(0) if num_results else 0
+        return self.dll.Everything_GetTotResults(), newest
+
+    def _search_cached(
+            self, keywords: str, match_path: bool, match_case: bool, whole_word: bool, regex: bool,
+            offset: int, limit: int, flags: Request, sort: Sort, lazy: bool, intern_paths: bool
+    ) -> Iterator[SearchResult | LazySearchResult]:
+        cache = self.cache
+        key = (_normalize_query(keywords), match_path, match_case, whole_word, regex,
+               offset, limit, int(flags), int(sort), lazy, intern_paths)
+        entry = cache.get(key, stale=self._validate_cache)
+        fingerprint = None
+        probe_time = 0.0
+        # A miss is probed only to fingerprint the new entry, which is pointless if it never expires.
+        if self._validate_cache and (not cache.fresh(entry) if entry is not None else cache.ttl is not None):
+            start = time.perf_counter()
+            fingerprint = self._probe_changes(keywords, match_path, match_case, whole_word, regex)
+            probe_time = time.perf_counter() - start
+            if entry is not None:
+                if entry.fingerprint == fingerprint:
+                    cache._refresh(key)
+                else:
+                    cache._demote(key)
+                    entry = None
+        if entry is None:
+            stats = QueryStats(keywords, int(flags), int(sort)) if self._observers else None
+            try:
+                num_results = self._execute_query(
+                    keywords, match_path, match_case, whole_word, regex, offset, limit, flags, sort, stats
+                )
+            except SDKError:
+                if stats is not None:
+                    self._notify(stats)
+                raise
+            extract = self._get_extractor(flags, lazy, intern_paths)
+            if stats is None:
+                rows = tuple(map(extract, range(num_results)))
+            else:
+                rows = tuple(self._observed_rows(extract, num_results, flags, lazy, stats))
+            cache.put(key, rows, fingerprint)
+        else:
+            rows = entry.rows
+            if self._observers:
+                self._notify(QueryStats(keywords, int(flags), int(sort), query=probe_time, rows=len(rows),
+                                        cached=True))
+        yield from rows
+
+    def changes_since(
+            self,
+            cursor: Optional[ChangeCursor] = None,
+            scope: str = "",
+            flags: Request = Request.DEFAULT,
+            lazy: bool = False,
+            rewind: float = 2.0,
+            chunk_size: int = 1000
+    ) -> ChangeSet:
+        """
+        Returns the entries in a scope whose DATE_RECENTLY_CHANGED is newer than a cursor.
+
+        The scope is queried sorted by Sort.DATE_RECENTLY_CHANGED_DESCENDING in windows of
+        `chunk_size` results, and reading stops at the first entry older than the cursor, so
+        the cost grows with the number of changes rather than the size of the scope.
+        Without a cursor, no entries are returned and the cursor marks the current newest change.
+
+        Clock skew is handled in two ways. Entries up to `rewind` seconds older than the cursor are
+        re-checked against the cursor's seen set, which catches late-arriving changes. The cursor
+        never advances past the local clock, so entries dated in the future do not hide later
+        changes.
+
+        :param cursor: The cursor returned by the previous call, or None to start a feed.
+        :param scope: An Everything query limiting the feed, e.g. '"D:\\Projects\\"'.
+        :param flags: The fields to retrieve. FULL_PATH_AND_FILE_NAME and DATE_RECENTLY_CHANGED
+                      are always requested.
+        :param lazy: Return LazySearchResult objects.
+        :param rewind: Seconds below the cursor to re-scan.
+        :param chunk_size: The number of results per query window.
+        :return: A ChangeSet with the changed entries, newest first, and the new cursor.
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        flags = flags | Request.FULL_PATH_AND_FILE_NAME | Request.DATE_RECENTLY_CHANGED
+        rewind_ticks = int(rewind * WINDOWS_TICKS)
+        now = int(time.time() * WINDOWS_TICKS + WINDOWS_TICKS_TO_POSIX_EPOCH)
+        previous = cursor or ChangeCursor()
+        # Without a cursor, the window below the newest entry is only scanned to seed `seen`.
+        threshold = previous.ticks - rewind_ticks if cursor is not None else None
+        results = []
+        scanned: Dict[Tuple[str, int], None] = {}
+        position = 0
+        while True:
+            num_results = self._execute_query(
+                scope, False, False, False, False, position, chunk_size,
+                flags, Sort.DATE_RECENTLY_CHANGED_DESCENDING
+            )
+            extract = self._get_extractor(flags, lazy)
+            for i in range(num_results):
+                ticks = self._get_recently_changed_ticks(i)
+                if threshold is None:
+                    threshold = min(ticks, now) - rewind_ticks
+                if ticks < threshold:
+                    break
+                entry = (self._get_full_path(i), ticks)
+                if entry in scanned:
+                    # New changes shifted already-read results into this window.
+                    continue
+                scanned[entry] = None
+                if cursor is not None and entry not in previous.seen:
+                    results.append(extract(i))
+            else:
+                if num_results == chunk_size:
+                    position += chunk_size
+                    continue
+            break
+
+        newest = max((ticks for _, ticks in scanned), default=previous.ticks)
+        ticks = max(previous.ticks, min(newest, now))
+        floor = ticks - rewind_ticks
+        seen = frozenset(entry for entry in itertools.chain(previous.seen, scanned) if entry[1] >= floor)
+        return ChangeSet(tuple(results), ChangeCursor(ticks, seen))
+
+    def search_progressive(
+            self,
+            keywords: str,
+            match_path: bool = False,
+            match_case: bool = False,
+            whole_word: bool = False,
+            regex: bool = False,
+            limit: int = -1,
+            flags: Request = Request.DEFAULT,
+            sort: Sort = Sort.NAME_ASCENDING,
+            lazy: bool = False,
+            first_page: int = 100,
+            growth: int = 4,
+            max_page: int = 65_536,
+            deadline: Optional[float] = None,
+            superseded: Optional[Callable[[], bool]] = None
+    ) -> Iterator[ProgressivePage]:
+        """
+        Runs a search as a series of growing windows so the first rows arrive before the rest.
+
+        The first query asks the SDK for only `first_page` rows; each following one reads the next
+        window, `growth` times larger up to `max_page`. Each window is a separate query, so rows
+        may shift between windows if the index changes meanwhile.
+
+        The deadline is checked between windows and every 256 rows while a window is read; a
+        single blocking Everything_QueryW call cannot be interrupted and can overrun it.
+
+        :param keywords: Search query, supports Everything search syntax.
+        :param limit: The maximum number of results to return. -1 means all results.
+        :param first_page: The number of rows in the first window.
+        :param growth: The factor by which each window is larger than the previous one.
+        :param max_page: The largest window.
+        :param deadline: Seconds after which the search stops with a truncated final page.
+        :param superseded: Polled before each window and every 256 rows; once it returns True the
+                           search stops without a final page.
+        :return: An iterator of ProgressivePage; the last one has `final` set.
+        """
+        _check_progressive(first_page, growth, max_page)
+        start = time.perf_counter()
+        stop_at = start + deadline if deadline is not None else None
+        offset, window = 0, first_page
+        while True:
+            page = self._progressive_page(keywords, offset, window, start, stop_at, superseded, match_path,
+                                          match_case, whole_word, regex, limit, flags, sort, lazy)
+            if page is None:
+                return
+            yield page
+            if page.final:
+                return
+            offset += len(page)
+            window = min(window * growth, max_page)
+
+    def _progressive_page(self, keywords: str, offset: int, window: int, start: float, stop_at: Optional[float],
+                          superseded: Optional[Callable[[], bool]], match_path: bool = False,
+                          match_case: bool = False, whole_word: bool = False, regex: bool = False,
+                          limit: int = -1, flags: Request = Request.DEFAULT, sort: Sort = Sort.NAME_ASCENDING,
+                          lazy: bool = False) -> Optional[ProgressivePage]:
+        """Reads one window of a progressive search; None if it was superseded."""
+        if superseded is not None and superseded():
+            return None
+        if limit >= 0:
+            window = min(window, limit - offset)
+        num_results = self._execute_query(
+            keywords, match_path, match_case, whole_word, regex, offset, window, flags, sort
+        )
+        total = self.dll.Everything_GetTotResults()
+        extract = self._get_extractor(flags, lazy)
+        rows = []
+        truncated = False
+        for i in range(num_results):
+            if not i & 255 and i:
+                if superseded is not None and superseded():
+                    return None
+                if stop_at is not None and time.perf_counter() >= stop_at:
+                    truncated = True
+                    break
+            rows.append(extract(i))
+        end = offset + len(rows)
+        final = truncated or end >= total or end == limit or num_results < window
+        if not final and stop_at is not None and time.perf_counter() >= stop_at:
+            final = truncated = True
+        return ProgressivePage(tuple(rows), offset, total, time.perf_counter() - start, final, truncated)
+
+    def search_stream(
+            self,
+            keywords: str,
+            match_path: bool = False,
+            match_case: bool = False,
+            whole_word: bool = False,
+            regex: bool = False,
+            offset: int = 0,
+            limit: int = -1,
+            flags: Request = Request.DEFAULT,
+            sort: Sort = Sort.NAME_ASCENDING,
+            lazy: bool = False,
+            chunk_size: int = 10_000,
+            strict: bool = False
+    ) -> Iterator[SearchResult | LazySearchResult]:
+        """
+        Performs a search query in windows of `chunk_size` results and yields results one by one.
+
+        Each window is a separate query limited with Everything_SetOffset/Everything_SetMax, so
+        neither Everything nor this process holds more than about two windows at a time. The rows
+        of a window are read before it is yielded, and the next window is queried once it has
+        been consumed, on the consuming thread. To overlap queries with consumption, run the
+        stream on a QueryExecutor (QueryExecutor.stream(..., method='search_stream') or
+        AsyncClient.search_stream()). Do not use the client for anything else until the stream is
+        exhausted or closed.
+
+        Accepts the same parameters as search(), plus:
+        :param chunk_size: The number of results per window.
+        :param strict: Raise ResultSetChangedError if the total result count changes between windows.
+        :return: An iterator yielding SearchResult (or LazySearchResult) objects.
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        self._ensure_connected()
+
+        def query_window(start: int, remaining: int) -> Tuple[int, int, int]:
+            size = chunk_size if remaining < 0 else min(chunk_size, remaining)
+            self._execute_query(keywords, match_path, match_case, whole_word, regex, start, size, flags, sort)
+            return self.dll.Everything_GetNumResults(), self.dll.Everything_GetTotResults(), self._generation
+
+        extract = self._get_extractor(flags, lazy)
+        position, remaining = offset, limit
+        num_results, total, generation = query_window(position, remaining)
+        expected_total = total
+        while True:
+            if self._generation != generation:
+                self._raise_interleaved()
+            if strict and total != expected_total:
+                raise ResultSetChangedError(expected_total, total)
+            window = [extract(i) for i in range(num_results)]
+            position += num_results
+            if remaining >= 0:
+                remaining -= num_results
+            done = num_results < chunk_size or remaining == 0 or position >= total
+            yield from window
+            if done:
+                return
+            num_results, total, generation = query_window(position, remaining)
+
+    def search_columns(
+            self,
+            keywords: str,
+            match_path: bool = False,
+            match_case: bool = False,
+            whole_word: bool = False,
+            regex: bool = False,
+            offset: int = 0,
+            limit: int = -1,
+            flags: Request = Request.DEFAULT,
+            sort: Sort = Sort.NAME_ASCENDING,
+            intern_paths: bool = False
+    ) -> ColumnarResult:
+        """
+        Performs a search query and returns the results column by column.
+
+        Unlike search(), no per-row objects are created: each requested field is read for all
+        results in one pass into an integer array or a packed/interned string table.
+        Date columns hold raw FILETIME ticks (see COLUMN_SPECS for the column names).
+
+        Accepts the same parameters as search(), plus:
+        :param intern_paths: Read the full path column as an InternedPaths (directory ids into a
+                             table of unique directories, plus file names) instead of whole paths.
+        :return: A ColumnarResult with one column per requested Request flag.
+        """
+        if self._observers:
+            return self._search_columns_observed(
+                keywords, match_path, match_case, whole_word, regex, offset, limit, flags, sort, intern_paths
+            )
+        num_results = self._execute_query(
+            keywords, match_path, match_case, whole_word, regex, offset, limit, flags, sort
+        )
+        columns = {
+            key: self._read_column(func_name, kind, 0, num_results)
+            for key, func_name, kind in self._column_specs(flags, intern_paths)
+        }
+        return ColumnarResult(num_results, columns)
+
+    @staticmethod
+    def _column_specs(flags: Request, intern_paths: bool = False) -> List[Tuple[str, str, str]]:
+        """The (column name, DLL getter, storage kind) of each requested column."""
+        return [
+            ('full_path', 'Everything_GetResultPathW', 'path')
+            if intern_paths and flag == Request.FULL_PATH_AND_FILE_NAME else spec
+            for flag, spec in COLUMN_SPECS.items()
+            if flag in flags
+        ]
+
+    def export(
+            self,
+            keywords: str,
+            sink: ExportSink,
+            match_path: bool = False,
+            match_case: bool = False,
+            whole_word: bool = False,
+            regex: bool = False,
+            offset: int = 0,
+            limit: int = -1,
+            flags: Request = Request.DEFAULT,
+            sort: Sort = Sort.NAME_ASCENDING,
+            batch_size: int = 50_000
+    ) -> ExportStats:
+        """
+        Runs a query and writes its results to a sink without creating per-row objects.
+
+        Results are read straight from the result indexes in column-major batches of
+        `batch_size` rows, so memory stays bounded by one batch regardless of the result count.
+        Dates are written as raw FILETIME ticks and attributes as raw bits (see COLUMN_SPECS for
+        the column names). The sink is closed when the export finishes or fails.
+
+        Accepts the same parameters as search(), plus:
+        :param sink: An ExportSink such as NDJSONSink, CSVSink or ArrowSink.
+        :param batch_size: The number of rows read and written per batch.
+        :return: ExportStats with the rows and bytes written and the throughput.
+        """
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive")
+        specs = [spec for flag, spec in COLUMN_SPECS.items() if flag in flags]
+        stats = ExportStats()
+        start = time.perf_counter()
+        try:
+            num_results = self._execute_query(
+                keywords, match_path, match_case, whole_word, regex, offset, limit, flags, sort
+            )
+            generation = self._generation
+            sink.open([(key, kind) for key, _, kind in specs])
+            for batch_start in range(0, num_results, batch_size):
+                if self._generation != generation:
+                    self._raise_interleaved()
+                batch_stop = min(batch_start + batch_size, num_results)
+                columns = {
+                    key: self._read_column(func_name, kind, batch_start, batch_stop)
+                    for key, func_name, kind in specs
+                }
+                sink.write_batch(columns, batch_stop - batch_start)
+                stats.rows += batch_stop - batch_start
+        finally:
+            sink.close()
+        stats.bytes_written = sink.bytes_written
+        stats.elapsed = time.perf_counter() - start
+        return stats
+
+    def count(
+            self,
+            keywords: str,
+            match_path: bool = False,
+            match_case: bool = False,
+            whole_word: bool = False,
+            regex: bool = False
+    ) -> int:
+        """
+        Returns the number of results of a query without reading any of them.
+
+        The query requests only Request.FILE_NAME with Everything_SetMax(0), and the count comes
+        from Everything_GetTotResults.
+        """
+        self._execute_query(
+            keywords, match_path, match_case, whole_word, regex, 0, 0, Request.FILE_NAME, Sort.NAME_ASCENDING
+        )
+        return self.dll.Everything_GetTotResults()
+
+    def aggregate(
+            self,
+            keywords: str,
+            by: Optional[str] = 'extension',
+            metrics: Iterable[str] = ('count', 'size'),
+            match_path: bool = False,
+            match_case: bool = False,
+            whole_word: bool = False,
+            regex: bool = False,
+            batch_size: int = 65_536
+    ) -> Dict[Optional[str], Dict[str, int]]:
+        """
+        Groups the results of a query and computes counts and total sizes, without building rows.
+
+        Only the columns the grouping and metrics need are requested, and they are read in
+        batches of `batch_size`. Extensions and parent directories are read interned, and dates are
+        bucketed into quarter hours (every UTC offset is a multiple of one) before being labelled
+        with their local month, so each row costs one dictionary update per metric.
+
+        :param by: 'extension' (case-insensitive), 'parent_dir', 'month' (of DATE_MODIFIED, as
+                   'YYYY-MM'), or None for a single total keyed by None.
+        :param metrics: One or both of 'count' and 'size' (the sum of sizes in bytes).
+        :return: Group key -> {metric: value}, largest count (or size) first.
+        """
+        metrics = tuple(metrics)
+        unknown = set(metrics) - {'count', 'size'}
+        if unknown:
+            raise ValueError(f"Unknown metrics: {sorted(unknown)}")
+        if not metrics:
+            raise ValueError("aggregate() needs at least one metric")
+        if by not in (None, 'extension', 'parent_dir', 'month'):
+            raise ValueError(f"Unknown grouping: {by!r}")
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive")
+        key_spec = {
+            'extension': COLUMN_SPECS[Request.EXTENSION],
+            'parent_dir': COLUMN_SPECS[Request.PATH],
+            'month': COLUMN_SPECS[Request.DATE_MODIFIED],
+        }.get(by)
+        key_flag = {'extension': Request.EXTENSION, 'parent_dir': Request.PATH, 'month': Request.DATE_MODIFIED}
+        flags = Request(key_flag.get(by, 0) | (Request.SIZE if 'size' in metrics else 0)) or Request.FILE_NAME
+        num_results = self._execute_query(
+            keywords, match_path, match_case, whole_word, regex, 0, -1, flags, Sort.NAME_ASCENDING
+        )
+        generation = self._generation
+
+        quantum = 15 * 60 * WINDOWS_TICKS
+        counts: Counter = Counter()
+        sizes: Dict[object, int] = {}
+        for start in range(0, num_results, batch_size):
+            if self._generation != generation:
+                self._raise_interleaved()
+            stop = min(start + batch_size, num_results)
+            if key_spec is None:
+                keys = [None] * (stop - start)
+            elif by == 'month':
+                keys = [ticks // quantum for ticks in self._read_column(*key_spec[1:], start, stop)]
+            else:
+                column = self._read_column(*key_spec[1:], start, stop)
+                table = column.table
+                keys = [table[i] for i in column.ids]
+            if 'size' in metrics:
+                size_column = self._read_column(*COLUMN_SPECS[Request.SIZE][1:], start, stop)
+                get = sizes.get
+                for key, size in zip(keys, size_column):
+                    sizes[key] = get(key, 0) + size
+                if 'count' in metrics:
+                    counts.update(keys)
+            else:
+                counts.update(keys)
+
+        keys = set(counts) | set(sizes)
+        if by == 'month':
+            labels = self._month_labels(keys, quantum)
+        elif by == 'extension':
+            labels = {key: (key or '').lower() for key in keys}
+        else:
+            labels = {key: key for key in keys}
+
+        result: Dict[Optional[str], Dict[str, int]] = {}
+        for key in keys:
+            entry = result.setdefault(labels[key], dict.fromkeys(metrics, 0))
+            if 'count' in metrics:
+                entry['count'] += counts[key]
+            if 'size' in metrics:
+                entry['size'] += sizes.get(key, 0)
+        order = (lambda item: -item[1]['count']) if 'count' in metrics else (lambda item: -item[1]['size'])
+        return dict(sorted(result.items(), key=order))
+
+    @staticmethod
+    def _month_labels(buckets: Iterable[int], quantum: int) -> Dict[int, Optional[str]]:
+        """Labels FILETIME buckets of `quantum` ticks with their local 'YYYY-MM', one conversion per month."""
+        labels: Dict[int, Optional[str]] = {}
+        low = high = 0
+        name = None
+        for bucket in sorted(buckets):
+            ticks = bucket * quantum
+            if not low <= ticks < high:
+                try:
+                    moment = Client._ticks_to_datetime(ticks) if bucket else None
+                except OverflowError:
+                    moment = None
+                if moment is None:
+                    labels[bucket] = None
+                    continue
+                first = moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+                following = (first + datetime.timedelta(days=32)).replace(day=1)
+                low, high = _filetime_from_datetime(first), _filetime_from_datetime(following)
+                name = first.strftime('%Y-%m')
+            labels[bucket] = name
+        return labels
+
+    def folder_sizes(self, root: Optional[str | Path] = None, keywords: str = '',
+                     batch_size: int = 65_536) -> FolderTree:
+        """
+        Computes recursive directory sizes under a root from one PATH+SIZE+ATTRIBUTES query.
+
+        Results are read in column batches into a FolderTree, which rolls up the totals in a
+        single pass. Use FolderTree.top() for the heaviest subtrees.
+
+        :param root: The directory to summarize (as for search_in_located), or None for every
+                     indexed file.
+        :param keywords: Additional search terms, e.g. 'ext:iso' or '!attrib:H'.
+        :param batch_size: The number of results read per batch.
+        """
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive")
+        sep = _backend_sep(self.dll)
+        tree = FolderTree(str(root) if root is not None else None, sep)
+        if tree.root is not None:
+            keywords = f'path:"{tree.root}{sep}" {keywords}'
+        flags = Request.PATH | Request.SIZE | Request.ATTRIBUTES
+        num_results = self._execute_query(keywords, False, False, False, False, 0, -1, flags, Sort.NAME_ASCENDING)
+        generation = self._generation
+        for start in range(0, num_results, batch_size):
+            if self._generation != generation:
+                self._raise_interleaved()
+            stop = min(start + batch_size, num_results)
+            tree.add_batch(
+                self._read_column('Everything_GetResultPathW', 'interned', start, stop),
+                self._read_column('Everything_GetResultSize', 'u64', start, stop),
+                self._read_column('Everything_GetResultAttributes', 'u32', start, stop),
+            )
+        tree.roll_up()
+        return tree
+
+    def find_duplicates(
+            self,
+            keywords: str = '',
+            min_size: int = 1,
+            max_workers: int = 4,
+            block_size: int = 65_536,
+            algorithm: str = 'blake2b',
+            stats: Optional[DuplicateStats] = None
+    ) -> Iterator[DuplicateGroup]:
+        """
+        Finds files with identical contents and yields each group as soon as it is confirmed.
+
+        Files are queried sorted by Sort.SIZE_DESCENDING and only sizes are read at first, so a
+        file whose size is unique is dropped without reading its path or touching the disk. Each
+        run of equal sizes is hashed on a thread pool: first the first and last `block_size` bytes
+        of every file, then the full contents of files whose partial hashes collide. Files that
+        cannot be read, or have changed size since the query, are skipped. Do not run other
+        queries on this client until the iterator is exhausted or closed.
+
+        :param keywords: Search terms limiting the files to compare, e.g. 'path:"D:\\Shares\\"'.
+        :param min_size: Ignore files smaller than this many bytes.
+        :param max_workers: The number of files hashed concurrently (the I/O concurrency cap).
+        :param block_size: The size of the head and tail blocks of the partial hash.
+        :param algorithm: A hashlib algorithm name.
+        :param stats: A DuplicateStats to fill in with counters.
+        """
+        if max_workers <= 0 or block_size <= 0:
+            raise ValueError("max_workers and block_size must be positive")
+        hashlib.new(algorithm)
+        stats = stats if stats is not None else DuplicateStats()
+        size_filter = f'size:>={min_size} ' if min_size > 0 else ''
+        flags = Request.FULL_PATH_AND_FILE_NAME | Request.SIZE
+        num_results = self._execute_query(
+            f'file: {size_filter}{keywords}', False, False, False, False, 0, -1, flags, Sort.SIZE_DESCENDING
+        )
+        generation = self._generation
+        stats.files = num_results
+
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="everything-hash")
+        pending: set = set()
+
+        def finished(futures) -> Iterator[DuplicateGroup]:
+            for future in futures:
+                groups, counters = future.result()
+                for name, value in counters.items():
+                    setattr(stats, name, getattr(stats, name) + value)
+                stats.groups += len(groups)
+                yield from groups
+
+        try:
+            run_start, run_size = 0, None
+            for i in range(num_results + 1):
+                size = self._get_size(i) if i < num_results else None
+                if size == run_size:
+                    continue
+                if i - run_start > 1:
+                    if self._generation != generation:
+                        self._raise_interleaved()
+                    paths = [self._get_full_path(j) for j in range(run_start, i)]
+                    stats.candidates += len(paths)
+                    pending.add(executor.submit(_confirm_duplicates, run_size, paths, algorithm, block_size))
+                    if len(pending) >= 2 * max_workers:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        yield from finished(done)
+                run_start, run_size = i, size
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                yield from finished(done)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def save_snapshot(
+            self,
+            path: Union[str, Path],
+            keywords: str = "",
+            match_path: bool = False,
+            match_case: bool = False,
             whole_word: bool = False,
             regex: bool = False,
+            block_size: int = 16
+    ) -> int:
+        """
+        Writes the results of a query to a memory-mappable Snapshot file for offline querying.
+
+        :param path: The snapshot file to write.
+        :param keywords: The query selecting the records to keep; the default keeps everything.
+        :param block_size: Paths per front-coded block (see Snapshot.write).
+        :return: The number of records written.
+        """
+        result = self.search_columns(keywords, match_path, match_case, whole_word, regex, flags=SNAPSHOT_FLAGS)
+        version = tuple(int(part) for part in self.version().split('.'))
+        Snapshot.write(path, result, version, block_size, _backend_sep(self.dll))
+        return len(result)
+
+    def _search_columns_observed(
+            self, keywords: str, match_path: bool, match_case: bool, whole_word: bool, regex: bool,
+            offset: int, limit: int, flags: Request, sort: Sort, intern_paths: bool
+    ) -> ColumnarResult:
+        """search_columns() with every phase and column timed into a QueryStats."""
+        clock = time.perf_counter
+        stats = QueryStats(keywords, int(flags), int(sort))
+        try:
+            num_results = self._execute_query(
+                keywords, match_path, match_case, whole_word, regex, offset, limit, flags, sort, stats
+            )
+            columns = {}
+            for key, func_name, kind in self._column_specs(flags, intern_paths):
+                start = clock()
+                column = columns[key] = self._read_column(func_name, kind, 0, num_results)
+                stats.field_times[key] = clock() - start
+                if kind in _STRING_KINDS:
+                    stats.strings_decoded += num_results
+                    stats.bytes_decoded += 2 * sum(map(len, column))
+            stats.extract = sum(stats.field_times.values())
+            stats.rows = stats.sampled_rows = num_results
+        finally:
+            self._notify(stats)
+        return ColumnarResult(num_results, columns)
+
+    def exit(self) -> None:
+        """Requests the Everything service to exit."""
+        self._ensure_connected()
+        self.dll.Everything_Exit()
+        self.close()
+
+    @staticmethod
+    def _extension_routes(groups: Dict[str, str | Iterable[str]]) -> Dict[str, Tuple[str, ...]]:
+        """Maps each lowercase extension to the names of the groups that contain it."""
+        routes: Dict[str, List[str]] = {}
+        for name, extensions in groups.items():
+            if isinstance(extensions, str):
+                extensions = extensions.split(';')
+            for ext in extensions:
+                ext = ext.lstrip('.').lower()
+                if ext and name not in routes.setdefault(ext, []):
+                    routes[ext].append(name)
+        return {ext: tuple(names) for ext, names in routes.items()}
+
+    def search_many(
+            self,
+            groups: Dict[str, str | Iterable[str]],
+            keywords: str = '',
+            match_path: bool = False,
+            match_case: bool = False,
+            whole_word: bool = False,
+            flags: Request = Request.DEFAULT,
+            sort: Sort = Sort.NAME_ASCENDING,
+            lazy: bool = False
+    ) -> Dict[str, List[SearchResult | LazySearchResult]]:
+        """
+        Runs several extension searches as one query and partitions the results by group.
+
+        Equivalent to calling search_ext() once per group with the same keywords, but the groups'
+        extensions are merged into a single ext: query, and each result is routed to every group
+        containing its extension. Request.EXTENSION is always requested.
+
+        :param groups: Group name -> extensions (an iterable, or a ';'-separated string),
+                       e.g. FILE_TYPE_GROUPS.
+        :param keywords: Additional search terms applied to every group.
+        :return: Group name -> results in `sort` order (every group is present, possibly empty).
+        """
+        routes = self._extension_routes(groups)
+        results: Dict[str, List[SearchResult | LazySearchResult]] = {name: [] for name in groups}
+        if not routes:
+            return results
+        flags = flags | Request.EXTENSION
+        num_results = self._execute_query(
+            f'ext:{";".join(sorted(routes))} {keywords}', match_path, match_case, whole_word, False,
+            0, -1, flags, sort
+        )
+        extract = self._get_extractor(flags, lazy)
+        get_extension = self.dll.Everything_GetResultExtensionW
+        appends = {ext: tuple(results[name].append for name in names) for ext, names in routes.items()}
+        for i in range(num_results):
+            targets = appends.get((get_extension(i) or '').lower())
+            if targets:
+                row = extract(i)
+                for append in targets:
+                    append(row)
+        return results
+
+    def classify(
+            self,
+            keywords: str = '',
+            groups: Optional[Dict[str, str | Iterable[str]]] = None,
+            match_path: bool = False,
+            match_case: bool = False,
+            whole_word: bool = False
+    ) -> Dict[str, int]:
+        """
+        Counts the results of each extension group with one query and no row extraction.
+
+        Only Request.EXTENSION is requested; extensions are tallied once and summed per group.
+
+        :param keywords: Additional search terms applied to every group.
+        :param groups: Group name -> extensions, as for search_many(). Defaults to FILE_TYPE_GROUPS.
+        :return: Group name -> number of matching results.
+        """
+        groups = FILE_TYPE_GROUPS if groups is None else groups
+        routes = self._extension_routes(groups)
+        counts = dict.fromkeys(groups, 0)
+        if not routes:
+            return counts
+        num_results = self._execute_query(
+            f'ext:{";".join(sorted(routes))} {keywords}', match_path, match_case, whole_word, False,
+            0, -1, Request.EXTENSION, Sort.NAME_ASCENDING
+        )
+        tally = Counter(map(self.dll.Everything_GetResultExtensionW, range(num_results)))
+        for ext, count in tally.items():
+            for name in routes.get((ext or '').lower(), ()):
+                counts[name] += count
+        return counts
+
+    def find(
+            self,
+            query: Query,
             offset: int = 0,
             limit: int = -1,
             flags: Request = Request.DEFAULT,
-            sort: Sort = Sort.NAME_ASCENDING
-    ) -> Iterator[SearchResult]:
+            sort: Sort = Sort.NAME_ASCENDING,
+            lazy: bool = False
+    ) -> Iterator[SearchResult | LazySearchResult]:
+        """
+        Runs a Query: pushed-down terms are evaluated by Everything, the rest by a client-side filter.
+
+        Without a filter, offset and limit are applied by the SDK. With one, the fields the filter
+        reads are added to `flags` and offset and limit count filtered rows, so results are read
+        until `limit` of them pass.
+
+        :param query: The Query to run.
+        :param offset: The zero-based index of the first matching result to return.
+        :param limit: The maximum number of results to return. -1 means all results.
+        :param flags: A Request bitmask specifying which fields the caller needs.
+        :param sort: A Sort enum member specifying the sort order.
+        :param lazy: Yield LazySearchResult objects.
+        """
+        compiled = query.compile()
+        if compiled.filter is None:
+            yield from self.search(compiled.search, offset=offset, limit=limit, flags=flags, sort=sort, lazy=lazy)
+            return
+        rows = self.search(compiled.search, flags=flags | compiled.flags, sort=sort, lazy=lazy)
+        yield from itertools.islice(filter(compiled.filter, rows), offset, None if limit < 0 else offset + limit)
+
+    def _key_getter(self, field: str) -> Callable[[int], object]:
+        get = getattr(self, _TOP_K_KEYS[field][2])
+        return (lambda i: get(i).lower()) if field in _STRING_KEYS else get
+
+    def top_k(
+            self,
+            query: str | Query,
+            key: str | Iterable[str],
+            k: int = 10,
+            per_group: Optional[str] = None,
+            flags: Request = Request.DEFAULT,
+            lazy: bool = False,
+            chunk_size: int = 1000
+    ) -> List[SearchResult | LazySearchResult] | Dict[object, List[SearchResult | LazySearchResult]]:
+        """
+        Returns the best `k` results by one or more keys, overall or per group, without sorting or
+        keeping the whole result set.
+
+        The first key is pushed down as the SDK Sort, so results arrive ordered by it; later keys
+        break its ties. Each group keeps a bounded heap of its `k` best rows, and a row is only
+        extracted if it can enter its heap. Without `per_group`, results are read in growing pages
+        and reading stops at the first row ranked below a full heap on the first key. With it,
+        every row is read (an unseen group may still appear), but only its key fields. Strings
+        compare case-insensitively, dates as FILETIME ticks and attributes as raw bits;
+        'full_path' cannot be pushed down and disables early stopping as a first key.
+
+        :param query: Search terms or a Query; a Query's client-side filter is applied to candidate rows.
+        :param key: Field names from _TOP_K_KEYS, each optionally prefixed with '-' for descending,
+                    e.g. ['-size', 'name'].
+        :param k: The number of results to keep (per group).
+        :param per_group: A field name to group by, e.g. 'extension' or 'path'.
+        :param flags: A Request bitmask specifying which fields to retrieve.
+        :param lazy: Return LazySearchResult objects.
+        :param chunk_size: The size of the first page; later pages double.
+        :return: The rows best first, or with `per_group` a dict of (lowercase for strings) group
+                 value -> rows best first, in the order groups were first seen.
+        """
+        if k <= 0 or chunk_size <= 0:
+            raise ValueError("k and chunk_size must be positive")
+        specs = [(spec.lstrip('+-'), spec.startswith('-')) for spec in ([key] if isinstance(key, str) else key)]
+        if not specs:
+            raise ValueError("top_k() needs at least one key")
+        for field in [field for field, _ in specs] + ([per_group] if per_group is not None else []):
+            if field not in _TOP_K_KEYS:
+                raise ValueError(f"Unknown key field {field!r}; expected one of {', '.join(_TOP_K_KEYS)}")
+        compiled = query.compile() if isinstance(query, Query) else CompiledQuery(query)
+        row_flags = flags | compiled.flags
+        request_flags = row_flags
+        for field in [field for field, _ in specs] + ([per_group] if per_group is not None else []):
+            request_flags |= _TOP_K_KEYS[field][0]
+
+        primary, primary_descending = specs[0]
+        primary_sort = _TOP_K_KEYS[primary][1]
+        pushed = primary_sort is not None
+        sort = Sort(primary_sort + primary_descending) if pushed else Sort.NAME_ASCENDING
+        # A pushed-down first key ranks by its run number in SDK order, so the SDK's collation decides.
+        get_primary = self._key_getter(primary) if pushed else None
+        components = [(self._key_getter(field), descending) for field, descending in specs[pushed:]]
+        get_group = self._key_getter(per_group) if per_group is not None else None
+
+        heaps: Dict[object, list] = {}
+        sequence, run, previous = 0, -1, object()
+        position = 0
+        # Grouped queries read every row, so there is nothing to gain from paging.
+        page = max(chunk_size, 2 * k) if get_group is None else -1
+        while True:
+            num_results = self._execute_query(
+                compiled.search, False, False, False, False, position, page, request_flags, sort
+            )
+            extract = self._get_extractor(row_flags, lazy)
+            stopped = False
+            for i in range(num_results):
+                if pushed:
+                    value = get_primary(i)
+                    if value != previous:
+                        run, previous = run + 1, value
+                group = get_group(i) if get_group is not None else None
+                heap = heaps.get(group)
+                full = heap is not None and len(heap) >= k
+                if full and pushed and run > heap[0][0].value[0]:
+                    if get_group is None:
+                        stopped = True
+                        break
+                    continue
+                rank = ((run,) if pushed else ()) + tuple(
+                    _Descending(get(i)) if descending else get(i) for get, descending in components
+                ) + (sequence,)
+                sequence += 1
+                if full and rank > heap[0][0].value:
+                    continue
+                row = extract(i)
+                if compiled.filter is not None and not compiled.filter(row):
+                    continue
+                if heap is None:
+                    heap = heaps[group] = []
+                if len(heap) < k:
+                    heapq.heappush(heap, (_Descending(rank), row))
+                else:
+                    heapq.heapreplace(heap, (_Descending(rank), row))
+            if stopped or page < 0 or num_results < page:
+                break
+            position += page
+            page *= 2
+
+        ranked = {group: [row for _, row in sorted(heap, reverse=True)] for group, heap in heaps.items()}
+        if get_group is None:
+            return ranked.get(None, [])
+        return ranked
+
+    def search_in_located(self, path: str | Path, keywords: str = '', **kwargs) -> Iterator[SearchResult]:
+        return self.search(f'path:"{path}" {keywords}', **kwargs)
+
+    def search_folder(self, keywords: str = '', **kwargs) -> Iterator[SearchResult]:
+        return self.search(f'folder: {keywords}', **kwargs)
+
+    def search_ext(self, extensions: str | Iterable[str], keywords: str = '', **kwargs) -> Iterator[SearchResult]:
+        if isinstance(extensions, str):
+            ext_str = extensions.lstrip('.')
+        else:
+            ext_str = ";".join(ext.lstrip('.') for ext in extensions)
+        return self.search(f'ext:{ext_str} {keywords}', **kwargs)
+
+    def search_audio(self, keywords: str = '', **kwargs) -> Iterator[SearchResult]:
+        return self.search_ext(FILE_TYPE_GROUPS['AUDIO'], keywords, **kwargs)
+
+    def search_video(self, keywords: str = '', **kwargs) -> Iterator[SearchResult]:
+        return self.search_ext(FILE_TYPE_GROUPS['VIDEO'], keywords, **kwargs)
+
+    def search_image(self, keywords: str = '', **kwargs) -> Iterator[SearchResult]:
+        return self.search_ext(FILE_TYPE_GROUPS['IMAGE'], keywords, **kwargs)
+
+    def search_doc(self, keywords: str = '', **kwargs) -> Iterator[SearchResult]:
+        return self.search_ext(FILE_TYPE_GROUPS['DOC'], keywords, **kwargs)
+
+
+T = TypeVar('T')
+_END_OF_STREAM = object()
+
+
+class QueryExecutor:
+    """
+    Serializes access to a Client by running every SDK call on one dedicated worker thread.
+
+    The Everything SDK keeps a single, process-global query state, so a Client must never run two
+    queries at once or start a query while another one's results are still being read. The executor
+    owns the Client: each submitted job runs to completion on the worker (search results are
+    materialized, or streamed through a bounded queue) before the next job starts. Jobs can be
+    submitted from any number of threads and return futures.
+
+    Do not block on an executor future from inside a job running on the same executor.
+    """
+
+    def __init__(self, client: Optional[Client] = None, *, dll_path: Optional[str | Path] = None,
+                 dll: Optional[EverythingBackend] = None):
+        """
+        :param client: The Client to own. If omitted, one is created from dll_path / dll.
+        """
+        self.client = client if client is not None else Client(dll_path, dll)
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="everything-query")
+        self._connected = self._pool.submit(self.client.connect)
+        self._lock = threading.Lock()
+        self._progressive = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self, wait: bool = True) -> None:
+        """Stops accepting jobs and closes the client after the queued jobs have run."""
+        self._pool.submit(self.client.close)
+        self._pool.shutdown(wait=wait)
+
+    def run(self, func: Callable[..., T], *args, **kwargs) -> Future:
+        """
+        Runs func(client, *args, **kwargs) on the worker thread.
+
+        If func returns an iterator, it is consumed into a list on the worker, so the result never
+        refers to SDK state that a later job could overwrite.
+        """
+        def job():
+            self._connected.result()  # re-raises a failed connect in every job
+            result = func(self.client, *args, **kwargs)
+            if isinstance(result, Iterator):
+                result = list(result)
+            return result
+
+        return self._pool.submit(job)
+
+    def call(self, method: str, *args, **kwargs) -> Future:
+        """Runs a Client method by name on the worker thread, e.g. call('search_ext', 'py')."""
+        return self.run(lambda client: getattr(client, method)(*args, **kwargs))
+
+    def search(self, keywords: str, **kwargs) -> Future:
+        """Runs Client.search() on the worker; the future resolves to a list of results."""
+        return self.call('search', keywords, **kwargs)
+
+    def version(self) -> Future:
+        return self.call('version')
+
+    def search_progressive(self, keywords: str, on_page: Callable[[ProgressivePage], None], *,
+                           first_page: int = 100, growth: int = 4, max_page: int = 65_536,
+                           deadline: Optional[float] = None, **kwargs) -> Future:
+        """
+        Runs Client.search_progressive() with one worker job per window.
+
+        Pages are passed to `on_page` on a separate delivery thread, and the next window is
+        already queued on the worker while the current page is being delivered. The deadline is
+        checked between windows, as in Client.search_progressive(), so a single blocking query
+        can overrun it.
+
+        Each call supersedes the progressive searches submitted before it: one still queued does
+        not start, and one in flight stops before its next window. The future resolves to the
+        final page, or None if the search was superseded.
+        """
+        _check_progressive(first_page, growth, max_page)
+        with self._lock:
+            self._progressive += 1
+            token = self._progressive
+
+        def superseded() -> bool:
+            return self._progressive != token
+
+        start = time.perf_counter()
+        stop_at = start + deadline if deadline is not None else None
+        result: Future = Future()
+
+        def fetch(offset: int, window: int) -> Future:
+            return self.run(lambda client: client._progressive_page(keywords, offset, window, start, stop_at,
+                                                                    superseded, **kwargs))
+
+        def deliver() -> None:
+            try:
+                window = first_page
+                pending = fetch(0, window)
+                while True:
+                    page = pending.result()
+                    if page is None or superseded():
+                        result.set_result(None)
+                        return
+                    if not page.final:
+                        window = min(window * growth, max_page)
+                        pending = fetch(page.offset + len(page), window)
+                    on_page(page)
+                    if page.final:
+                        result.set_result(page)
+                        return
+            except BaseException as e:
+                result.set_exception(e)
+
+        threading.Thread(target=deliver, name="everything-progressive", daemon=True).start()
+        return result
+
+    def stream(self, *args, batch_size: int = 1000, max_batches: int = 8,
+               method: str = 'search', **kwargs) -> Iterator[SearchResult | LazySearchResult]:
+        """
+        Runs a search on the worker and yields its results through a bounded queue.
+
+        The job is submitted on the first next(), so an iterator that is never iterated never
+        occupies the worker. Once started, the worker blocks while the queue holds `max_batches`
+        batches of `batch_size` rows, so memory stays bounded and no other job runs until this one
+        is consumed or closed. Closing the returned iterator early (or dropping it, which closes it)
+        stops the worker at the next batch boundary.
+
+        :param args: Positional arguments of the search method, e.g. the keywords.
+        :param method: The Client search method to run ('search', 'search_ext', ...).
+        """
+        channel: queue.Queue = queue.Queue(maxsize=max_batches)
+        cancelled = threading.Event()
+
+        def offer(item) -> bool:
+            while not cancelled.is_set():
+                try:
+                    channel.put(item, timeout=0.05)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce(client: Client) -> None:
+            batch: List[object] = []
+            try:
+                for row in getattr(client, method)(*args, **kwargs):
+                    batch.append(row)
+                    if len(batch) >= batch_size:
+                        if not offer(batch):
+                            return
+                        batch = []
+                if batch and not offer(batch):
+                    return
+                offer(_END_OF_STREAM)
+            except BaseException as err:
+                offer(err)
+
+        def consume() -> Iterator[SearchResult | LazySearchResult]:
+            future = self.run(produce)
+            try:
+                while True:
+                    item = channel.get()
+                    if item is _END_OF_STREAM:
+                        break
+                    if isinstance(item, BaseException):
+                        raise item
+                    yield from item
+                future.result()
+            finally:
+                cancelled.set()
+
+        return consume()
+
+
+class _AsyncProducer:
+    """
+    The worker side of an AsyncResultStream. It does not reference the stream, so a stream whose
+    consumer went away can be collected, which cancels the producer.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, channel: asyncio.Queue, cancelled: threading.Event):
+        self.loop = loop
+        self.channel = channel
+        self.cancelled = cancelled
+
+    def offer(self, item) -> bool:
+        """Called on the worker: blocks until the consumer has room for item, or gives up if cancelled."""
+        try:
+            put = asyncio.run_coroutine_threadsafe(self.channel.put(item), self.loop)
+        except RuntimeError:  # event loop closed
+            return False
+        while not self.cancelled.is_set():
+            try:
+                put.result(timeout=0.05)
+                return True
+            except FutureTimeoutError:
+                continue
+        put.cancel()
+        return False
+
+    def __call__(self, client: Client, method: str, args: tuple, kwargs: dict, batch_size: int) -> None:
+        cancelled = self.cancelled
+        batch: List[object] = []
+        try:
+            for row in getattr(client, method)(*args, **kwargs):
+                if cancelled.is_set():
+                    return
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    if not self.offer(batch):
+                        return
+                    batch = []
+            if batch and not self.offer(batch):
+                return
+            self.offer(_END_OF_STREAM)
+        except BaseException as err:
+            self.offer(err)
+
+
+class AsyncResultStream:
+    """
+    An async iterator over batches (lists) of search results produced on a QueryExecutor worker.
+
+    Batches pass through a bounded asyncio.Queue: the worker stops extracting rows while the queue
+    is full. Cancelling the consuming task, hitting the timeout, calling aclose() or dropping the
+    stream stops the worker before its next row.
+    """
+
+    def __init__(self, executor: QueryExecutor, method: str, args: tuple, kwargs: dict,
+                 batch_size: int, max_batches: int, timeout: Optional[float]):
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_batches)
+        self._cancelled = threading.Event()
+        self._deadline = self._loop.time() + timeout if timeout is not None else None
+        self._done = False
+        producer = _AsyncProducer(self._loop, self._queue, self._cancelled)
+        self._future = asyncio.wrap_future(executor.run(producer, method, args, kwargs, batch_size))
+        weakref.finalize(self, self._cancelled.set)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> List[SearchResult | LazySearchResult]:
+        if self._done:
+            raise StopAsyncIteration
+        try:
+            if self._deadline is None:
+                item = await self._queue.get()
+            else:
+                item = await asyncio.wait_for(self._queue.get(), max(0.0, self._deadline - self._loop.time()))
+        except BaseException:
+            await self.aclose()
+            raise
+        if item is _END_OF_STREAM:
+            self._done = True
+            await self._future
+            raise StopAsyncIteration
+        if isinstance(item, BaseException):
+            self._done = True
+            raise item
+        return item
+
+    async def aclose(self) -> None:
+        """Stops the worker and discards any batches not yet consumed."""
+        self._done = True
+        self._cancelled.set()
+        while not self._queue.empty():
+            self._queue.get_nowait()
+
+    async def rows(self) -> AsyncIterator[SearchResult | LazySearchResult]:
+        """Flattens the batches into individual results."""
+        async for batch in self:
+            for row in batch:
+                yield row
+
+
+class AsyncClient:
+    """
+    An asyncio front end to the Everything SDK.
+
+    All SDK calls run on a single QueryExecutor worker thread, so concurrent tasks are safely
+    serialized. Search methods return an AsyncResultStream of result batches::
+
+        async with AsyncClient() as client:
+            async for batch in client.search_ext('py', timeout=5):
+                ...
+    """
+
+    def __init__(self, dll_path: Optional[str | Path] = None, dll: Optional[EverythingBackend] = None, *,
+                 executor: Optional[QueryExecutor] = None, batch_size: int = 1000, max_batches: int = 4):
+        """
+        :param executor: An existing QueryExecutor to share. If omitted, one is created from dll_path / dll.
+        :param batch_size: The default number of results per batch.
+        :param max_batches: The default number of batches buffered before the worker pauses.
+        """
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._dll_path = dll_path
+        self._dll = dll
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    @property
+    def executor(self) -> QueryExecutor:
+        if self._executor is None:
+            self._executor = QueryExecutor(dll_path=self._dll_path, dll=self._dll)
+        return self._executor
+
+    async def connect(self) -> None:
+        """Starts the worker and waits for the SDK to be loaded."""
+        await asyncio.wrap_future(self.executor._connected)
+
+    async def close(self) -> None:
+        """Closes the owned executor after its queued jobs have run."""
+        if self._owns_executor and self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.get_running_loop().run_in_executor(None, executor.close)
+
+    async def run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """Awaits func(client, *args, **kwargs) run on the worker (see QueryExecutor.run)."""
+        return await asyncio.wrap_future(self.executor.run(func, *args, **kwargs))
+
+    async def version(self) -> str:
+        return await asyncio.wrap_future(self.executor.version())
+
+    def _stream(self, method: str, *args, timeout: Optional[float] = None, batch_size: Optional[int] = None,
+                max_batches: Optional[int] = None, **kwargs) -> AsyncResultStream:
+        return AsyncResultStream(
+            self.executor, method, args, kwargs,
+            batch_size or self.batch_size, max_batches or self.max_batches, timeout,
+        )
+
+    def search(self, keywords: str, **kwargs) -> AsyncResultStream:
+        """
+        Async counterpart of Client.search(); yields lists of results.
+
+        Accepts the same parameters as Client.search(), plus:
+        :param timeout: Seconds until the whole query is abandoned with TimeoutError.
+        :param batch_size: The number of results per batch.
+        :param max_batches: The number of batches buffered before the worker pauses.
+        """
+        return self._stream('search', keywords, **kwargs)
+
+    def search_stream(self, keywords: str, **kwargs) -> AsyncResultStream:
+        return self._stream('search_stream', keywords, **kwargs)
+
+    def find(self, query: Query, **kwargs) -> AsyncResultStream:
+        return self._stream('find', query, **kwargs)
+
+    def search_in_located(self, path: str | Path, keywords: str = '', **kwargs) -> AsyncResultStream:
+        return self._stream('search_in_located', path, keywords, **kwargs)
+
+    def search_folder(self, keywords: str = '', **kwargs) -> AsyncResultStream:
+        return self._stream('search_folder', keywords, **kwargs)
+
+    def search_ext(self, extensions: str | Iterable[str], keywords: str = '', **kwargs) -> AsyncResultStream:
+        return self._stream('search_ext', extensions, keywords, **kwargs)
+
+    def search_audio(self, keywords: str = '', **kwargs) -> AsyncResultStream:
+        return self._stream('search_audio', keywords, **kwargs)
+
+    def search_video(self, keywords: str = '', **kwargs) -> AsyncResultStream:
+        return self._stream('search_video', keywords, **kwargs)
+
+    def search_image(self, keywords: str = '', **kwargs) -> AsyncResultStream:
+        return self._stream('search_image', keywords, **kwargs)
+
+    def search_doc(self, keywords: str = '', **kwargs) -> AsyncResultStream:
+        return self._stream('search_doc', keywords, **kwargs)
+
+    async def search_columns(self, keywords: str, **kwargs) -> ColumnarResult:
+        return await self.run(lambda client: client.search_columns(keywords, **kwargs))
+
+    async def search_many(self, groups: Dict[str, str | Iterable[str]], keywords: str = '',
+                          **kwargs) -> Dict[str, List[SearchResult | LazySearchResult]]:
+        return await self.run(lambda client: client.search_many(groups, keywords, **kwargs))
+
+    async def classify(self, keywords: str = '', groups: Optional[Dict[str, str | Iterable[str]]] = None,
+                       **kwargs) -> Dict[str, int]:
+        return await self.run(lambda client: client.classify(keywords, groups, **kwargs))
+
+    async def top_k(self, query: str | Query, key: str | Iterable[str], k: int = 10, **kwargs):
+        return await self.run(lambda client: client.top_k(query, key, k, **kwargs))
+
+    async def count(self, keywords: str, **kwargs) -> int:
+        return await self.run(lambda client: client.count(keywords, **kwargs))
+
+    async def aggregate(self, keywords: str, **kwargs) -> Dict[Optional[str], Dict[str, int]]:
+        return await self.run(lambda client: client.aggregate(keywords, **kwargs))
+
+
+# --- Synthetic backend --------------------------------------------------------------------------
+
+_QUERY_TOKEN = re.compile(r'\s+|\||!|<|"[^"]*"|[^\s|"<][^\s|"]*(?:"[^"]*"[^\s|"]*)*')
+_SIZE_UNITS: Final[Dict[str, int]] = {'': 1, 'b': 1, 'kb': 2 ** 10, 'mb': 2 ** 20, 'gb': 2 ** 30, 'tb': 2 ** 40}
+_DATE_FIELDS: Final[Dict[str, str]] = {
+    'dc': 'created', 'datecreated': 'created',
+    'dm': 'modified', 'datemodified': 'modified',
+    'da': 'accessed', 'dateaccessed': 'accessed',
+    'rc': 'changed', 'recentchange': 'changed', 'daterecentlychanged': 'changed',
+}
+_ATTRIBUTE_LETTERS: Final[Dict[str, int]] = {letter: flag.value for flag, letter in ATTRIBUTE_MAP.items()
+                                              if flag != FileAttribute.DEVICE}
+
+
+def _filetime_from_datetime(value: datetime.datetime) -> int:
+    """Converts a naive local datetime to FILETIME ticks (the inverse of Client._ticks_to_datetime)."""
+    return int(value.timestamp() * WINDOWS_TICKS + WINDOWS_TICKS_TO_POSIX_EPOCH)
+
+
+def _parse_size(text: str) -> int:
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)\s*([kmgt]?b?)', text.strip().lower())
+    if not match:
+        raise ValueError(f"Invalid size: {text!r}")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2)])
+
+
+def _parse_date_range(text: str) -> Tuple[int, int]:
+    """Parses an ISO date (year, month, day or full timestamp) into a half-open FILETIME tick range."""
+    text = text.strip()
+    for fmt, step in (('%Y', 'year'), ('%Y-%m', 'month'), ('%Y-%m-%d', 'day')):
+        try:
+            start = datetime.datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        if step == 'year':
+            end = start.replace(year=start.year + 1)
+        elif step == 'month':
+            end = (start.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+        else:
+            end = start + datetime.timedelta(days=1)
+        return _filetime_from_datetime(start), _filetime_from_datetime(end)
+    moment = _filetime_from_datetime(datetime.datetime.fromisoformat(text))
+    return moment, moment + 1
+
+
+def _range_bounds(value: str, parse: Callable[[str], Tuple[int, int]]) -> Tuple[int, int]:
+    """Parses 'a..b', '>x', '>=x', '<x', '<=x', '=x' or 'x' into a half-open [low, high) range."""
+    if '..' in value:
+        low, high = value.split('..', 1)
+        return parse(low)[0], parse(high)[1]
+    for op in ('>=', '<=', '>', '<', '='):
+        if value.startswith(op):
+            start, end = parse(value[len(op):])
+            break
+    else:
+        op = '='
+        start, end = parse(value)
+    return {
+        '>=': (start, INVALID_FILETIME + 1),
+        '<=': (0, end),
+        '>': (end, INVALID_FILETIME + 1),
+        '<': (0, start),
+        '=': (start, end),
+    }[op]
+
+
+def _range_predicate(value: str, parse: Callable[[str], Tuple[int, int]]) -> Callable[[int], bool]:
+    """Compiles a range accepted by _range_bounds() into a predicate."""
+    low, high = _range_bounds(value, parse)
+    return lambda v: low <= v < high
+
+
+class _QueryCompiler:
+    """
+    Compiles a subset of Everything search syntax into a predicate over _RecordBackend records.
+
+    Supported: AND by whitespace, '|' (OR), '!' (NOT), '<...>' grouping, quoted phrases, '*' and '?'
+    wildcards, and the modifiers/functions file:, folder:, path:, parent:, ext:, size:, attrib:,
+    regex:, case:, nocase:, ww:, dc:, dm:, da: and rc: (with '<', '>', '..' ranges).
+    """
+
+    def __init__(self, backend: '_RecordBackend', match_path: bool, match_case: bool, whole_word: bool):
+        self.backend = backend
+        self.match_path = match_path
+        self.match_case = match_case
+        self.whole_word = whole_word
+        self.tokens: List[str] = []
+        self.pos = 0
+
+    def compile(self, search: str) -> Optional[Callable[[int], bool]]:
+        """Returns a predicate over record indexes, or None if every record matches."""
+        self.tokens = [t for t in _QUERY_TOKEN.findall(search) if t.strip()]
+        self.pos = 0
+        if not self.tokens:
+            return None
+        predicate = self._parse_or()
+        if self.pos < len(self.tokens):
+            raise ValueError(f"Unexpected token {self.tokens[self.pos]!r} in search {search!r}")
+        return predicate
+
+    def _peek(self) -> Optional[str]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _parse_or(self) -> Callable[[int], bool]:
+        options = [self._parse_and()]
+        while self._peek() == '|':
+            self.pos += 1
+            options.append(self._parse_and())
+        if len(options) == 1:
+            return options[0]
+        return lambda i: any(option(i) for option in options)
+
+    def _parse_and(self) -> Callable[[int], bool]:
+        terms = []
+        while (token := self._peek()) is not None and token not in ('|', '>'):
+            terms.append(self._parse_unary())
+        if not terms:
+            return lambda i: True
+        if len(terms) == 1:
+            return terms[0]
+        return lambda i: all(term(i) for term in terms)
+
+    def _parse_unary(self) -> Callable[[int], bool]:
+        token = self.tokens[self.pos]
+        if token == '!':
+            self.pos += 1
+            inner = self._parse_unary()
+            return lambda i: not inner(i)
+        if token == '<':
+            self.pos += 1
+            inner = self._parse_or()
+            if self._peek() != '>':
+                raise ValueError("Unbalanced '<' in search")
+            self.pos += 1
+            return inner
+        self.pos += 1
+        if token.endswith('>') and len(token) > 1 and token[-2] not in ':<>=':
+            # 'term>' closes a group: split the '>' back off as its own token.
+            self.tokens.insert(self.pos, '>')
+            token = token[:-1]
+        return self._compile_term(token)
+
+    def _compile_term(self, token: str) -> Callable[[int], bool]:
+        backend = self.backend
+        modifier, colon, value = token.partition(':')
+        name = modifier.lower()
+        if colon and not modifier.startswith('"') and not (len(modifier) == 1 and value.startswith('\\')):
+            value = value.replace('"', '')
+            if name == 'file':
+                files = backend._is_file
+                return files if not value else self._both(files, self._text(value, False))
+            if name == 'folder':
+                folders = backend._is_folder
+                return folders if not value else self._both(folders, self._text(value, False))
+            if name == 'path':
+                return self._text(value, True)
+            if name == 'parent':
+                return self._parent(value)
+            if name == 'ext':
+                extensions = {ext.lstrip('.').lower() for ext in value.split(';') if ext}
+                extension = backend._extension
+                return lambda i: extension(i).lower() in extensions
+            if name == 'size':
+                sizes, files = backend._sizes, backend._is_file
+                check = _range_predicate(value.lower(), lambda text: (_parse_size(text), _parse_size(text) + 1))
+                return lambda i: files(i) and check(sizes[i])
+            if name in _DATE_FIELDS:
+                ticks = getattr(backend, f'_{_DATE_FIELDS[name]}')
+                check = _range_predicate(value, _parse_date_range)
+                return lambda i: check(ticks[i])
+            if name in ('attrib', 'attributes'):
+                mask = 0
+                for letter in value.upper():
+                    mask |= _ATTRIBUTE_LETTERS[letter]
+                attrs = backend._attrs
+                return lambda i: attrs[i] & mask == mask
+            if name == 'regex':
+                return self._regex(value, self.match_path)
+            if name in ('case', 'nocase', 'ww', 'wholeword'):
+                saved = self.match_case, self.whole_word
+                if name == 'case':
+                    self.match_case = True
+                elif name == 'nocase':
+                    self.match_case = False
+                else:
+                    self.whole_word = True
+                try:
+                    return self._compile_term(value)
+                finally:
+                    self.match_case, self.whole_word = saved
+        return self._text(token.replace('"', ''), self.match_path or '\\' in token)
+
+    @staticmethod
+    def _both(first: Callable[[int], bool], second: Callable[[int], bool]) -> Callable[[int], bool]:
+        return lambda i: first(i) and second(i)
+
+    def _text(self, text: str, full_path: bool) -> Callable[[int], bool]:
+        """Matches a name (or full path): substring, wildcard pattern, or whole word."""
+        field = self.backend._full_path if full_path else self.backend._name
+        fold = (lambda s: s) if self.match_case else str.lower
+        needle = fold(text)
+        if '*' in text or '?' in text:
+            pattern = re.compile(fnmatch.translate(needle), re.DOTALL)
+            return lambda i: pattern.match(fold(field(i))) is not None
+        if self.whole_word:
+            pattern = re.compile(rf'(?<!\w){re.escape(needle)}(?!\w)')
+            return lambda i: pattern.search(fold(field(i))) is not None
+        return lambda i: needle in fold(field(i))
+
+    def _regex(self, pattern: str, full_path: bool) -> Callable[[int], bool]:
+        field = self.backend._full_path if full_path else self.backend._name
+        compiled = re.compile(pattern, 0 if self.match_case else re.IGNORECASE)
+        return lambda i: compiled.search(field(i)) is not None
+
+    def _parent(self, value: str) -> Callable[[int], bool]:
+        return self.backend._in_folder(value.rstrip(self.backend.sep).lower())
+
+
+class _RecordBackend:
+    """
+    The Everything SDK surface over a table of records, shared by SyntheticBackend and Snapshot.
+
+    Subclasses provide `count`, `version` and `queries`, the accessors _name, _path and _full_path,
+    and indexable columns _sizes, _created, _modified, _accessed, _changed and _attrs. Queries
+    are evaluated with _QueryCompiler over the records returned by _candidates(). `sep` is the
+    separator between the directories of a full path.
+    """
+    count: int
+    version: Tuple[int, int, int, int]
+    queries: int
+    sep: str = '\\'
+
+    # Record accessors used by the query compiler and sort keys.
+
+    def _name(self, i: int) -> str:
+        raise NotImplementedError
+
+    def _path(self, i: int) -> str:
+        raise NotImplementedError
+
+    def _full_path(self, i: int) -> str:
+        raise NotImplementedError
+
+    def _extension(self, i: int) -> str:
+        if self._attrs[i] & _DIRECTORY_BIT:
+            return ""
+        stem, dot, ext = self._name(i).rpartition('.')
+        return ext if dot else ""
+
+    def _is_folder(self, i: int) -> bool:
+        return bool(self._attrs[i] & _DIRECTORY_BIT)
+
+    def _is_file(self, i: int) -> bool:
+        return not self._attrs[i] & _DIRECTORY_BIT
+
+    def _in_folder(self, folder: str) -> Callable[[int], bool]:
+        """A predicate for records directly inside a folder (given lowercase, without a trailing slash)."""
+        path = self._path
+        return lambda i: path(i).lower() == folder
+
+    def _candidates(self, search: str) -> Optional[Iterable[int]]:
+        """The records a query can match, narrowed with an index, or None to scan every record."""
+        return None
+
+    def _sort_key(self, sort: int) -> Optional[Callable[[int], object]]:
+        name, path = self._name, self._path
+        keys: Dict[int, Callable[[int], object]] = {
+            Sort.PATH_ASCENDING: lambda i: (path(i).lower(), name(i).lower()),
+            Sort.SIZE_ASCENDING: self._sizes.__getitem__,
+            Sort.EXTENSION_ASCENDING: lambda i: self._extension(i).lower(),
+            Sort.TYPE_NAME_ASCENDING: lambda i: self._extension(i).lower(),
+            Sort.DATE_CREATED_ASCENDING: self._created.__getitem__,
+            Sort.DATE_MODIFIED_ASCENDING: self._modified.__getitem__,
+            Sort.ATTRIBUTES_ASCENDING: self._attrs.__getitem__,
+            Sort.DATE_RECENTLY_CHANGED_ASCENDING: self._changed.__getitem__,
+            Sort.DATE_ACCESSED_ASCENDING: self._accessed.__getitem__,
+        }
+        return keys.get(sort - (sort + 1) % 2)  # *_DESCENDING -> *_ASCENDING
+
+    # Everything SDK surface.
+
+    def Everything_Reset(self) -> None:
+        self._search = ""
+        self._match_path = self._match_case = self._whole_word = self._regex = False
+        self._flags = int(Request.FILE_NAME | Request.PATH)
+        self._sort = Sort.NAME_ASCENDING
+        self._offset = 0
+        self._max = 0xFFFFFFFF
+        self._results = array('I')
+        self._total = 0
+        self._last_error = EverythingError.OK
+
+    def Everything_SetSearchW(self, search: str) -> None:
+        self._search = search
+
+    def Everything_SetMatchPath(self, enable: bool) -> None:
+        self._match_path = bool(enable)
+
+    def Everything_SetMatchCase(self, enable: bool) -> None:
+        self._match_case = bool(enable)
+
+    def Everything_SetMatchWholeWord(self, enable: bool) -> None:
+        self._whole_word = bool(enable)
+
+    def Everything_SetRegex(self, enable: bool) -> None:
+        self._regex = bool(enable)
+
+    def Everything_SetRequestFlags(self, flags: int) -> None:
+        self._flags = flags
+
+    def Everything_SetSort(self, sort: int) -> None:
+        self._sort = sort
+
+    def Everything_SetOffset(self, offset: int) -> None:
+        self._offset = offset
+
+    def Everything_SetMax(self, max_results: int) -> None:
+        self._max = max_results
+
+    def Everything_QueryW(self, wait: bool) -> bool:
+        self.queries += 1
+        compiler = _QueryCompiler(self, self._match_path, self._match_case, self._whole_word)
+        try:
+            if self._regex:
+                predicate = compiler._regex(self._search, self._match_path) if self._search else None
+            else:
+                predicate = compiler.compile(self._search)
+        except (ValueError, KeyError, re.error):
+            self._last_error = EverythingError.INVALIDCALL
+            return False
+        candidates = None if self._regex else self._candidates(self._search)
+        records = range(self.count) if candidates is None else candidates
+        matches = list(records) if predicate is None else list(filter(predicate, records))
+
+        name = self._name
+        matches.sort(key=lambda i: name(i).lower())
+        key = self._sort_key(self._sort)
+        descending = self._sort % 2 == 0
+        if key is not None:
+            matches.sort(key=key, reverse=descending)
+        elif descending:
+            matches.reverse()
+
+        self._total = len(matches)
+        self._results = array('I', matches[self._offset:self._offset + self._max])
+        return True
+
+    def Everything_IsDBLoaded(self) -> bool:
+        return True
+
+    def Everything_GetLastError(self) -> int:
+        return self._last_error
+
+    def Everything_GetNumResults(self) -> int:
+        return len(self._results)
+
+    def Everything_GetTotResults(self) -> int:
+        return self._total
+
+    def Everything_GetMajorVersion(self) -> int:
+        return self.version[0]
+
+    def Everything_GetMinorVersion(self) -> int:
+        return self.version[1]
+
+    def Everything_GetRevision(self) -> int:
+        return self.version[2]
+
+    def Everything_GetBuildNumber(self) -> int:
+        return self.version[3]
+
+    def Everything_Exit(self) -> None:
+        pass
+
+    def Everything_GetResultFileNameW(self, index: int) -> str:
+        return self._name(self._results[index])
+
+    def Everything_GetResultPathW(self, index: int) -> str:
+        return self._path(self._results[index])
+
+    def Everything_GetResultExtensionW(self, index: int) -> str:
+        return self._extension(self._results[index])
+
+    def Everything_GetResultFullPathNameW(self, index: int, buffer: ctypes.Array, size: int) -> None:
+        buffer.value = self._full_path(self._results[index])[:size - 1]
+
+    def Everything_GetResultHighlightedFileNameW(self, index: int) -> str:
+        return self.Everything_GetResultFileNameW(index)
+
+    def Everything_GetResultHighlightedPathW(self, index: int) -> str:
+        return self.Everything_GetResultPathW(index)
+
+    def Everything_GetResultHighlightedFullPathAndFileNameW(self, index: int) -> str:
+        return self._full_path(self._results[index])
+
+    def Everything_GetResultFileListFileNameW(self, index: int) -> str:
+        return ""
+
+    def Everything_GetResultAttributes(self, index: int) -> int:
+        return self._attrs[self._results[index]]
+
+    def Everything_GetResultRunCount(self, index: int) -> int:
+        return 0
+
+    def Everything_GetResultSize(self, index: int, out: ctypes.c_ulonglong) -> None:
+        out.value = self._sizes[self._results[index]]
+
+    def Everything_GetResultDateCreated(self, index: int, out: ctypes.c_ulonglong) -> None:
+        out.value = self._created[self._results[index]]
+
+    def Everything_GetResultDateModified(self, index: int, out: ctypes.c_ulonglong) -> None:
+        out.value = self._modified[self._results[index]]
+
+    def Everything_GetResultDateAccessed(self, index: int, out: ctypes.c_ulonglong) -> None:
+        out.value = self._accessed[self._results[index]]
+
+    def Everything_GetResultDateRecentlyChanged(self, index: int, out: ctypes.c_ulonglong) -> None:
+        out.value = self._changed[self._results[index]]
+
+    def Everything_GetResultDateRun(self, index: int, out: ctypes.c_ulonglong) -> None:
+        out.value = 0
+
+
+class SyntheticBackend(_RecordBackend):
+    """
+    An in-memory EverythingBackend over deterministic, generated file records.
+
+    Records form a random directory tree with skewed fan-out, lognormal file sizes, plausible
+    created/modified/accessed dates and a realistic extension mix. The same (count, seed) always
+    produces the same records, so results are reproducible on any platform::
+
+        with Client(dll=SyntheticBackend(1_000_000)) as client:
+            ...
+
+    Queries support the subset of Everything syntax described in _QueryCompiler.
+    """
+
+    # (extension, relative weight); '' means no extension.
+    EXTENSIONS: Final[Tuple[Tuple[str, int], ...]] = (
+        ('txt', 60), ('log', 40), ('py', 40), ('js', 30), ('dll', 35), ('exe', 20), ('json', 25),
+        ('xml', 20), ('html', 15), ('cs', 10), ('cpp', 10), ('h', 15), ('jpg', 45), ('png', 40),
+        ('gif', 8), ('mp3', 25), ('flac', 5), ('wav', 5), ('mp4', 15), ('mkv', 6), ('avi', 4),
+        ('pdf', 20), ('docx', 12), ('xlsx', 8), ('pptx', 4), ('md', 10), ('zip', 8), ('7z', 3),
+        ('iso', 1), ('', 15),
+    )
+    WORDS: Final[Tuple[str, ...]] = (
+        'project', 'report', 'data', 'backup', 'photo', 'music', 'video', 'archive', 'build', 'src',
+        'docs', 'assets', 'cache', 'config', 'temp', 'invoice', 'notes', 'release', 'test', 'lib',
+        'images', 'export', 'draft', 'final', 'shared', 'client', 'server', 'module', 'album', 'scan',
+    )
+    ROOTS: Final[Tuple[str, ...]] = ('C:', 'D:', 'E:')
+    # 2025-01-01T00:00:00Z, the newest timestamp generated.
+    NOW_TICKS: Final[int] = 133_801_920_000_000_000
+    YEAR_TICKS: Final[int] = 365 * 24 * 3600 * WINDOWS_TICKS
+
+    def __init__(self, count: int = 100_000, seed: int = 0, version: Tuple[int, int, int, int] = (1, 4, 1, 1024)):
+        """
+        :param count: The number of records (folders and files).
+        :param seed: Seeds the generator; equal (count, seed) produce identical records.
+        """
+        self.count = count
+        self.seed = seed
+        self.version = version
+        self.queries = 0
+        self._dirs: List[str] = list(self.ROOTS)
+        self._dir_ids = array('I')
+        self._names: List[str] = []
+        self._sizes = array('Q')
+        self._created = array('Q')
+        self._modified = array('Q')
+        self._accessed = array('Q')
+        self._changed = array('Q')
+        self._attrs = array('I')
+        self._folder_count = 0
+        self._generate()
+        self.Everything_Reset()
+
+    def _generate(self) -> None:
+        rng = random.Random(self.seed)
+        rand = rng.random
+        words = self.WORDS
+        extensions, weights = zip(*self.EXTENSIONS)
+        cumulative = list(itertools.accumulate(weights))
+        now, year = self.NOW_TICKS, self.YEAR_TICKS
+
+        folder_count = max(1, self.count // 16)
+        file_count = self.count - folder_count
+        ext_choices = rng.choices(extensions, cum_weights=cumulative, k=file_count)
+
+        for n in range(self.count):
+            is_folder = n < folder_count
+            if is_folder:
+                parent = int(rand() * len(self._dirs))
+                name = f"{words[int(rand() * len(words))]}{n}"
+                self._dirs.append(f"{self._dirs[parent]}\\{name}")
+                size = 0
+                attrs = FileAttribute.DIRECTORY.value
+            else:
+                # Skew files toward the earlier (shallower) folders.
+                parent = int(len(self._dirs) * rand() ** 2)
+                ext = ext_choices[n - folder_count]
+                stem = f"{words[int(rand() * len(words))]}_{n}"
+                name = f"{stem}.{ext}" if ext else stem
+                size = 0 if rand() < 0.02 else min(int(rng.lognormvariate(10.0, 2.5)), 2 ** 40)
+                roll = rand()
+                attrs = FileAttribute.ARCHIVE.value
+                if roll < 0.03:
+                    attrs |= FileAttribute.HIDDEN.value
+                if roll < 0.01:
+                    attrs |= FileAttribute.SYSTEM.value
+                if 0.97 < roll:
+                    attrs |= FileAttribute.READONLY.value
+            created = now - int(rand() * 10 * year)
+            modified = created + int(rand() ** 3 * (now - created))
+            accessed = modified + int(rand() * (now - modified))
+            self._dir_ids.append(parent)
+            self._names.append(name)
+            self._sizes.append(size)
+            self._created.append(created)
+            self._modified.append(modified)
+            self._accessed.append(accessed)
+            self._changed.append(max(created, modified))
+            self._attrs.append(attrs)
+        self._folder_count = folder_count
+
+    # Record accessors.
+
+    def _name(self, i: int) -> str:
+        return self._names[i]
+
+    def _path(self, i: int) -> str:
+        return self._dirs[self._dir_ids[i]]
+
+    def _full_path(self, i: int) -> str:
+        return f"{self._dirs[self._dir_ids[i]]}\\{self._names[i]}"
+
+    def _in_folder(self, folder: str) -> Callable[[int], bool]:
+        ids = {dir_id for dir_id, path in enumerate(self._dirs) if path.lower() == folder}
+        dir_ids = self._dir_ids
+        return lambda i: dir_ids[i] in ids
+
+
+class DirectoryBackend(_RecordBackend):
+    """
+    An in-memory EverythingBackend over the folders and files under a local directory.
+
+    The tree is walked once when the backend is created, and full paths use the native separator,
+    so methods that open files (Client.find_duplicates()) can be run and benchmarked on any OS::
+
+        with Client(dll=DirectoryBackend('/srv/share')) as client:
+            ...
+
+    Queries support the subset of Everything syntax described in _QueryCompiler.
+    """
+    sep = os.sep
+
+    def __init__(self, root: str | Path, version: Tuple[int, int, int, int] = (1, 4, 1, 1024)):
+        """
+        :param root: The directory to index; it is not itself a record.
+        """
+        self.root = os.path.abspath(root)
+        self.version = version
+        self.queries = 0
+        self._dirs: List[str] = [self.root]
+        self._dir_ids = array('I')
+        self._names: List[str] = []
+        self._sizes = array('Q')
+        self._created = array('Q')
+        self._modified = array('Q')
+        self._accessed = array('Q')
+        self._changed = array('Q')
+        self._attrs = array('I')
+        self._scan()
+        self.count = len(self._names)
+        self.Everything_Reset()
+
+    def _scan(self) -> None:
+        epoch = int(WINDOWS_TICKS_TO_POSIX_EPOCH)
+        pending = [0]
+        while pending:
+            dir_id = pending.pop()
+            try:
+                entries = list(os.scandir(self._dirs[dir_id]))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    info = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(len(self._dirs))
+                    self._dirs.append(entry.path)
+                    size, attrs = 0, FileAttribute.DIRECTORY.value
+                else:
+                    size, attrs = info.st_size, FileAttribute.ARCHIVE.value
+                if entry.name.startswith('.'):
+                    attrs |= FileAttribute.HIDDEN.value
+                modified = epoch + info.st_mtime_ns // 100
+                self._dir_ids.append(dir_id)
+                self._names.append(entry.name)
+                self._sizes.append(size)
+                self._created.append(epoch + getattr(info, 'st_birthtime_ns', info.st_ctime_ns) // 100)
+                self._modified.append(modified)
+                self._accessed.append(epoch + info.st_atime_ns // 100)
+                self._changed.append(max(modified, epoch + info.st_ctime_ns // 100))
+                self._attrs.append(attrs)
+
+    # Record accessors.
+
+    def _name(self, i: int) -> str:
+        return self._names[i]
+
+    def _path(self, i: int) -> str:
+        return self._dirs[self._dir_ids[i]]
+
+    def _full_path(self, i: int) -> str:
+        return os.path.join(self._dirs[self._dir_ids[i]], self._names[i])
+
+    def _in_folder(self, folder: str) -> Callable[[int], bool]:
+        ids = {dir_id for dir_id, path in enumerate(self._dirs) if path.lower() == folder}
+        dir_ids = self._dir_ids
+        return lambda i: dir_ids[i] in ids
+
+
+# --- Snapshots ----------------------------------------------------------------------------------
+#
+# A snapshot file is an 8-byte magic, the length of a JSON metadata block, the metadata, and then
+# 8-byte aligned sections (offsets in the metadata are relative to the first section):
+#   paths          full paths sorted case-insensitively, UTF-8 and front-coded in blocks: each entry
+#                  is (shared prefix length, suffix length) as two uint16 and the suffix bytes;
+#                  the first entry of a block shares nothing, so any block decodes on its own
+#   blocks         uint64 offset of each block in 'paths'
+#   sizes, created, modified, accessed, changed
+#                  uint64 columns (FILETIME ticks for dates) in path order
+#   attrs          uint32 attribute bits in path order
+#   name_index     uint32 record numbers sorted by lowercase file name
+#   ext_index      uint32 record numbers grouped by lowercase extension (ranges in the metadata)
+#   size_index, modified_index
+#                  uint32 record numbers sorted by size and by modified date
+
+_SNAPSHOT_MAGIC = b'EVSNAP\x00\x01'
+_SNAPSHOT_HEADER = struct.Struct('<8sQ')
+_SNAPSHOT_ENTRY = struct.Struct('<HH')
+# (section, ColumnarResult column, array typecode)
+_SNAPSHOT_COLUMNS: Final[Tuple[Tuple[str, str, str], ...]] = (
+    ('sizes', 'size', 'Q'),
+    ('created', 'created_time', 'Q'),
+    ('modified', 'modified_time', 'Q'),
+    ('accessed', 'accessed_time', 'Q'),
+    ('changed', 'recently_changed', 'Q'),
+    ('attrs', 'attributes', 'I'),
+)
+SNAPSHOT_FLAGS: Final[Request] = (
+    Request.FULL_PATH_AND_FILE_NAME | Request.SIZE | Request.DATE_CREATED | Request.DATE_MODIFIED
+    | Request.DATE_ACCESSED | Request.DATE_RECENTLY_CHANGED | Request.ATTRIBUTES
+)
+_DRIVE_PREFIX = re.compile(r'[a-z]:\\', re.IGNORECASE)
+_LAST_CHAR = '\U0010ffff'
+
+
+def _align8(n: int) -> int:
+    return (n + 7) & ~7
+
+
+class Snapshot(_RecordBackend):
+    """
+    A read-only, memory-mapped snapshot of a result set, written by Client.save_snapshot().
+
+    A Snapshot is an EverythingBackend, so the whole Client API works on it offline and on any OS::
+
+        with Client(dll=Snapshot('share.evsnap')) as client:
+            for item in client.search('parent:D:\\\\Projects ext:py size:>1mb'):
+                ...
+
+    Opening a snapshot only maps the file; columns are read in place. Queries use the subset of
+    Everything syntax described in _QueryCompiler. Path prefixes ('D:\\\\Projects\\\\'), parent:,
+    ext:, name prefixes ('report*'), size: and dm: ranges are answered from indexes when the query
+    is a plain AND of terms; other terms are evaluated over the candidates or the whole snapshot.
+    """
+
+    # Decoded path blocks kept for random access (results are rarely in path order).
+    BLOCK_CACHE: Final[int] = 4096
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = str(path)
+        self.queries = 0
+        self._file = open(self.path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"'{self.path}' is empty, not a snapshot")
+        self._views: List[memoryview] = []
+        try:
+            self._load()
+        except Exception:
+            self.close()
+            raise
+        self._decoded = functools.lru_cache(maxsize=self.BLOCK_CACHE)(self._decode_block)
+        self.Everything_Reset()
+
+    def _load(self) -> None:
+        magic, meta_length = _SNAPSHOT_HEADER.unpack_from(self._mmap, 0)
+        if magic != _SNAPSHOT_MAGIC:
+            raise ValueError(f"'{self.path}' is not a snapshot")
+        meta_start = _SNAPSHOT_HEADER.size
+        self.metadata: Dict[str, Any] = json.loads(self._mmap[meta_start:meta_start + meta_length])
+        if self.metadata['byteorder'] != sys.byteorder:
+            raise ValueError(f"'{self.path}' was written on a {self.metadata['byteorder']}-endian machine")
+        self.count: int = self.metadata['count']
+        self.version = tuple(self.metadata['version'])
+        self.block_size: int = self.metadata['block_size']
+        self.sep: str = self.metadata.get('sep', '\\')
+        self._extensions: Dict[str, List[int]] = self.metadata['extensions']
+
+        view = memoryview(self._mmap)
+        self._views.append(view)
+        data_start = _align8(meta_start + meta_length)
+
+        def section(name: str, typecode: Optional[str] = None) -> memoryview:
+            offset, length = self.metadata['sections'][name]
+            part = view[data_start + offset:data_start + offset + length]
+            self._views.append(part)
+            if typecode is not None:
+                part = part.cast(typecode)
+                self._views.append(part)
+            return part
+
+        self._paths = section('paths')
+        self._blocks = section('blocks', 'Q')
+        for name, _, typecode in _SNAPSHOT_COLUMNS:
+            setattr(self, f'_{name}', section(name, typecode))
+        self._name_index = section('name_index', 'I')
+        self._ext_index = section('ext_index', 'I')
+        self._size_index = section('size_index', 'I')
+        self._modified_index = section('modified_index', 'I')
+
+    def close(self) -> None:
+        """Releases the mapping. The snapshot (and clients using it) cannot be queried afterwards."""
+        self._decoded.cache_clear()
+        for view in reversed(self._views):
+            view.release()
+        self._views.clear()
+        if not self._mmap.closed:
+            self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @staticmethod
+    def write(path: Union[str, Path], result: ColumnarResult,
+              version: Tuple[int, int, int, int] = (0, 0, 0, 0), block_size: int = 16, sep: str = '\\') -> int:
         """
-        Performs a search query and yields results one by one.
+        Writes a snapshot file from a ColumnarResult holding at least FULL_PATH_AND_FILE_NAME.
+        Missing columns of SNAPSHOT_FLAGS are stored as zeros.
 
-        :param keywords: Search query, supports Everything search syntax.
-        :param match_path: Match path instead of just the filename.
-        :param match_case: Case-sensitive search.
-        :param whole_word: Match whole words only.
-        :param regex: Enable regular expression syntax.
-        :param offset: The zero-based index of the first result to return.
-        :param limit: The maximum number of results to return. -1 means all results.
-        :param flags: A Request bitmask specifying which fields to retrieve.
-        :param sort: A Sort enum member specifying the sort order.
-        :return: An iterator yielding SearchResult objects.
+        :param version: The Everything version reported by the snapshot.
+        :param block_size: Paths per front-coded block; larger blocks are smaller but slower to seek.
+        :param sep: The path separator of the full paths (os.sep for a DirectoryBackend).
+        :return: The size of the file in bytes.
         """
-        self._ensure_connected()
+        paths = list(result.columns['full_path'])
+        count = len(paths)
+        folded = [p.lower() for p in paths]
+        order = sorted(range(count), key=folded.__getitem__)
 
-        self._setup_query(keywords, match_path, match_case, whole_word, regex, offset, limit, flags, sort)
-        query_successful = self.dll.Everything_QueryW(True)
-        if not query_successful:
-            self._check_for_errors()
+        encoded = bytearray()
+        blocks = array('Q')
+        previous = b''
+        for n, i in enumerate(order):
+            current = paths[i].encode('utf-8')
+            if n % block_size == 0:
+                blocks.append(len(encoded))
+                shared = 0
+            else:
+                shared = len(os.path.commonprefix((previous, current)))
+            encoded += _SNAPSHOT_ENTRY.pack(shared, len(current) - shared)
+            encoded += current[shared:]
+            previous = current
 
-        num_results = self.dll.Everything_GetNumResults()
+        sections: Dict[str, Union[bytes, bytearray, array]] = {'paths': encoded, 'blocks': blocks}
+        zeros = array('Q', bytes(8 * count))
+        for name, key, typecode in _SNAPSHOT_COLUMNS:
+            column = result.columns.get(key, zeros)
+            sections[name] = array(typecode, (column[i] for i in order))
+        attrs = sections['attrs']
+        names = [folded[i].rpartition(sep)[2] for i in order]
+        sections['name_index'] = array('I', sorted(range(count), key=names.__getitem__))
 
-        active_getters = {
-            key: func
-            for flag, (key, func) in self._request_func_map.items()
-            if flag in flags
-        }
+        groups: Dict[str, List[int]] = {}
+        for n, name in enumerate(names):
+            stem, dot, ext = name.rpartition('.')
+            groups.setdefault(ext if dot and not attrs[n] & _DIRECTORY_BIT else '', []).append(n)
+        ext_index = array('I')
+        extensions = {}
+        for ext in sorted(groups):
+            extensions[ext] = [len(ext_index), len(groups[ext])]
+            ext_index.extend(groups[ext])
+        sections['ext_index'] = ext_index
+        sections['size_index'] = array('I', sorted(range(count), key=sections['sizes'].__getitem__))
+        sections['modified_index'] = array('I', sorted(range(count), key=sections['modified'].__getitem__))
 
-        for i in range(num_results):
-            result_data = {key: getter(i) for key, getter in active_getters.items()}
-            yield SearchResult(**result_data)
+        layout = {}
+        offset = 0
+        for name, data in sections.items():
+            length = len(data) * (data.itemsize if isinstance(data, array) else 1)
+            layout[name] = [offset, length]
+            offset = _align8(offset + length)
+        metadata = json.dumps({
+            'count': count,
+            'block_size': block_size,
+            'sep': sep,
+            'byteorder': sys.byteorder,
+            'version': list(version),
+            'created': int(time.time() * WINDOWS_TICKS + WINDOWS_TICKS_TO_POSIX_EPOCH),
+            'extensions': extensions,
+            'sections': layout,
+        }).encode('utf-8')
 
-    def exit(self) -> None:
-        """Requests the Everything service to exit."""
-        self._ensure_connected()
-        self.dll.Everything_Exit()
+        with open(path, 'wb') as output:
+            output.write(_SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, len(metadata)))
+            output.write(metadata)
+            for name, data in sections.items():
+                output.write(bytes(_align8(output.tell()) - output.tell()))
+                output.write(data)
+            return output.tell()
+
+    # Record accessors.
+
+    def _decode_block(self, block: int) -> List[str]:
+        start = self._blocks[block]
+        end = self._blocks[block + 1] if block + 1 < len(self._blocks) else len(self._paths)
+        data = self._paths[start:end].tobytes()
+        unpack = _SNAPSHOT_ENTRY.unpack_from
+        paths = []
+        previous = b''
+        pos = 0
+        while pos < len(data):
+            shared, length = unpack(data, pos)
+            pos += 4
+            previous = previous[:shared] + data[pos:pos + length]
+            pos += length
+            paths.append(previous.decode('utf-8'))
+        return paths
+
+    def _full_path(self, i: int) -> str:
+        block, n = divmod(i, self.block_size)
+        return self._decoded(block)[n]
+
+    def _name(self, i: int) -> str:
+        return self._full_path(i).rpartition(self.sep)[2]
+
+    def _path(self, i: int) -> str:
+        return self._full_path(i).rpartition(self.sep)[0]
+
+    # Index lookups.
+
+    def _prefix_range(self, prefix: str) -> range:
+        """The records whose lowercase full path starts with a lowercase prefix."""
+        key = lambda i: self._full_path(i).lower()
+        records = range(self.count)
+        return range(bisect.bisect_left(records, prefix, key=key),
+                      bisect.bisect_left(records, prefix + _LAST_CHAR, key=key))
+
+    def _index_range(self, index: memoryview, column: memoryview, low: int, high: int) -> memoryview:
+        key = column.__getitem__
+        return index[bisect.bisect_left(index, low, key=key):bisect.bisect_left(index, high, key=key)]
+
+    def _plan_term(self, token: str) -> Optional[Tuple[int, Callable[[], Iterable[int]]]]:
+        """Returns (candidate count, candidate producer) for a term an index can answer."""
+        modifier, colon, value = token.partition(':')
+        name = modifier.lower()
+        if _DRIVE_PREFIX.match(token.replace('"', '')):
+            text = token.replace('"', '')
+            if '*' in text or '?' in text:
+                return None
+            records = self._prefix_range(text.lower())
+            return len(records), lambda: records
+        if not colon:
+            text = token.replace('"', '')
+            wildcard = min((text.find(c) for c in '*?' if c in text), default=-1)
+            if wildcard <= 0 or self._match_path or self.sep in text:
+                return None
+            prefix = text[:wildcard].lower()
+            key = lambda i: self._name(i).lower()
+            index = self._name_index
+            matches = index[bisect.bisect_left(index, prefix, key=key):
+                            bisect.bisect_left(index, prefix + _LAST_CHAR, key=key)]
+            return len(matches), lambda: sorted(matches)
+        value = value.replace('"', '')
+        if name == 'parent' and value:
+            records = self._prefix_range(value.rstrip(self.sep).lower() + self.sep)
+            return len(records), lambda: records
+        if name == 'ext':
+            spans = [self._extensions[ext] for ext in {e.lstrip('.').lower() for e in value.split(';') if e}
+                     if ext in self._extensions]
+            index = self._ext_index
+            return (sum(length for _, length in spans),
+                    lambda: sorted(itertools.chain.from_iterable(index[start:start + length]
+                                                                 for start, length in spans)))
+        if name == 'size':
+            low, high = _range_bounds(value.lower(), lambda text: (_parse_size(text), _parse_size(text) + 1))
+            matches = self._index_range(self._size_index, self._sizes, low, high)
+            return len(matches), lambda: sorted(matches)
+        if name in ('dm', 'datemodified'):
+            low, high = _range_bounds(value, _parse_date_range)
+            matches = self._index_range(self._modified_index, self._modified, low, high)
+            return len(matches), lambda: sorted(matches)
+        return None
+
+    def _candidates(self, search: str) -> Optional[Iterable[int]]:
+        tokens = [t for t in _QUERY_TOKEN.findall(search) if t.strip()]
+        if any(t in ('|', '!', '<') or t.endswith('>') for t in tokens):
+            return None
+        best = None
+        for token in tokens:
+            try:
+                plan = self._plan_term(token)
+            except (ValueError, KeyError):
+                return None  # Let the query compiler report the error.
+            if plan is not None and (best is None or plan[0] < best[0]):
+                best = plan
+        return best[1]() if best is not None else None
+
+
+# --- Query daemon -------------------------------------------------------------------------------
+#
+# Frames are a 9-byte header (payload length, request id, frame kind) followed by the payload.
+# The high bit of the kind selects the payload codec (JSON, or msgpack if installed); responses use
+# the codec of their request. Rows travel as arrays of the raw LazySearchResult fields for the
+# request's Request mask (dates as FILETIME ticks, attributes as bits), so they are never decoded
+# on the server.
+
+_FRAME_HEADER = struct.Struct('!IIB')
+_FRAME_REQUEST, _FRAME_HEADER_INFO, _FRAME_ROWS, _FRAME_END, _FRAME_RESULT, _FRAME_ERROR, _FRAME_CANCEL = range(1, 8)
+_FRAME_MSGPACK = 0x80
+_MAX_FRAME = 64 * 2 ** 20
+
+# Client methods the daemon serves: streamed searches and single-value calls.
+_DAEMON_STREAM_OPS: Final[frozenset[str]] = frozenset({
+    'search', 'search_stream', 'search_in_located', 'search_folder', 'search_ext',
+    'search_audio', 'search_video', 'search_image', 'search_doc',
+})
+_DAEMON_VALUE_OPS: Final[frozenset[str]] = frozenset({'version', 'classify', 'count'})
+
+
+class DaemonError(Exception):
+    """An error raised on the daemon while serving a request."""
+
+    def __init__(self, remote_type: str, message: str):
+        self.remote_type = remote_type
+        super().__init__(f"[{remote_type}] {message}")
+
+
+def _encode_payload(value, use_msgpack: bool) -> bytes:
+    if use_msgpack:
+        import msgpack
+        return msgpack.packb(value)
+    return json.dumps(value, separators=(',', ':')).encode()
+
+
+def _decode_payload(payload: bytes, use_msgpack: bool):
+    if use_msgpack:
+        import msgpack
+        return msgpack.unpackb(payload)
+    return json.loads(payload)
+
+
+def _read_frame(rfile) -> Optional[Tuple[int, int, bool, bytes]]:
+    """Reads one frame as (kind, request id, msgpack?, payload), or None at end of stream."""
+    header = rfile.read(_FRAME_HEADER.size)
+    if len(header) < _FRAME_HEADER.size:
+        return None
+    length, request_id, kind = _FRAME_HEADER.unpack(header)
+    if length > _MAX_FRAME:
+        raise ValueError(f"Frame of {length} bytes exceeds the {_MAX_FRAME} byte limit")
+    payload = rfile.read(length)
+    if len(payload) < length:
+        return None
+    return kind & ~_FRAME_MSGPACK, request_id, bool(kind & _FRAME_MSGPACK), payload
+
+
+def _pack_frame(kind: int, request_id: int, value, use_msgpack: bool) -> bytes:
+    payload = _encode_payload(value, use_msgpack)
+    if use_msgpack:
+        kind |= _FRAME_MSGPACK
+    return _FRAME_HEADER.pack(len(payload), request_id, kind) + payload
+
+
+def _parse_address(address: str | Tuple[str, int]) -> Tuple[int, object]:
+    """Parses 'unix:/path', 'host:port' or a (host, port) tuple into (family, address)."""
+    if isinstance(address, tuple):
+        return socket.AF_INET, address
+    if address.startswith('unix:'):
+        return socket.AF_UNIX, address[len('unix:'):]
+    host, _, port = address.rpartition(':')
+    return socket.AF_INET, (host or '127.0.0.1', int(port))
+
+
+@dataclass(slots=True)
+class ServerStats:
+    """Counters reported by the daemon's 'stats' op."""
+    started: float = field(default_factory=time.time)
+    connections_total: int = 0
+    connections_open: int = 0
+    requests_total: int = 0
+    requests_in_flight: int = 0
+    requests_failed: int = 0
+    requests_cancelled: int = 0
+    rows_sent: int = 0
+    bytes_sent: int = 0
+    ops: Counter = field(default_factory=Counter)
+
+    def snapshot(self) -> dict:
+        data = {name: getattr(self, name) for name in self.__slots__ if name != 'ops'}
+        data['uptime'] = time.time() - self.started
+        data['ops'] = dict(self.ops)
+        return data
+
+
+class _DaemonHandler(socketserver.StreamRequestHandler):
+    """Serves one connection: requests are read continuously and run concurrently (pipelining)."""
+
+    def setup(self):
+        super().setup()
+        self.query_server: QueryServer = self.server.query_server
+        self.write_lock = threading.Lock()
+        # The pool size is the per-connection concurrency limit; requests beyond it wait in its queue.
+        self.pool = ThreadPoolExecutor(max_workers=self.query_server.max_in_flight,
+                                       thread_name_prefix="everything-daemon-request")
+        self.cancelled: Dict[int, threading.Event] = {}
+
+    def send(self, kind: int, request_id: int, value, use_msgpack: bool) -> None:
+        frame = _pack_frame(kind, request_id, value, use_msgpack)
+        with self.write_lock:
+            self.connection.sendall(frame)
+        self.query_server._count(bytes_sent=len(frame))
+
+    def handle(self):
+        self.query_server._count(connections_total=1, connections_open=1)
+        try:
+            while True:
+                frame = _read_frame(self.rfile)
+                if frame is None:
+                    break
+                kind, request_id, use_msgpack, payload = frame
+                if kind == _FRAME_CANCEL:
+                    event = self.cancelled.get(request_id)
+                    if event is not None:
+                        event.set()
+                    continue
+                # Queued, not run inline, so CANCEL frames keep being read at the limit.
+                self.cancelled[request_id] = threading.Event()
+                self.pool.submit(self.serve_request, request_id, use_msgpack, payload)
+        except (ConnectionError, OSError, ValueError):
+            pass
+        finally:
+            for event in list(self.cancelled.values()):
+                event.set()
+            self.pool.shutdown(wait=True)
+            self.query_server._count(connections_open=-1)
+
+    def serve_request(self, request_id: int, use_msgpack: bool, payload: bytes) -> None:
+        server = self.query_server
+        server._count(requests_total=1, requests_in_flight=1)
+        try:
+            if self.cancelled[request_id].is_set():  # cancelled while queued
+                server._count(requests_cancelled=1)
+                self.send(_FRAME_END, request_id, {'count': 0}, use_msgpack)
+                return
+            request = _decode_payload(payload, use_msgpack)
+            op = request.get('op')
+            server._count(op=op)
+            if op == 'stats':
+                self.send(_FRAME_RESULT, request_id, server.stats(), use_msgpack)
+            elif op in _DAEMON_VALUE_OPS:
+                value = server.executor.call(op, *request.get('args', ()), **(request.get('kwargs') or {})).result()
+                self.send(_FRAME_RESULT, request_id, value, use_msgpack)
+            elif op in _DAEMON_STREAM_OPS:
+                self.stream_rows(request_id, use_msgpack, op, request)
+            else:
+                raise ValueError(f"Unsupported op: {op!r}")
+        except Exception as err:
+            server._count(requests_failed=1)
+            error = {'type': type(err).__name__, 'message': str(err)}
+            if isinstance(err, SDKError):
+                error['code'] = int(err.error_code)
+            try:
+                self.send(_FRAME_ERROR, request_id, error, use_msgpack)
+            except OSError:
+                pass
+        finally:
+            self.cancelled.pop(request_id, None)
+            server._count(requests_in_flight=-1)
+
+    def stream_rows(self, request_id: int, use_msgpack: bool, op: str, request: dict) -> None:
+        server = self.query_server
+        kwargs = dict(request.get('kwargs') or {})
+        flags = Request(kwargs.pop('flags', Request.DEFAULT))
+        if 'sort' in kwargs:
+            kwargs['sort'] = Sort(kwargs['sort'])
+        kwargs.pop('lazy', None)
+        chunk_size = max(1, int(request.get('chunk_size') or server.chunk_size))
+        cancelled = self.cancelled[request_id]
+
+        fields = _lazy_row_type(int(flags))._FIELDS
+        getter = operator.attrgetter(*fields) if len(fields) > 1 else (
+            (lambda row: (getattr(row, fields[0]),)) if fields else (lambda row: ()))
+        self.send(_FRAME_HEADER_INFO, request_id, {'mask': int(flags)}, use_msgpack)
+
+        # Each window is materialized by one executor job and sent afterwards, so a slow reader
+        # holds only its own handler thread and other connections' jobs run between windows.
+        window = max(chunk_size, server.window_size)
+        position, remaining = kwargs.pop('offset', 0), kwargs.pop('limit', -1)
+        count = 0
+        while remaining != 0:
+            size = window if remaining < 0 else min(window, remaining)
+            rows = server.executor.call(op, *request.get('args', ()), offset=position, limit=size,
+                                        flags=flags, lazy=True, **kwargs).result()
+            for start in range(0, len(rows), chunk_size):
+                if cancelled.is_set():
+                    server._count(requests_cancelled=1, rows_sent=count)
+                    self.send(_FRAME_END, request_id, {'count': count}, use_msgpack)
+                    return
+                chunk = [getter(row) for row in rows[start:start + chunk_size]]
+                self.send(_FRAME_ROWS, request_id, chunk, use_msgpack)
+                count += len(chunk)
+            if len(rows) < size:
+                break
+            position += len(rows)
+            if remaining > 0:
+                remaining -= len(rows)
+        server._count(rows_sent=count)
+        self.send(_FRAME_END, request_id, {'count': count}, use_msgpack)
+
+
+class _TCPDaemonServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+if hasattr(socketserver, 'ThreadingUnixStreamServer'):
+    class _UnixDaemonServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+else:  # Python builds without AF_UNIX support
+    class _UnixDaemonServer:
+        def __init__(self, *args, **kwargs):
+            raise OSError("Unix domain sockets are not supported on this platform")
+
+
+class QueryServer:
+    """
+    A long-lived process that owns the Everything SDK and serves queries over a local socket.
+
+    Queries from all connections are serialized through one QueryExecutor. Each connection may
+    pipeline requests; at most `max_in_flight` of them run at once per connection. Searches run as
+    windows of `window_size` rows, each a separate query (rows may shift between windows if the
+    index changes), and are streamed back in chunks of `chunk_size` rows; the executor is free
+    while a window is being sent, so a slow client cannot stall the others. Use DaemonClient to
+    talk to it.
+    """
+
+    def __init__(self, address: str | Tuple[str, int] = '127.0.0.1:0', executor: Optional[QueryExecutor] = None, *,
+                 dll_path: Optional[str | Path] = None, dll: Optional[EverythingBackend] = None,
+                 max_in_flight: int = 4, chunk_size: int = 1000, window_size: int = 50_000):
+        """
+        :param address: 'host:port' (port 0 picks a free port) or 'unix:/path/to/socket'.
+        :param executor: The QueryExecutor to serve from. If omitted, one is created from dll_path / dll.
+        """
+        self.executor = executor if executor is not None else QueryExecutor(dll_path=dll_path, dll=dll)
+        self.max_in_flight = max_in_flight
+        self.chunk_size = chunk_size
+        self.window_size = window_size
+        self._stats = ServerStats()
+        self._stats_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+        family, bind_address = _parse_address(address)
+        server_type = _UnixDaemonServer if family == socket.AF_UNIX else _TCPDaemonServer
+        self._server = server_type(bind_address, _DaemonHandler)
+        self._server.query_server = self
+
+    @property
+    def address(self) -> str:
+        """The bound address in the form accepted by DaemonClient."""
+        bound = self._server.server_address
+        if isinstance(bound, tuple):
+            return f"{bound[0]}:{bound[1]}"
+        return f"unix:{bound}"
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return self._stats.snapshot()
+
+    def _count(self, op: Optional[str] = None, **deltas: int) -> None:
+        with self._stats_lock:
+            for name, delta in deltas.items():
+                setattr(self._stats, name, getattr(self._stats, name) + delta)
+            if op is not None:
+                self._stats.ops[op] += 1
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def start(self) -> 'QueryServer':
+        """Serves on a background thread and returns self."""
+        self._thread = threading.Thread(target=self.serve_forever, name="everything-daemon", daemon=True)
+        self._thread.start()
+        return self
+
+    def shutdown(self) -> None:
+        """Stops serving, closes the socket and the executor."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+        if isinstance(self._server, _UnixDaemonServer):
+            Path(self._server.server_address).unlink(missing_ok=True)
+        self.executor.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+
+class _DaemonConnection:
+    """One socket to the daemon. Not thread-safe; DaemonClient hands each one to a single caller."""
+
+    def __init__(self, address: str | Tuple[str, int], timeout: Optional[float], use_msgpack: bool):
+        family, target = _parse_address(address)
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(target)
+        if family == socket.AF_INET:
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.rfile = self.sock.makefile('rb')
+        self.use_msgpack = use_msgpack
+        self._next_id = 0
+        self.broken = False
+
+    def send_request(self, op: str, args: tuple = (), kwargs: Optional[dict] = None,
+                     chunk_size: Optional[int] = None) -> int:
+        self._next_id += 1
+        request = {'op': op, 'args': list(args), 'kwargs': kwargs or {}}
+        if chunk_size:
+            request['chunk_size'] = chunk_size
+        self.sock.sendall(_pack_frame(_FRAME_REQUEST, self._next_id, request, self.use_msgpack))
+        return self._next_id
+
+    def cancel(self, request_id: int) -> None:
+        self.sock.sendall(_pack_frame(_FRAME_CANCEL, request_id, None, self.use_msgpack))
+
+    def read(self) -> Tuple[int, int, object]:
+        frame = _read_frame(self.rfile)
+        if frame is None:
+            self.broken = True
+            raise ConnectionError("The daemon closed the connection")
+        kind, request_id, use_msgpack, payload = frame
+        return kind, request_id, _decode_payload(payload, use_msgpack)
+
+    def close(self) -> None:
+        self.rfile.close()
+        self.sock.close()
+
+
+def _daemon_error(error: dict) -> Exception:
+    if error.get('type') == 'SDKError' and 'code' in error:
+        return SDKError(EverythingError(error['code']))
+    return DaemonError(error.get('type', 'Exception'), error.get('message', ''))
+
+
+class DaemonClient:
+    """
+    A lightweight client for QueryServer with a pool of reusable connections.
+
+    Mirrors the Client search wrappers and version(); searches stream rows chunk by chunk.
+    Safe to share between threads: each call borrows its own connection from the pool.
+    """
+
+    def __init__(self, address: str | Tuple[str, int], pool_size: int = 4, timeout: Optional[float] = None,
+                 use_msgpack: bool = False, chunk_size: Optional[int] = None):
+        """
+        :param address: 'host:port' or 'unix:/path/to/socket'.
+        :param pool_size: The maximum number of idle connections kept open.
+        :param timeout: Socket timeout in seconds for connecting and reading.
+        :param use_msgpack: Encode frames with msgpack (must be installed) instead of JSON.
+        :param chunk_size: Rows per streamed chunk; defaults to the server's setting.
+        """
+        self.address = address
+        self.timeout = timeout
+        self.use_msgpack = use_msgpack
+        self.chunk_size = chunk_size
+        self._idle: queue.LifoQueue = queue.LifoQueue(maxsize=pool_size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
 
+    def close(self) -> None:
+        """Closes all idle connections."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _acquire(self) -> _DaemonConnection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return _DaemonConnection(self.address, self.timeout, self.use_msgpack)
+
+    def _release(self, conn: _DaemonConnection) -> None:
+        if conn.broken:
+            conn.close()
+            return
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def _call(self, op: str, *args, **kwargs):
+        conn = self._acquire()
+        try:
+            conn.send_request(op, args, kwargs)
+            kind, _, value = conn.read()
+        except BaseException:
+            conn.broken = True
+            raise
+        finally:
+            self._release(conn)
+        if kind == _FRAME_ERROR:
+            raise _daemon_error(value)
+        return value
+
+    def version(self) -> str:
+        return self._call('version')
+
+    def count(self, keywords: str, **kwargs) -> int:
+        """Counts the results of a query on the server (see Client.count)."""
+        return self._call('count', keywords, **kwargs)
+
+    def classify(self, keywords: str = '', groups: Optional[Dict[str, str | Iterable[str]]] = None,
+                 **kwargs) -> Dict[str, int]:
+        """Counts results per extension group on the server (see Client.classify)."""
+        if groups is not None:
+            groups = {name: ext if isinstance(ext, str) else sorted(ext) for name, ext in groups.items()}
+        return self._call('classify', keywords, groups, **kwargs)
+
+    def stats(self) -> dict:
+        """Returns the server's counters (connections, requests, rows and bytes sent, per-op counts)."""
+        return self._call('stats')
+
+    @staticmethod
+    def _encode_kwargs(kwargs: dict) -> Tuple[dict, bool]:
+        kwargs = dict(kwargs)
+        lazy = kwargs.pop('lazy', False)
+        for key in ('flags', 'sort'):
+            if key in kwargs:
+                kwargs[key] = int(kwargs[key])
+        return kwargs, lazy
+
+    def _stream(self, op: str, args: tuple, kwargs: dict) -> Iterator[SearchResult | LazySearchResult]:
+        kwargs, lazy = self._encode_kwargs(kwargs)
+        conn = self._acquire()
+        request_id = None
+        finished = False
+        try:
+            request_id = conn.send_request(op, args, kwargs, self.chunk_size)
+            row_type = None
+            while True:
+                kind, _, value = conn.read()
+                if kind == _FRAME_HEADER_INFO:
+                    row_type = _lazy_row_type(value['mask'])
+                elif kind == _FRAME_ROWS:
+                    for values in value:
+                        row = row_type(*values)
+                        yield row if lazy else row.to_search_result()
+                elif kind == _FRAME_END:
+                    finished = True
+                    return
+                elif kind == _FRAME_ERROR:
+                    finished = True
+                    raise _daemon_error(value)
+        finally:
+            if not finished and not conn.broken and request_id is not None:
+                # Abandoned early: cancel and drain so the connection can be reused.
+                try:
+                    conn.cancel(request_id)
+                    while conn.read()[0] not in (_FRAME_END, _FRAME_ERROR):
+                        pass
+                except (OSError, ConnectionError):
+                    conn.broken = True
+            self._release(conn)
+
+    def pipeline(self, requests: Iterable[Tuple[str, tuple, dict]]) -> List[object]:
+        """
+        Sends several requests on one connection without waiting, then collects their results.
+
+        :param requests: (op, args, kwargs) tuples, e.g. ('search_ext', ('py',), {'limit': 10}).
+        :return: One entry per request: a list of results for searches, a value otherwise,
+                 or the exception raised for that request.
+        """
+        conn = self._acquire()
+        try:
+            pending: Dict[int, Tuple[int, bool]] = {}
+            results: List[object] = []
+            for position, (op, args, kwargs) in enumerate(requests):
+                kwargs, lazy = self._encode_kwargs(kwargs)
+                pending[conn.send_request(op, args, kwargs, self.chunk_size)] = (position, lazy)
+                results.append([])
+            row_types: Dict[int, type] = {}
+            while pending:
+                kind, request_id, value = conn.read()
+                position, lazy = pending[request_id]
+                if kind == _FRAME_HEADER_INFO:
+                    row_types[request_id] = _lazy_row_type(value['mask'])
+                elif kind == _FRAME_ROWS:
+                    row_type = row_types[request_id]
+                    rows = (row_type(*values) for values in value)
+                    results[position].extend(rows if lazy else (row.to_search_result() for row in rows))
+                elif kind in (_FRAME_END, _FRAME_RESULT, _FRAME_ERROR):
+                    if kind == _FRAME_RESULT:
+                        results[position] = value
+                    elif kind == _FRAME_ERROR:
+                        results[position] = _daemon_error(value)
+                    del pending[request_id]
+            return results
+        except BaseException:
+            conn.broken = True
+            raise
+        finally:
+            self._release(conn)
+
+    def search(self, keywords: str, **kwargs) -> Iterator[SearchResult | LazySearchResult]:
+        return self._stream('search', (keywords,), kwargs)
+
+    def search_stream(self, keywords: str, **kwargs) -> Iterator[SearchResult | LazySearchResult]:
+        return self._stream('search_stream', (keywords,), kwargs)
+
     def search_in_located(self, path: str | Path, keywords: str = '', **kwargs) -> Iterator[SearchResult]:
-        return self.search(f'path:"{path}" {keywords}', **kwargs)
+        return self._stream('search_in_located', (str(path), keywords), kwargs)
 
     def search_folder(self, keywords: str = '', **kwargs) -> Iterator[SearchResult]:
-        return self.search(f'folder: {keywords}', **kwargs)
+        return self._stream('search_folder', (keywords,), kwargs)
 
     def search_ext(self, extensions: str | Iterable[str], keywords: str = '', **kwargs) -> Iterator[SearchResult]:
-        if isinstance(extensions, str):
-            ext_str = extensions.lstrip('.')
-        else:
-            ext_str = ";".join(ext.lstrip('.') for ext in extensions)
-        return self.search(f'ext:{ext_str} {keywords}', **kwargs)
+        if not isinstance(extensions, str):
+            extensions = list(extensions)
+        return self._stream('search_ext', (extensions, keywords), kwargs)
 
     def search_audio(self, keywords: str = '', **kwargs) -> Iterator[SearchResult]:
-        return self.search_ext(FILE_TYPE_GROUPS['AUDIO'], keywords, **kwargs)
+        return self._stream('search_audio', (keywords,), kwargs)
 
     def search_video(self, keywords: str = '', **kwargs) -> Iterator[SearchResult]:
-        return self.search_ext(FILE_TYPE_GROUPS['VIDEO'], keywords, **kwargs)
+        return self._stream('search_video', (keywords,), kwargs)
 
     def search_image(self, keywords: str = '', **kwargs) -> Iterator[SearchResult]:
-        return self.search_ext(FILE_TYPE_GROUPS['IMAGE'], keywords, **kwargs)
+        return self._stream('search_image', (keywords,), kwargs)
 
     def search_doc(self, keywords: str = '', **kwargs) -> Iterator[SearchResult]:
-        return self.search_ext(FILE_TYPE_GROUPS['DOC'], keywords, **kwargs)
+        return self._stream('search_doc', (keywords,), kwargs)
+
+
+# --- Federated search ---------------------------------------------------------------------------
+
+# Sort (ascending) -> (fields the merge key reads, merge key over a result row). Strings compare
+# case-insensitively; every shard must sort the same way for the k-way merge to be ordered.
+_MERGE_KEYS: Final[Dict[Sort, Tuple[Request, Callable[[Any], object]]]] = {
+    Sort.NAME_ASCENDING: (Request.FILE_NAME, lambda row: (row.name or '').lower()),
+    Sort.PATH_ASCENDING: (Request.PATH | Request.FILE_NAME,
+                          lambda row: ((row.path or '').lower(), (row.name or '').lower())),
+    Sort.SIZE_ASCENDING: (Request.SIZE, lambda row: row.size or 0),
+    Sort.EXTENSION_ASCENDING: (Request.EXTENSION, lambda row: (row.extension or '').lower()),
+    Sort.TYPE_NAME_ASCENDING: (Request.EXTENSION, lambda row: (row.extension or '').lower()),
+    Sort.DATE_CREATED_ASCENDING: (Request.DATE_CREATED, lambda row: row.created_time or datetime.datetime.min),
+    Sort.DATE_MODIFIED_ASCENDING: (Request.DATE_MODIFIED, lambda row: row.modified_time or datetime.datetime.min),
+    Sort.DATE_ACCESSED_ASCENDING: (Request.DATE_ACCESSED, lambda row: row.accessed_time or datetime.datetime.min),
+    Sort.DATE_RECENTLY_CHANGED_ASCENDING: (Request.DATE_RECENTLY_CHANGED,
+                                           lambda row: row.recently_changed or datetime.datetime.min),
+    Sort.DATE_RUN_ASCENDING: (Request.DATE_RUN, lambda row: row.date_run or datetime.datetime.min),
+    Sort.RUN_COUNT_ASCENDING: (Request.RUN_COUNT, lambda row: row.run_count or 0),
+}
+
+
+@dataclass(frozen=True, slots=True)
+class SourcedResult:
+    """A federated search result tagged with the name of the shard it came from."""
+    source: str
+    result: Union[SearchResult, LazySearchResult]
+
+    def __getattr__(self, name: str):
+        if name in ('source', 'result'):
+            raise AttributeError(name)
+        return getattr(self.result, name)
+
+
+@dataclass(slots=True)
+class ShardStatus:
+    """How one shard of a federated search ended: rows delivered, seconds taken, timeout or error."""
+    rows: int = 0
+    elapsed: float = 0.0
+    done: bool = False
+    timed_out: bool = False
+    error: Optional[BaseException] = None
+
+
+class FederatedResults:
+    """
+    An iterator over the merged results of FederatedClient.search().
+
+    `status` maps each shard name to its ShardStatus, filled in as shards finish. Closing the
+    iterator, or exhausting it, stops every shard still producing rows.
+    """
+
+    def __init__(self, merged: Iterator[SourcedResult], status: Dict[str, ShardStatus], cancel: Callable[[], None]):
+        self.status = status
+        self._merged = merged
+        self._cancel = cancel
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> SourcedResult:
+        try:
+            return next(self._merged)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        self._cancel()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def complete(self) -> bool:
+        """Whether every shard has finished without timing out or failing."""
+        return all(s.done and not s.timed_out and s.error is None for s in self.status.values())
+
+
+class FederatedClient:
+    """
+    Searches several Everything instances at once and merges their sorted results.
+
+    Shards are named and may be a Client (wrapped in its own QueryExecutor), a QueryExecutor, an
+    EverythingBackend such as SyntheticBackend or Snapshot, a DaemonClient, or any object with a
+    thread-safe search(keywords, **kwargs) method::
+
+        with FederatedClient({'local': Client(), 'nas': DaemonClient('nas:8765')}, timeout=2.0) as fed:
+            for item in fed.search('ext:iso', sort=Sort.SIZE_DESCENDING, limit=20):
+                print(item.source, item.full_path)
+
+    Each search runs on every shard in parallel, one producer thread per shard, and the streams
+    are k-way merged by the requested Sort. The Everything SDK is process-global, so use at most
+    one local Client and reach other machines through QueryServer daemons.
+    """
+
+    def __init__(self, shards: Dict[str, Any], timeout: Optional[float] = None,
+                 batch_size: int = 1000, max_batches: int = 8):
+        """
+        :param shards: Shard name -> shard.
+        :param timeout: Default seconds a shard may take to deliver all its rows before it is dropped.
+        :param batch_size: Rows per batch passed from a shard's producer to the merge.
+        :param max_batches: Batches buffered per shard before its producer pauses.
+        """
+        if not shards:
+            raise ValueError("FederatedClient needs at least one shard")
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.shards: Dict[str, Any] = {}
+        self._owned: List[QueryExecutor] = []
+        for name, shard in shards.items():
+            if isinstance(shard, Client):
+                shard = QueryExecutor(shard)
+                self._owned.append(shard)
+            elif hasattr(shard, 'Everything_QueryW'):
+                shard = QueryExecutor(dll=shard)
+                self._owned.append(shard)
+            self.shards[name] = shard
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self) -> None:
+        """Closes the executors created for Client and backend shards."""
+        for executor in self._owned:
+            executor.close()
+        self._owned.clear()
+
+    def _open(self, shard, keywords: str, kwargs: dict) -> Iterator[SearchResult | LazySearchResult]:
+        if isinstance(shard, QueryExecutor):
+            return shard.stream(keywords, batch_size=self.batch_size, max_batches=self.max_batches, **kwargs)
+        return shard.search(keywords, **kwargs)
+
+    def _produce(self, shard, keywords: str, kwargs: dict, channel: queue.Queue, cancelled: threading.Event) -> None:
+        def offer(item) -> bool:
+            while not cancelled.is_set():
+                try:
+                    channel.put(item, timeout=0.05)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        rows = None
+        try:
+            rows = self._open(shard, keywords, kwargs)
+            batch: List[object] = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= self.batch_size:
+                    if not offer(batch):
+                        return
+                    batch = []
+            if batch and not offer(batch):
+                return
+            offer(_END_OF_STREAM)
+        except BaseException as err:
+            offer(err)
+        finally:
+            close = getattr(rows, 'close', None)
+            if close is not None:
+                close()
+
+    @staticmethod
+    def _drain(name: str, channel: queue.Queue, cancelled: threading.Event, status: ShardStatus,
+               start: float, deadline: Optional[float]) -> Iterator[SourcedResult]:
+        try:
+            while True:
+                try:
+                    if deadline is None:
+                        item = channel.get()
+                    else:
+                        item = channel.get(timeout=max(0.0, deadline - time.perf_counter()))
+                except queue.Empty:
+                    status.timed_out = True
+                    return
+                if item is _END_OF_STREAM:
+                    return
+                if isinstance(item, BaseException):
+                    status.error = item
+                    return
+                status.rows += len(item)
+                for row in item:
+                    yield SourcedResult(name, row)
+        finally:
+            cancelled.set()
+            status.done = True
+            status.elapsed = time.perf_counter() - start
+
+    def search(
+            self,
+            keywords: str,
+            match_path: bool = False,
+            match_case: bool = False,
+            whole_word: bool = False,
+            regex: bool = False,
+            offset: int = 0,
+            limit: int = -1,
+            flags: Request = Request.DEFAULT,
+            sort: Sort = Sort.NAME_ASCENDING,
+            lazy: bool = False,
+            timeout: Optional[float] = None
+    ) -> FederatedResults:
+        """
+        Runs a search on every shard and merges the results in `sort` order.
+
+        Each shard is asked for the first offset + limit rows, since the global window may come
+        from any one of them; `offset` and `limit` are then applied to the merged stream. The
+        fields the merge key reads are added to `flags`. A shard that has not delivered all its
+        rows within `timeout` seconds is dropped and the merge continues with the others; check
+        `status` or `complete` on the returned iterator.
+
+        :param timeout: Seconds per shard; defaults to the client's timeout (None waits forever).
+        :return: A FederatedResults iterator of SourcedResult.
+        """
+        ascending = Sort(sort - (sort + 1) % 2)
+        if ascending not in _MERGE_KEYS:
+            raise ValueError(f"Results cannot be merged by {sort.name}")
+        merge_flags, key = _MERGE_KEYS[ascending]
+        kwargs = dict(
+            match_path=match_path, match_case=match_case, whole_word=whole_word, regex=regex,
+            offset=0, limit=offset + limit if limit >= 0 else -1,
+            flags=flags | merge_flags, sort=sort, lazy=lazy,
+        )
+        timeout = self.timeout if timeout is None else timeout
+        start = time.perf_counter()
+        deadline = start + timeout if timeout is not None else None
+
+        status: Dict[str, ShardStatus] = {}
+        cancels: List[threading.Event] = []
+        streams = []
+        for name, shard in self.shards.items():
+            channel: queue.Queue = queue.Queue(maxsize=self.max_batches)
+            cancelled = threading.Event()
+            threading.Thread(
+                target=self._produce, args=(shard, keywords, kwargs, channel, cancelled),
+                name=f"everything-shard-{name}", daemon=True,
+            ).start()
+            status[name] = ShardStatus()
+            cancels.append(cancelled)
+            streams.append(self._drain(name, channel, cancelled, status[name], start, deadline))
+
+        def cancel() -> None:
+            for stream in streams:
+                stream.close()
+            for cancelled in cancels:
+                cancelled.set()
+
+        merged = heapq.merge(*streams, key=lambda item: key(item.result), reverse=sort != ascending)
+        window = itertools.islice(merged, offset, offset + limit if limit >= 0 else None)
+        return FederatedResults(window, status, cancel)
+
+    def count(self, keywords: str, timeout: Optional[float] = None) -> Dict[str, Optional[int]]:
+        """
+        Counts the results of a query on every shard in parallel.
+
+        :return: Shard name -> count, or None for shards that failed or timed out.
+        """
+        timeout = self.timeout if timeout is None else timeout
+
+        def count(shard) -> int:
+            if isinstance(shard, QueryExecutor):
+                return shard.call('count', keywords).result()
+            return shard.count(keywords)
+
+        pool = ThreadPoolExecutor(max_workers=len(self.shards), thread_name_prefix="everything-shard")
+        futures = {name: pool.submit(count, shard) for name, shard in self.shards.items()}
+        done, _ = wait(futures.values(), timeout=timeout)
+        # Do not wait for shards that timed out.
+        pool.shutdown(wait=False)
+        return {
+            name: future.result() if future in done and future.exception() is None else None
+            for name, future in futures.items()
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="everything_tool", description="Everything SDK tools.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="Serve queries over a local socket.")
+    serve.add_argument("--address", default="127.0.0.1:8765", help="'host:port' or 'unix:/path/to/socket'")
+    serve.add_argument("--dll", default=None, help="Path to Everything64.dll")
+    serve.add_argument("--max-in-flight", type=int, default=4, help="Concurrent requests per connection")
+    serve.add_argument("--chunk-size", type=int, default=1000, help="Rows per streamed chunk")
+    serve.add_argument("--synthetic", type=int, metavar="N", default=None,
+                       help="Serve a SyntheticBackend of N records instead of Everything (for testing)")
+    args = parser.parse_args(argv)
+
+    backend = SyntheticBackend(args.synthetic) if args.synthetic is not None else None
+    server = QueryServer(args.address, dll_path=args.dll, dll=backend, max_in_flight=args.max_in_flight,
+                         chunk_size=args.chunk_size)
+    print(f"Serving Everything queries on {server.address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,19 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import everything_tool as et  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def backend() -> et.SyntheticBackend:
+    return et.SyntheticBackend(20_000, seed=7)
+
+
+@pytest.fixture
+def client(backend):
+    with et.Client(dll=backend) as client:
+        yield client
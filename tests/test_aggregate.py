@@ -0,0 +1,50 @@
+from collections import Counter
+
+import pytest
+
+import everything_tool as et
+
+FLAGS = et.Request.FULL_PATH_AND_FILE_NAME | et.Request.PATH | et.Request.EXTENSION | et.Request.SIZE \
+    | et.Request.DATE_MODIFIED
+
+
+@pytest.mark.parametrize('keywords', ['', 'data', 'ext:py', 'nothing-matches-this'])
+def test_count_matches_search(client, keywords):
+    assert client.count(keywords) == len(list(client.search(keywords)))
+
+
+def brute_force(rows, key):
+    counts, sizes = Counter(), Counter()
+    for row in rows:
+        counts[key(row)] += 1
+        sizes[key(row)] += row.size
+    return {group: {'count': counts[group], 'size': sizes[group]} for group in counts}
+
+
+@pytest.mark.parametrize('by, key', [
+    ('extension', lambda row: (row.extension or '').lower()),
+    ('parent_dir', lambda row: row.path),
+    ('month', lambda row: row.modified_time.astimezone().strftime('%Y-%m')),
+    (None, lambda row: None),
+])
+def test_aggregate_matches_brute_force(client, by, key):
+    rows = list(client.search('report', flags=FLAGS))
+    result = client.aggregate('report', by=by)
+    assert result == brute_force(rows, key)
+    counts = [entry['count'] for entry in result.values()]
+    assert counts == sorted(counts, reverse=True)
+
+
+def test_single_metrics(client):
+    full = client.aggregate('', by='extension')
+    sizes = client.aggregate('', by='extension', metrics=('size',))
+    assert sizes == {group: {'size': entry['size']} for group, entry in full.items()}
+    assert list(sizes.values()) == sorted(sizes.values(), key=lambda entry: -entry['size'])
+    assert client.aggregate('', by='extension', metrics=['count']) == \
+        {group: {'count': entry['count']} for group, entry in full.items()}
+
+
+def test_invalid_arguments(client):
+    for kwargs in ({'metrics': ()}, {'metrics': ('mean',)}, {'by': 'owner'}, {'batch_size': 0}):
+        with pytest.raises(ValueError):
+            client.aggregate('', **kwargs)
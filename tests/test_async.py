@@ -0,0 +1,132 @@
+import asyncio
+import time
+
+import pytest
+
+import everything_tool as et
+
+
+class CountingBackend(et.SyntheticBackend):
+    """Counts extracted rows and can make every query slow."""
+
+    def __init__(self, *args, delay: float = 0.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.delay = delay
+        self.extracted = 0
+
+    def Everything_QueryW(self, wait: bool) -> bool:
+        time.sleep(self.delay)
+        return super().Everything_QueryW(wait)
+
+    def Everything_GetResultFullPathNameW(self, index, buffer, size) -> None:
+        self.extracted += 1
+        super().Everything_GetResultFullPathNameW(index, buffer, size)
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, 30))
+
+
+def test_batches_match_sync_search():
+    async def main():
+        async with et.AsyncClient(dll=et.SyntheticBackend(5_000, seed=1)) as client:
+            batches = [batch async for batch in client.search('data', batch_size=100)]
+            expected = await client.run(lambda c: c.search('data'))
+        return batches, expected
+
+    batches, expected = run(main())
+    assert all(len(batch) == 100 for batch in batches[:-1])
+    assert 0 < len(batches[-1]) <= 100
+    assert [row for batch in batches for row in batch] == expected
+
+
+def test_rows_flattens_batches():
+    async def main():
+        async with et.AsyncClient(dll=et.SyntheticBackend(2_000, seed=2)) as client:
+            rows = [row async for row in client.search('', batch_size=64).rows()]
+            return rows, await client.run(lambda c: c.search(''))
+
+    rows, expected = run(main())
+    assert rows == expected
+
+
+def test_worker_pauses_while_the_queue_is_full():
+    backend = CountingBackend(20_000, seed=3)
+
+    async def main():
+        async with et.AsyncClient(dll=backend) as client:
+            stream = client.search('', batch_size=50, max_batches=2)
+            await stream.__anext__()
+            await asyncio.sleep(0.3)
+            buffered = backend.extracted
+            await stream.aclose()
+            return buffered
+
+    buffered = run(main())
+    # One consumed batch, up to max_batches queued and one being offered.
+    assert buffered <= 50 * (1 + 2 + 1)
+
+
+def test_timeout_abandons_the_query_and_frees_the_worker():
+    backend = CountingBackend(5_000, seed=4, delay=0.5)
+
+    async def main():
+        async with et.AsyncClient(dll=backend) as client:
+            with pytest.raises(TimeoutError):
+                async for _ in client.search('', timeout=0.1):
+                    pass
+            backend.delay = 0.0
+            return await asyncio.wait_for(client.count('data'), 5)
+
+    assert run(main()) > 0
+
+
+def test_aclose_releases_the_executor():
+    backend = CountingBackend(20_000, seed=5)
+
+    async def main():
+        async with et.AsyncClient(dll=backend) as client:
+            stream = client.search('', batch_size=10, max_batches=1)
+            await stream.__anext__()
+            await stream.aclose()
+            with pytest.raises(StopAsyncIteration):
+                await stream.__anext__()
+            return await asyncio.wait_for(client.count('data'), 5)
+
+    assert run(main()) > 0
+
+
+def test_cancelling_the_consumer_releases_the_executor():
+    backend = CountingBackend(20_000, seed=6)
+
+    async def main():
+        async with et.AsyncClient(dll=backend) as client:
+            started = asyncio.Event()
+
+            async def consume():
+                async for _ in client.search('', batch_size=10, max_batches=1):
+                    started.set()
+                    await asyncio.sleep(10)
+
+            task = asyncio.create_task(consume())
+            await started.wait()
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            return await asyncio.wait_for(client.count('data'), 5)
+
+    assert run(main()) > 0
+
+
+def test_slow_consumer_receives_every_batch():
+    async def main():
+        async with et.AsyncClient(dll=et.SyntheticBackend(3_000, seed=6)) as client:
+            rows = []
+            # Each pause keeps the queue full for longer than the worker's 50 ms put timeout.
+            async for batch in client.search('', batch_size=500, max_batches=1):
+                rows.extend(batch)
+                await asyncio.sleep(0.12)
+            return rows, await client.run(lambda c: c.search(''))
+
+    rows, expected = run(main())
+    assert rows == expected
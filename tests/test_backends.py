@@ -0,0 +1,90 @@
+import os
+import re
+
+import pytest
+
+import everything_tool as et
+
+FLAGS = (et.Request.FULL_PATH_AND_FILE_NAME | et.Request.FILE_NAME | et.Request.SIZE | et.Request.ATTRIBUTES
+         | et.Request.DATE_MODIFIED)
+
+
+def records(backend):
+    return [(backend._full_path(i), backend._sizes[i], backend._modified[i], backend._attrs[i])
+            for i in range(backend.count)]
+
+
+def test_synthetic_records_are_deterministic():
+    first, second = et.SyntheticBackend(3_000, seed=5), et.SyntheticBackend(3_000, seed=5)
+    assert records(first) == records(second)
+    assert records(first) != records(et.SyntheticBackend(3_000, seed=6))
+    with et.Client(dll=first) as a, et.Client(dll=second) as b:
+        assert list(a.search('report', flags=FLAGS)) == list(b.search('report', flags=FLAGS))
+
+
+def brute_force(backend, predicate):
+    return {backend._full_path(i) for i in range(backend.count) if predicate(backend, i)}
+
+
+def name(b, i):
+    return b._name(i).lower()
+
+
+QUERIES = {
+    'report': lambda b, i: 'report' in name(b, i),
+    'REPORT 7': lambda b, i: 'report' in name(b, i) and '7' in name(b, i),
+    'report | album': lambda b, i: 'report' in name(b, i) or 'album' in name(b, i),
+    'report !ext:py': lambda b, i: 'report' in name(b, i) and b._extension(i) != 'py',
+    '<report | album> ext:py;txt': lambda b, i: ('report' in name(b, i) or 'album' in name(b, i))
+                                                and b._extension(i) in ('py', 'txt'),
+    'report_1*.log': lambda b, i: name(b, i).startswith('report_1') and name(b, i).endswith('.log'),
+    'data_1????.py': lambda b, i: re.fullmatch(r'data_1....\.py', name(b, i)) is not None,
+    'folder:report': lambda b, i: b._is_folder(i) and 'report' in name(b, i),
+    'file: size:>1mb': lambda b, i: b._is_file(i) and b._sizes[i] > 1024 * 1024,
+    'size:1kb..4kb ext:txt': lambda b, i: b._is_file(i) and 1024 <= b._sizes[i] < 4097 and b._extension(i) == 'txt',
+    'attrib:H': lambda b, i: b._attrs[i] & et.FileAttribute.HIDDEN.value,
+    'path:\\report': lambda b, i: '\\report' in b._full_path(i).lower(),
+    'regex:^album_\\d+\\.mp3$': lambda b, i: name(b, i).startswith('album_') and name(b, i).endswith('.mp3')
+                                             and name(b, i)[6:-4].isdigit(),
+}
+
+
+@pytest.mark.parametrize('keywords', QUERIES)
+def test_query_syntax_matches_a_brute_force_scan(backend, client, keywords):
+    expected = brute_force(backend, QUERIES[keywords])
+    assert expected
+    assert {row.full_path for row in client.search(keywords, flags=FLAGS)} == expected
+
+
+def test_options_sort_and_window(backend, client):
+    assert not list(client.search('REPORT', match_case=True))
+    stem = next(name(backend, i).partition('.')[0] for i in range(backend.count)
+                if name(backend, i).startswith('report_1'))
+    pattern = re.compile(rf'(?<!\w){stem}(?!\w)')
+    assert {row.full_path for row in client.search(stem, whole_word=True, flags=FLAGS)} == \
+        brute_force(backend, lambda b, i: pattern.search(name(b, i)) is not None)
+    ordered = [row.size for row in client.search('ext:iso', flags=FLAGS, sort=et.Sort.SIZE_DESCENDING)]
+    assert ordered == sorted(ordered, reverse=True)
+    window = list(client.search('ext:iso', flags=FLAGS, sort=et.Sort.SIZE_DESCENDING, offset=3, limit=4))
+    assert [row.size for row in window] == ordered[3:7]
+    with pytest.raises(et.SDKError):
+        list(client.search('<report'))
+
+
+def test_directory_backend_mirrors_the_tree(tmp_path):
+    (tmp_path / 'src' / 'pkg').mkdir(parents=True)
+    (tmp_path / 'src' / 'pkg' / 'mod.py').write_bytes(b'x' * 100)
+    (tmp_path / 'src' / 'README.md').write_bytes(b'y' * 10)
+    (tmp_path / '.hidden').write_bytes(b'')
+    backend = et.DirectoryBackend(tmp_path)
+    assert backend.sep == os.sep and backend.count == 5
+    with et.Client(dll=backend) as client:
+        rows = {row.full_path: row for row in client.search('', flags=FLAGS)}
+        paths = ('src', 'src/pkg', 'src/pkg/mod.py', 'src/README.md', '.hidden')
+        assert set(rows) == {str(tmp_path / path) for path in paths}
+        assert rows[str(tmp_path / 'src' / 'pkg' / 'mod.py')].size == 100
+        assert 'D' in rows[str(tmp_path / 'src')].attributes and 'H' in rows[str(tmp_path / '.hidden')].attributes
+        assert [row.name for row in client.search('ext:py;md', sort=et.Sort.SIZE_DESCENDING, flags=FLAGS)] == \
+            ['mod.py', 'README.md']
+        children = client.search(f'parent:{tmp_path / "src"}', flags=FLAGS)
+        assert sorted(row.name for row in children) == ['README.md', 'pkg']
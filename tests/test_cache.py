@@ -0,0 +1,76 @@
+import everything_tool as et
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def cached_client(ttl=30.0, validate=True):
+    backend = et.SyntheticBackend(5_000, seed=5)
+    client = et.Client(dll=backend)
+    clock = Clock()
+    client.enable_cache(ttl=ttl, validate=validate)._clock = clock
+    return backend, client, clock
+
+
+def test_fresh_hits_skip_the_probe():
+    backend, client, clock = cached_client()
+    with client:
+        first = list(client.search('data'))
+        queries = backend.queries
+        assert list(client.search('data')) == first
+        assert backend.queries == queries
+        assert client.cache.stats.hits == 1
+
+
+def test_stale_entries_are_revalidated_with_a_cheap_probe():
+    backend, client, clock = cached_client()
+    with client:
+        first = list(client.search('data', flags=et.Request.ALL))
+        clock.now = 31
+        queries = backend.queries
+        assert list(client.search('data', flags=et.Request.ALL)) == first
+        assert backend.queries == queries + 1  # the probe only
+        assert backend._max == 1 and backend._sort == et.Sort.DATE_MODIFIED_DESCENDING
+        # The probe restarted the TTL.
+        clock.now = 60
+        list(client.search('data', flags=et.Request.ALL))
+        assert backend.queries == queries + 1
+
+
+def test_changes_are_seen_once_the_ttl_passes():
+    backend, client, clock = cached_client()
+    with client:
+        rows = list(client.search('data', flags=et.Request.ALL))
+        index = next(i for i in range(backend.count) if backend._full_path(i) == rows[0].full_path)
+        backend._modified[index] = backend.NOW_TICKS + 1
+        assert list(client.search('data', flags=et.Request.ALL)) == rows  # still fresh
+        clock.now = 31
+        assert list(client.search('data', flags=et.Request.ALL))[0].modified_time != rows[0].modified_time
+        assert client.cache.stats.invalidations == 1
+
+
+def test_expired_entries_are_dropped_without_validation():
+    backend, client, clock = cached_client(validate=False)
+    with client:
+        list(client.search('data'))
+        clock.now = 31
+        list(client.search('data'))
+        assert client.cache.stats.expirations == 1 and client.cache.stats.misses == 2
+
+
+def test_observers_see_cache_hits():
+    backend, client, clock = cached_client()
+    with client:
+        metrics = client.add_observer(et.MetricsObserver())
+        seen = []
+        client.add_observer(type('Recorder', (et.QueryObserver,), {'on_query': lambda self, stats: seen.append(stats)})())
+        count = len(list(client.search('data')))
+        list(client.search('data'))
+    assert [stats.cached for stats in seen] == [False, True]
+    assert seen[1].rows == count
+    assert metrics.export()['queries'] == 1 and metrics.export()['cache_hits'] == 1
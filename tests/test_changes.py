@@ -0,0 +1,48 @@
+import everything_tool as et
+
+
+def touch(backend, indexes, ticks):
+    for i in indexes:
+        backend._changed[i] = ticks
+    return {backend._full_path(i) for i in indexes}
+
+
+def test_feed_reports_each_change_once_across_ties_and_json_round_trips():
+    backend = et.SyntheticBackend(3_000, seed=9)
+    with et.Client(dll=backend) as client:
+        start = client.changes_since()
+        assert len(start) == 0
+        boundary = start.cursor.ticks + 10
+        first = touch(backend, [5, 17], boundary)
+        changes = client.changes_since(start.cursor, chunk_size=3)
+        assert {row.full_path for row in changes} == first
+        assert changes.cursor.ticks == boundary
+
+        cursor = et.ChangeCursor.from_json(changes.cursor.to_json())
+        assert cursor == changes.cursor
+        # A late arrival sharing the boundary tick is reported; the entries already seen are not.
+        late = touch(backend, [42], boundary)
+        again = client.changes_since(cursor, chunk_size=3)
+        assert {row.full_path for row in again} == late
+        assert len(client.changes_since(again.cursor, chunk_size=3)) == 0
+
+
+def test_rewind_window():
+    backend = et.SyntheticBackend(3_000, seed=9)
+    with et.Client(dll=backend) as client:
+        cursor = client.changes_since().cursor
+        within = touch(backend, [7], cursor.ticks - et.WINDOWS_TICKS)  # 1 s behind the cursor
+        touch(backend, [8], cursor.ticks - 10 * et.WINDOWS_TICKS)  # older than the rewind window
+        changes = client.changes_since(cursor, rewind=2.0)
+    assert {row.full_path for row in changes} == within
+
+
+def test_scope_limits_the_feed():
+    backend = et.SyntheticBackend(3_000, seed=9)
+    with et.Client(dll=backend) as client:
+        cursor = client.changes_since(scope='ext:py').cursor
+        py = next(i for i in range(backend.count) if backend._extension(i) == 'py')
+        txt = next(i for i in range(backend.count) if backend._extension(i) == 'txt')
+        touch(backend, [py, txt], cursor.ticks + 1)
+        changes = client.changes_since(cursor, scope='ext:py')
+    assert [row.full_path for row in changes] == [backend._full_path(py)]
@@ -0,0 +1,56 @@
+from array import array
+
+import pytest
+
+import everything_tool as et
+
+ALL_FIELDS = et.Request(sum(et.COLUMN_SPECS))
+# Column name -> the raw value search(lazy=True) holds for it.
+RAW = {key: key for _, (key, _, _) in et.COLUMN_SPECS.items()}
+RAW.update({key: f'{key.removesuffix("_time")}_ticks' for key in et._TICK_COLUMNS}, attributes='attr_bits')
+
+
+@pytest.mark.parametrize('flags', [*et.COLUMN_SPECS, et.Request.DEFAULT, ALL_FIELDS],
+                         ids=lambda flags: f'{int(flags):04x}')
+def test_columns_match_search(client, flags):
+    kwargs = dict(flags=flags, sort=et.Sort.DATE_MODIFIED_DESCENDING, offset=40, limit=300)
+    result = client.search_columns('report', **kwargs)
+    rows = list(client.search('report', lazy=True, **kwargs))
+    assert len(result) == len(rows) == 300
+    assert set(result.columns) == {key for flag, (key, _, _) in et.COLUMN_SPECS.items() if flag & flags}
+    for key, column in result.columns.items():
+        assert list(column) == [getattr(row, RAW[key]) for row in rows]
+    assert [result.row(i) for i in range(len(result))] == [row.to_search_result() for row in rows]
+
+
+def test_column_storage(client):
+    result = client.search_columns('', flags=ALL_FIELDS, limit=2_000)
+    kinds = {key: kind for key, _, kind in et.COLUMN_SPECS.values()}
+    for key, column in result.columns.items():
+        expected = {'u64': array, 'u32': array, 'buffer': et.PackedStrings, 'packed': et.PackedStrings,
+                    'interned': et.InternedStrings}[kinds[key]]
+        assert isinstance(column, expected) and len(column) == len(result)
+    assert result['size'].typecode == 'Q' and result['attributes'].typecode == 'I'
+    assert len(result['path'].table) < len(result) and 'name' in result and 'missing' not in result
+
+
+def test_string_columns():
+    values = ['a', '', None, 'bc', 'a', 'déjà vu']
+    packed = et.PackedStrings(values)
+    assert list(packed) == [packed[i] for i in range(len(values))] == ['a', '', '', 'bc', 'a', 'déjà vu']
+    assert packed[-1] == 'déjà vu' and len(et.PackedStrings()) == 0
+    interned = et.InternedStrings(['x', 'y', 'x', 'x'])
+    assert list(interned) == ['x', 'y', 'x', 'x']
+    assert interned.table == ['x', 'y'] and list(interned.ids) == [0, 1, 0, 0]
+
+
+def test_empty_result(client):
+    empty = client.search_columns('nothing-matches-this', flags=et.Request.FILE_NAME | et.Request.SIZE)
+    assert len(empty) == 0 and list(empty['name']) == [] and list(empty['size']) == []
+
+
+def test_to_numpy(client):
+    numpy = pytest.importorskip('numpy')
+    result = client.search_columns('ext:py', flags=et.Request.SIZE | et.Request.DATE_MODIFIED)
+    arrays = result.to_numpy()
+    assert arrays['size'].dtype == numpy.uint64 and arrays['size'].tolist() == list(result['size'])
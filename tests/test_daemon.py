@@ -0,0 +1,128 @@
+import socket
+import threading
+import time
+
+import pytest
+
+import everything_tool as et
+
+
+@pytest.fixture
+def server():
+    with et.QueryServer('127.0.0.1:0', dll=et.SyntheticBackend(20_000, seed=11), chunk_size=100,
+                        window_size=1_000, max_in_flight=1) as server:
+        yield server
+
+
+@pytest.fixture
+def local():
+    with et.Client(dll=et.SyntheticBackend(20_000, seed=11)) as client:
+        yield client
+
+
+def test_search_round_trip(server, local):
+    with et.DaemonClient(server.address, timeout=10) as remote:
+        assert list(remote.search('data')) == list(local.search('data'))
+        assert list(remote.search('', lazy=True, flags=et.Request.ALL, sort=et.Sort.SIZE_DESCENDING)) == \
+            list(local.search('', lazy=True, flags=et.Request.ALL, sort=et.Sort.SIZE_DESCENDING))
+        # Offset and limit spanning several server windows.
+        assert list(remote.search('', offset=1_500, limit=2_345)) == list(local.search('', offset=1_500, limit=2_345))
+        assert list(remote.search_ext(['py', 'txt'], 'data')) == list(local.search_ext(['py', 'txt'], 'data'))
+
+
+def test_value_ops_and_errors(server, local):
+    with et.DaemonClient(server.address, timeout=10) as remote:
+        assert remote.version() == local.version()
+        assert remote.count('data') == local.count('data')
+        assert remote.classify('data') == local.classify('data')
+        with pytest.raises(et.SDKError):  # SDK errors keep their type across the wire
+            list(remote.search('<unbalanced'))
+        [error] = remote.pipeline([('no_such_op', (), {})])
+        assert isinstance(error, et.DaemonError)
+        assert remote.count('report') == local.count('report')
+
+
+def test_pipeline(server, local):
+    with et.DaemonClient(server.address, timeout=10) as remote:
+        results = remote.pipeline([
+            ('search', ('data',), {'limit': 10}),
+            ('count', ('report',), {}),
+            ('search_folder', ('music',), {}),
+        ])
+    assert results == [list(local.search('data', limit=10)), local.count('report'), list(local.search_folder('music'))]
+
+
+def test_cancel_is_read_while_the_connection_is_at_its_limit():
+    # Enough rows that the unread stream cannot fit in the socket buffers.
+    with et.QueryServer('127.0.0.1:0', dll=et.SyntheticBackend(300_000, seed=11), chunk_size=100,
+                        window_size=1_000, max_in_flight=1) as server:
+        conn = et._DaemonConnection(server.address, 10, False)
+        try:
+            # A large stream occupies the only slot and is not read, so the server blocks sending it.
+            first = conn.send_request('search', ('',), {'flags': int(et.Request.ALL)}, 100)
+            second = conn.send_request('search', ('data',), {}, 100)
+            time.sleep(0.2)
+            conn.cancel(first)
+            finished = set()
+            rows = []
+            while len(finished) < 2:
+                kind, request_id, value = conn.read()
+                if kind == et._FRAME_END:
+                    finished.add(request_id)
+                    if request_id == first:
+                        sent = value['count']
+                elif kind == et._FRAME_ROWS and request_id == second:
+                    rows.extend(value)
+            assert finished == {first, second}
+            assert sent < 300_000  # the cancel was read and honoured, not queued behind the limit
+            assert len(rows) == server.executor.call('count', 'data').result()
+        finally:
+            conn.close()
+
+
+def test_slow_reader_does_not_stall_other_clients(server, local):
+    slow = et.DaemonClient(server.address, timeout=10)
+    fast = et.DaemonClient(server.address, timeout=10)
+    try:
+        stream = slow.search('', flags=et.Request.ALL)
+        next(stream)  # then stop reading
+        result = {}
+        thread = threading.Thread(target=lambda: result.update(count=fast.count('data')))
+        thread.start()
+        thread.join(5)
+        assert result.get('count') == local.count('data')
+        stream.close()
+    finally:
+        slow.close()
+        fast.close()
+
+
+def test_value_ops_forward_keyword_arguments(server, local):
+    with et.DaemonClient(server.address, timeout=10) as remote:
+        assert remote.count('DATA', match_case=True) == local.count('DATA', match_case=True) == 0
+        assert remote.count('DATA') == local.count('DATA') > 0
+        assert remote.classify('DATA', match_case=True) == local.classify('DATA', match_case=True)
+        assert remote.pipeline([('count', ('DATA',), {'match_case': True})]) == [0]
+
+
+class SlowBackend(et.SyntheticBackend):
+    def Everything_QueryW(self, wait):
+        time.sleep(0.02)
+        return super().Everything_QueryW(wait)
+
+
+def test_pipelined_requests_do_not_each_get_a_thread():
+    with et.QueryServer('127.0.0.1:0', dll=SlowBackend(1_000, seed=1), max_in_flight=2) as server:
+        conn = et._DaemonConnection(server.address, 10, False)
+        try:
+            before = threading.active_count()
+            ids = {conn.send_request('count', ('data',)) for _ in range(50)}
+            time.sleep(0.1)
+            assert threading.active_count() - before <= 3  # the handler and at most two request threads
+            done = set()
+            while done != ids:
+                kind, request_id, value = conn.read()
+                assert kind == et._FRAME_RESULT
+                done.add(request_id)
+        finally:
+            conn.close()
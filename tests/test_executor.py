@@ -0,0 +1,80 @@
+import threading
+
+import pytest
+
+import everything_tool as et
+
+
+class RecordingBackend(et.SyntheticBackend):
+    """Records which threads ran queries and whether two queries ever overlapped."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.threads = set()
+        self.overlapped = False
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def Everything_QueryW(self, wait: bool) -> bool:
+        with self._lock:
+            self._active += 1
+            self.overlapped |= self._active > 1
+            self.threads.add(threading.get_ident())
+        try:
+            return super().Everything_QueryW(wait)
+        finally:
+            with self._lock:
+                self._active -= 1
+
+
+def test_queries_from_many_threads_run_serially_on_one_worker():
+    backend = RecordingBackend(5_000, seed=1)
+    with et.Client(dll=et.SyntheticBackend(5_000, seed=1)) as reference:
+        expected = {kw: list(reference.search(kw)) for kw in ('data', 'report', 'photo', 'music')}
+    results = {}
+    with et.QueryExecutor(dll=backend) as executor:
+        def work(keywords: str) -> None:
+            results[keywords] = executor.search(keywords).result(timeout=10)
+
+        threads = [threading.Thread(target=work, args=(kw,)) for kw in expected for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert results == expected
+    assert len(backend.threads) == 1
+    assert not backend.overlapped
+
+
+def test_stream_matches_search():
+    backend = et.SyntheticBackend(5_000, seed=2)
+    with et.QueryExecutor(dll=backend) as executor:
+        expected = executor.search('').result(timeout=10)
+        assert list(executor.stream('', batch_size=100, max_batches=2)) == expected
+
+
+def test_abandoned_stream_does_not_block_the_worker():
+    backend = et.SyntheticBackend(5_000, seed=3)
+    with et.QueryExecutor(dll=backend) as executor:
+        stream = executor.stream('', batch_size=10, max_batches=1)
+        assert executor.search('data', limit=5).result(timeout=5)
+        del stream
+        assert executor.search('data', limit=5).result(timeout=5)
+
+
+def test_closing_a_partly_read_stream_releases_the_worker():
+    backend = et.SyntheticBackend(5_000, seed=4)
+    with et.QueryExecutor(dll=backend) as executor:
+        stream = executor.stream('', batch_size=10, max_batches=1)
+        first = [next(stream) for _ in range(15)]
+        assert len(first) == 15
+        stream.close()
+        assert executor.search('data', limit=5).result(timeout=5)
+
+
+def test_stream_errors_reach_the_consumer():
+    backend = et.SyntheticBackend(1_000, seed=5)
+    with et.QueryExecutor(dll=backend) as executor:
+        with pytest.raises(et.SDKError):
+            list(executor.stream('<unbalanced'))
+        assert executor.search('data', limit=1).result(timeout=5) is not None
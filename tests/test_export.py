@@ -0,0 +1,55 @@
+import csv
+import io
+import json
+
+import pytest
+
+import everything_tool as et
+
+FLAGS = (et.Request.FULL_PATH_AND_FILE_NAME | et.Request.EXTENSION | et.Request.SIZE | et.Request.DATE_MODIFIED
+         | et.Request.ATTRIBUTES)
+
+
+def expected_rows(client, keywords):
+    result = client.search_columns(keywords, flags=FLAGS)
+    keys = list(result.columns)
+    return keys, [dict(zip(keys, values)) for values in zip(*(result.columns[key] for key in keys))]
+
+
+def test_ndjson_round_trip(client, tmp_path):
+    keys, expected = expected_rows(client, 'data')
+    stats = client.export('data', et.NDJSONSink(tmp_path / 'out.ndjson'), flags=FLAGS, batch_size=333)
+    lines = (tmp_path / 'out.ndjson').read_text(encoding='utf-8').splitlines()
+    assert [json.loads(line) for line in lines] == expected
+    assert stats.rows == len(expected)
+    assert stats.bytes_written == (tmp_path / 'out.ndjson').stat().st_size
+
+
+def test_csv_round_trip_to_an_open_file(client):
+    keys, expected = expected_rows(client, 'report')
+    buffer = io.BytesIO()
+    client.export('report', et.CSVSink(buffer), flags=FLAGS, batch_size=100)
+    reader = csv.reader(io.StringIO(buffer.getvalue().decode('utf-8'), newline=''))
+    assert next(reader) == keys
+    assert [row for row in reader] == [[str(value) for value in row.values()] for row in expected]
+
+
+def test_empty_result_writes_only_the_header(client):
+    buffer = io.BytesIO()
+    assert client.export('nothing-matches-this', et.CSVSink(buffer), flags=FLAGS).rows == 0
+    assert buffer.getvalue().decode('utf-8').strip().split(',')[0] == 'full_path'
+
+
+@pytest.mark.parametrize('format', ['ipc', 'parquet'])
+def test_arrow_round_trip(client, tmp_path, format):
+    pa = pytest.importorskip('pyarrow')
+    keys, expected = expected_rows(client, 'data')
+    path = tmp_path / f'out.{format}'
+    client.export('data', et.ArrowSink(path, format=format), flags=FLAGS, batch_size=500)
+    if format == 'parquet':
+        import pyarrow.parquet
+        table = pyarrow.parquet.read_table(path)
+    else:
+        table = pa.ipc.open_file(path).read_all()
+    assert table.column_names == keys
+    assert table.to_pylist() == expected
@@ -0,0 +1,42 @@
+import pytest
+
+import everything_tool as et
+
+MASKS = [*et.COLUMN_SPECS, et.Request.DEFAULT, et.Request(sum(et.COLUMN_SPECS)),
+         et.Request.PATH | et.Request.SIZE | et.Request.DATE_ACCESSED | et.Request.ATTRIBUTES]
+
+
+def getter_row(client, flags, i):
+    """The row the per-field getters of Client build for a result index."""
+    return et.SearchResult(**{
+        key: getattr(client, f'_get_{key}')(i) for flag, (key, _, _) in et.COLUMN_SPECS.items() if flag & flags
+    })
+
+
+@pytest.mark.parametrize('flags', MASKS, ids=lambda flags: f'{int(flags):04x}')
+def test_extractors_match_the_getters(client, flags):
+    count = len(list(client.search('report', flags=flags, sort=et.Sort.SIZE_DESCENDING)))
+    assert count
+    expected = [getter_row(client, flags, i) for i in range(count)]
+    eager = client._get_extractor(flags, lazy=False)
+    lazy = client._get_extractor(flags, lazy=True)
+    interned = client._get_extractor(flags, lazy=True, intern_paths=True)
+    assert [eager(i) for i in range(count)] == expected
+    assert [lazy(i).to_search_result() for i in range(count)] == expected
+    assert [interned(i).to_search_result() for i in range(count)] == expected
+
+
+def test_generated_row_types_only_hold_requested_fields():
+    row_type = et._lazy_row_type(int(et.Request.FILE_NAME | et.Request.DATE_MODIFIED))
+    assert row_type.__slots__ == ('_name', '_modified_ticks', '_modified_time')
+    interned = et._lazy_row_type(int(et.Request.FULL_PATH_AND_FILE_NAME), True, '/')
+    assert interned('/srv/data', 'a.txt').full_path == '/srv/data/a.txt'
+    assert et.LazySearchResult.row_type(et.Request.FILE_NAME) is et._lazy_row_type(int(et.Request.FILE_NAME))
+
+
+def test_extractors_are_cached_per_mask(client):
+    flags = et.Request.FILE_NAME | et.Request.SIZE
+    assert client._get_extractor(flags, lazy=True) is client._get_extractor(flags, lazy=True)
+    assert client._get_extractor(flags, lazy=True) is not client._get_extractor(flags, lazy=False)
+    with pytest.raises(ValueError):
+        client._get_extractor(flags, lazy=False, intern_paths=True)
@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+import everything_tool as et
+
+SHARDS = {'a': 3, 'b': 11, 'c': 29}
+
+
+@pytest.fixture(scope="module")
+def backends():
+    return {name: et.SyntheticBackend(4_000, seed=seed) for name, seed in SHARDS.items()}
+
+
+def merged(backends, keywords, sort, flags):
+    _, key = et._MERGE_KEYS[et.Sort(sort - (sort + 1) % 2)]
+    rows = []
+    for name, backend in backends.items():
+        with et.Client(dll=backend) as client:
+            found = client.search(keywords, sort=sort, flags=flags | et.Request.FULL_PATH_AND_FILE_NAME)
+            rows += [(name, row) for row in found]
+    # sorted() is stable, like heapq.merge across shards given in order.
+    return sorted(rows, key=lambda item: key(item[1]), reverse=sort % 2 == 0)
+
+
+@pytest.mark.parametrize('sort', [et.Sort.SIZE_DESCENDING, et.Sort.NAME_ASCENDING, et.Sort.DATE_MODIFIED_DESCENDING])
+@pytest.mark.parametrize('offset, limit', [(0, -1), (0, 10), (37, 25), (370, 50)])
+def test_merge_matches_a_full_sort(backends, sort, offset, limit):
+    flags = et._MERGE_KEYS[et.Sort(sort - (sort + 1) % 2)][0]
+    expected = merged(backends, 'report', sort, flags)
+    expected = expected[offset:offset + limit if limit >= 0 else None]
+    with et.FederatedClient(dict(backends), batch_size=64) as fed:
+        results = fed.search('report', offset=offset, limit=limit, sort=sort,
+                             flags=et.Request.FULL_PATH_AND_FILE_NAME)
+        found = [(item.source, item.full_path) for item in results]
+    assert found == [(name, row.full_path) for name, row in expected]
+    assert all(not status.timed_out and status.error is None for status in results.status.values())
+
+
+class SlowShard:
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    def search(self, keywords, **kwargs):
+        time.sleep(self.delay)
+        return iter([])
+
+    def count(self, keywords):
+        time.sleep(self.delay)
+        return 0
+
+
+def test_a_shard_that_times_out_is_dropped(backends):
+    with et.FederatedClient({'a': backends['a'], 'slow': SlowShard(2.0)}, timeout=0.3) as fed:
+        rows = merged({'a': backends['a']}, 'ext:py', et.Sort.SIZE_DESCENDING, et.Request.SIZE)
+        expected = [(name, row.full_path) for name, row in rows]
+        start = time.perf_counter()
+        results = fed.search('ext:py', sort=et.Sort.SIZE_DESCENDING, flags=et.Request.FULL_PATH_AND_FILE_NAME)
+        found = [(item.source, item.full_path) for item in results]
+        assert time.perf_counter() - start < 1.5
+        assert found == expected
+        assert results.status['slow'].timed_out
+        assert not results.status['a'].timed_out and results.status['a'].rows == len(expected)
+        assert not results.complete
+
+        counts = fed.count('ext:py')
+        assert counts == {'a': len(expected), 'slow': None}
+
+
+def test_a_failing_shard_is_reported(backends):
+    class Broken:
+        def search(self, keywords, **kwargs):
+            raise et.SDKError(et.EverythingError.IPC)
+
+    with et.FederatedClient({'a': backends['a'], 'broken': Broken()}) as fed:
+        results = fed.search('ext:py', limit=5, sort=et.Sort.SIZE_DESCENDING)
+        assert len(list(results)) == 5
+        assert isinstance(results.status['broken'].error, et.SDKError)
+
+
+def test_unmergeable_sort_is_rejected(backends):
+    with et.FederatedClient(dict(backends)) as fed:
+        with pytest.raises(ValueError):
+            fed.search('', sort=et.Sort.ATTRIBUTES_ASCENDING)
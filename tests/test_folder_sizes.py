@@ -0,0 +1,56 @@
+import os
+
+import everything_tool as et
+
+
+def _busy_root(client: et.Client) -> str:
+    """A top-level-ish directory that has nested subdirectories."""
+    tree = client.folder_sizes()
+    return next(entry.path for entry in tree.top(50) if entry.path.count('\\') == 1 and tree.children(entry.path))
+
+
+def test_top_only_returns_the_roots_subtree(client):
+    root = _busy_root(client)
+    top = client.folder_sizes(root).top(5)
+    assert top
+    assert all(entry.path.lower().startswith(root.lower() + '\\') for entry in top)
+
+
+def test_root_casing_does_not_matter(client):
+    root = _busy_root(client)
+    expected = client.folder_sizes(root).top(3)
+    for variant in (root.lower(), root.upper()):
+        tree = client.folder_sizes(variant)
+        assert tree.top(3) == expected
+        assert tree.get(variant) == tree.get(root)
+        assert tree.children(variant) == tree.children(root)
+        assert variant in tree
+
+
+def test_unknown_root_has_no_top(client):
+    assert client.folder_sizes('Q:\\does-not-exist').top(3) == []
+
+
+def test_totals_match_files(client, backend):
+    root = _busy_root(client)
+    tree = client.folder_sizes(root)
+    files = [row for row in client.search(f'path:"{root}\\" file:', flags=et.Request.SIZE)]
+    assert tree.get(root).files == len(files)
+    assert tree.get(root).size == sum(row.size for row in files)
+
+
+def test_directory_backend_rolls_up_native_paths(tmp_path):
+    (tmp_path / 'a' / 'b').mkdir(parents=True)
+    (tmp_path / 'a' / 'own.bin').write_bytes(b'x' * 50)
+    (tmp_path / 'a' / 'b' / 'f.bin').write_bytes(b'x' * 100)
+    (tmp_path / 'c').mkdir()
+    (tmp_path / 'c' / 'g.bin').write_bytes(b'x' * 7)
+    a, b = str(tmp_path / 'a'), str(tmp_path / 'a' / 'b')
+    with et.Client(dll=et.DirectoryBackend(tmp_path)) as client:
+        whole = client.folder_sizes()
+        scoped = client.folder_sizes(a)
+    assert whole.get(a) == et.FolderSize(whole.get(a).path, 150, 2)
+    assert whole.get(str(tmp_path)).size == 157
+    assert scoped.get(a + os.sep).size == 150
+    assert scoped.top(5) == [et.FolderSize(b, 100, 1)]
+    assert [entry.path for entry in whole.children(str(tmp_path))] == [a, str(tmp_path / 'c')]
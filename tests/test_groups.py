@@ -0,0 +1,25 @@
+import everything_tool as et
+
+GROUPS = {'code': ['py', 'JS', '.cs'], 'web': 'html;js', 'none': []}
+FLAGS = et.Request.DEFAULT | et.Request.EXTENSION
+
+
+def test_search_many_matches_search_ext(client):
+    result = client.search_many(GROUPS, 'data', flags=FLAGS)
+    assert set(result) == set(GROUPS)
+    assert result['code'] == list(client.search_ext(['py', 'js', 'cs'], 'data', flags=FLAGS))
+    assert result['web'] == list(client.search_ext(['html', 'js'], 'data', flags=FLAGS))
+    assert result['none'] == []
+
+
+def test_search_many_matches_the_type_wrappers(client):
+    result = client.search_many(et.FILE_TYPE_GROUPS, flags=FLAGS)
+    assert result['AUDIO'] == list(client.search_audio(flags=FLAGS))
+    assert result['DOC'] == list(client.search_doc(flags=FLAGS))
+
+
+def test_classify_matches_search_many(client):
+    rows = client.search_many(et.FILE_TYPE_GROUPS)
+    assert client.classify() == {name: len(found) for name, found in rows.items()}
+    assert client.classify('report', GROUPS) == {name: len(found) for name, found in
+                                                 client.search_many(GROUPS, 'report').items()}
@@ -0,0 +1,29 @@
+import pickle
+
+import everything_tool as et
+
+FLAGS = et.Request.FULL_PATH_AND_FILE_NAME | et.Request.PATH | et.Request.FILE_NAME | et.Request.SIZE
+
+
+def test_interned_columns_match_search(client):
+    rows = list(client.search('data', flags=FLAGS))
+    result = client.search_columns('data', flags=FLAGS, intern_paths=True)
+    paths = result.columns['full_path']
+    assert isinstance(paths, et.InternedPaths)
+    assert list(paths) == [row.full_path for row in rows]
+    assert [paths[i] for i in range(len(rows))] == [row.full_path for row in rows]
+    assert list(result.columns['path']) == [row.path for row in rows]
+    assert list(result.columns['name']) == [row.name for row in rows]
+    # Rows of one directory share its string.
+    assert len(paths.directories.table) == len({row.path for row in rows}) < len(rows)
+
+
+def test_interned_lazy_rows_match_search(client):
+    rows = list(client.search('', flags=FLAGS, limit=2_000))
+    interned = list(client.search('', flags=FLAGS, limit=2_000, lazy=True, intern_paths=True))
+    assert [row.to_search_result() for row in interned] == rows
+    assert interned == list(client.search('', flags=FLAGS, limit=2_000, lazy=True))
+    assert pickle.loads(pickle.dumps(interned[10])) == interned[10]
+    by_dir = {}
+    for row in interned:
+        assert by_dir.setdefault(row.path, row._dir) is row._dir
@@ -0,0 +1,47 @@
+import pickle
+
+import pytest
+
+import everything_tool as et
+
+ALL_FIELDS = et.Request(sum(et.COLUMN_SPECS))
+FLAGS = [et.Request.DEFAULT, et.Request.FILE_NAME | et.Request.SIZE | et.Request.ATTRIBUTES,
+         et.Request.DATE_MODIFIED | et.Request.DATE_CREATED | et.Request.DATE_RUN, ALL_FIELDS]
+
+
+@pytest.mark.parametrize('flags', FLAGS)
+def test_lazy_rows_decode_to_the_eager_rows(client, flags):
+    eager = list(client.search('report', flags=flags, sort=et.Sort.PATH_ASCENDING))
+    lazy = list(client.search('report', flags=flags, sort=et.Sort.PATH_ASCENDING, lazy=True))
+    assert eager and [row.to_search_result() for row in lazy] == eager
+    for row, expected in zip(lazy, eager):
+        for field in et.SearchResult.__dataclass_fields__:
+            assert getattr(row, field) == getattr(expected, field)
+
+
+def test_raw_accessors_match_the_decoded_fields(client):
+    for row in client.search('', flags=ALL_FIELDS, limit=500, lazy=True):
+        assert et.Client._ticks_to_datetime(row.modified_ticks) == row.modified_time
+        assert et.Client._ticks_to_datetime(row.created_ticks) == row.created_time
+        assert et.Client._attributes_to_str(row.attr_bits) == row.attributes
+        assert row.is_dir == ('D' in row.attributes)
+
+
+def test_unrequested_fields_read_as_none(client):
+    row = next(iter(client.search('report', flags=et.Request.FILE_NAME, lazy=True)))
+    assert type(row).__slots__ == ('_name',)
+    assert row.name and row.path is None and row.modified_time is None and row.modified_ticks is None
+    assert row.attributes is None and not row.is_dir
+
+
+def test_rows_compare_hash_and_pickle(client):
+    first = list(client.search('ext:py', flags=ALL_FIELDS, limit=50, lazy=True))
+    second = list(client.search('ext:py', flags=ALL_FIELDS, limit=50, lazy=True))
+    assert first == second and len(set(first) | set(second)) == len(first)
+    restored = pickle.loads(pickle.dumps(first))
+    assert restored == first and type(restored[0]) is type(first[0])
+    assert [row.to_search_result() for row in restored] == [row.to_search_result() for row in first]
+
+    interned = list(client.search('ext:py', flags=ALL_FIELDS, limit=50, lazy=True, intern_paths=True))
+    restored = pickle.loads(pickle.dumps(interned))
+    assert type(restored[0]) is type(interned[0]) and restored == interned == first
@@ -0,0 +1,103 @@
+import json
+
+import pytest
+
+import everything_tool as et
+
+FLAGS = et.Request.FULL_PATH_AND_FILE_NAME | et.Request.SIZE | et.Request.DATE_MODIFIED
+
+
+class Recorder(et.QueryObserver):
+    def __init__(self):
+        self.queries = []
+        self.errors = []
+
+    def on_query(self, stats):
+        self.queries.append(stats)
+
+    def on_error(self, error):
+        self.errors.append(error)
+
+
+def test_search_stats(client):
+    recorder = client.add_observer(Recorder(), sample_every=10)
+    try:
+        rows = list(client.search('', flags=FLAGS, limit=500))
+    finally:
+        client.remove_observer(recorder)
+    [stats] = recorder.queries
+    assert (stats.keywords, stats.flags, stats.sort) == ('', int(FLAGS), int(et.Sort.NAME_ASCENDING))
+    assert stats.rows == len(rows) == 500 and stats.sampled_rows == 50 and not stats.cached
+    assert set(stats.field_times) == {'full_path', 'size', 'modified_time'}
+    assert all(seconds > 0 for seconds in stats.field_times.values())
+    assert stats.strings_decoded == 500
+    assert stats.bytes_decoded == 2 * sum(len(row.full_path) for row in rows[::10]) * 10
+    assert stats.total == pytest.approx(stats.setup + stats.query + stats.count + stats.extract)
+    assert min(stats.setup, stats.query, stats.count, stats.extract) >= 0 and stats.extract > 0
+
+
+def test_rows_read_before_the_search_is_closed(client):
+    recorder = client.add_observer(Recorder())
+    try:
+        rows = client.search('', flags=FLAGS)
+        for _ in range(5):
+            next(rows)
+        assert not recorder.queries
+        rows.close()
+    finally:
+        client.remove_observer(recorder)
+    assert [stats.rows for stats in recorder.queries] == [5]
+
+
+def test_search_columns_stats(client):
+    recorder = client.add_observer(Recorder())
+    try:
+        result = client.search_columns('ext:py', flags=FLAGS)
+    finally:
+        client.remove_observer(recorder)
+    [stats] = recorder.queries
+    assert stats.rows == stats.sampled_rows == len(result) > 0
+    assert set(stats.field_times) == set(result.columns)
+    assert stats.extract == pytest.approx(sum(stats.field_times.values()))
+    assert stats.bytes_decoded == 2 * sum(map(len, result['full_path']))
+
+
+def test_errors_reach_the_observers(client):
+    recorder = client.add_observer(Recorder())
+    try:
+        with pytest.raises(et.SDKError):
+            list(client.search('<report'))
+    finally:
+        client.remove_observer(recorder)
+    assert recorder.errors == [et.EverythingError.INVALIDCALL]
+    assert [stats.error for stats in recorder.queries] == [et.EverythingError.INVALIDCALL]
+
+
+def test_metrics_export(client):
+    metrics = client.add_observer(et.MetricsObserver(), sample_every=1)
+    try:
+        total = sum(1 for _ in client.search('report', flags=FLAGS))
+        total += len(client.search_columns('ext:py', flags=FLAGS))
+        with pytest.raises(et.SDKError):
+            list(client.search('<report'))
+    finally:
+        client.remove_observer(metrics)
+    exported = json.loads(json.dumps(metrics.export()))
+    assert exported['queries'] == 3 and exported['rows'] == total and exported['cache_hits'] == 0
+    assert exported['errors'] == {'INVALIDCALL': 1}
+    histograms = exported['histograms']
+    assert set(histograms) == {'setup', 'query', 'count', 'extract', 'total',
+                               'field.full_path', 'field.size', 'field.modified_time'}
+    assert histograms['total']['count'] == 3 and histograms['field.size']['count'] == 2
+    assert histograms['total']['p50'] <= histograms['total']['p99'] <= histograms['total']['max']
+    metrics.reset()
+    assert metrics.export()['queries'] == 0 and not metrics.export()['histograms']
+
+
+def test_observers_are_detached_and_validated(client):
+    recorder = client.add_observer(Recorder())
+    client.remove_observer(recorder)
+    list(client.search('report', limit=3))
+    assert not recorder.queries
+    with pytest.raises(ValueError):
+        client.add_observer(Recorder(), sample_every=0)
@@ -0,0 +1,44 @@
+import os
+import pickle
+
+import everything_tool as et
+
+
+def make_tree(root):
+    for folder in ('src/pkg', 'docs', 'empty'):
+        os.makedirs(root / folder, exist_ok=True)
+    for name, size in (('src/pkg/mod.py', 10), ('src/main.py', 20), ('docs/readme.md', 30), ('top.txt', 5)):
+        (root / name).write_bytes(b'x' * size)
+
+
+def test_directory_paths_round_trip_through_a_snapshot(tmp_path):
+    make_tree(tmp_path / 'tree')
+    flags = et.Request.FULL_PATH_AND_FILE_NAME | et.Request.PATH | et.Request.FILE_NAME | et.Request.SIZE
+    with et.Client(dll=et.DirectoryBackend(tmp_path / 'tree')) as client:
+        rows = list(client.search('', flags=flags))
+        assert client.save_snapshot(tmp_path / 'tree.evsnap') == len(rows)
+        interned = list(client.search('', flags=flags, lazy=True, intern_paths=True))
+        columns = client.search_columns('', flags=flags, intern_paths=True)
+    for row in rows:
+        assert os.path.join(row.path, row.name) == row.full_path
+    assert [row.full_path for row in interned] == [row.full_path for row in rows]
+    assert list(columns.columns['full_path']) == [row.full_path for row in rows]
+    assert pickle.loads(pickle.dumps(interned[0])).full_path == rows[0].full_path
+
+    with et.Snapshot(tmp_path / 'tree.evsnap') as snapshot:
+        assert snapshot.sep == os.sep
+        with et.Client(dll=snapshot) as client:
+            assert list(client.search('', flags=flags)) == rows
+            src = os.path.join(str(tmp_path / 'tree'), 'src')
+            assert sorted(row.name for row in client.search(f'parent:"{src}"', flags=flags)) == ['main.py', 'pkg']
+            assert [row.name for row in client.search('mod*', flags=flags)] == ['mod.py']
+
+
+def test_sdk_style_snapshots_keep_backslashes(tmp_path):
+    with et.Client(dll=et.SyntheticBackend(2_000, seed=4)) as client:
+        rows = list(client.search('', flags=et.SNAPSHOT_FLAGS | et.Request.PATH | et.Request.FILE_NAME))
+        client.save_snapshot(tmp_path / 'synthetic.evsnap')
+    with et.Snapshot(tmp_path / 'synthetic.evsnap') as snapshot, et.Client(dll=snapshot) as client:
+        assert snapshot.sep == '\\'
+        copy = list(client.search('', flags=et.SNAPSHOT_FLAGS | et.Request.PATH | et.Request.FILE_NAME))
+    assert [(row.path, row.name) for row in copy] == [(row.path, row.name) for row in rows]
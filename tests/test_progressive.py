@@ -0,0 +1,77 @@
+import threading
+import time
+
+import pytest
+
+import everything_tool as et
+
+
+def test_pages_cover_the_search(client):
+    pages = list(client.search_progressive('', first_page=50, growth=3, max_page=2_000))
+    assert [row.full_path for page in pages for row in page] == [row.full_path for row in client.search('')]
+    assert pages[-1].final and not any(page.final for page in pages[:-1])
+    assert [len(page) for page in pages[:4]] == [50, 150, 450, 1_350]
+
+
+def test_limit_and_deadline(client):
+    pages = list(client.search_progressive('', limit=777, first_page=100))
+    assert sum(map(len, pages)) == 777 and pages[-1].final
+    pages = list(client.search_progressive('', deadline=0))
+    assert pages[-1].truncated
+
+
+class SlowBackend(et.SyntheticBackend):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.started = []
+
+    def Everything_QueryW(self, wait):
+        self.started.append(time.perf_counter())
+        time.sleep(0.05)
+        return super().Everything_QueryW(wait)
+
+
+def test_executor_fetches_the_next_window_while_a_page_is_delivered():
+    backend = SlowBackend(5_000, seed=3)
+    delivered = []
+
+    def on_page(page):
+        delivered.append((time.perf_counter(), page, threading.current_thread().name))
+        time.sleep(0.2)
+
+    with et.QueryExecutor(dll=backend) as executor:
+        final = executor.search_progressive('', on_page, first_page=1_000, growth=1, max_page=1_000).result(30)
+        expected = executor.search('').result()
+    assert final is delivered[-1][1] and final.final
+    assert [row for _, page, _ in delivered for row in page] == expected
+    assert all(not name.startswith('everything-query') for _, _, name in delivered)
+    # Every window after the first was queried while the previous page was still being delivered.
+    for (delivered_at, _, _), queried_at in zip(delivered[:-1], backend.started[1:]):
+        assert queried_at < delivered_at + 0.2
+
+
+def test_executor_supersedes_older_searches():
+    release = threading.Event()
+    first_pages = []
+
+    def slow(page):
+        first_pages.append(page)
+        release.wait(10)
+
+    with et.QueryExecutor(dll=et.SyntheticBackend(5_000, seed=3)) as executor:
+        old = executor.search_progressive('', slow, first_page=100, growth=1, max_page=100)
+        while not first_pages:
+            time.sleep(0.01)
+        new = executor.search_progressive('data', lambda page: None)
+        release.set()
+        assert old.result(10) is None
+        assert new.result(10).final
+    assert len(first_pages) == 1
+
+
+def test_executor_reports_errors():
+    with et.QueryExecutor(dll=et.SyntheticBackend(100)) as executor:
+        with pytest.raises(ValueError):
+            executor.search_progressive('', lambda page: None, first_page=0)
+        with pytest.raises(et.SDKError):
+            executor.search_progressive('<unbalanced', lambda page: None).result(10)
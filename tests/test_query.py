@@ -0,0 +1,22 @@
+import pytest
+
+import everything_tool as et
+
+
+@pytest.mark.parametrize('bounds', [{'min': 1_000_000}, {'max': 4_096}, {'min': 10_000, 'max': 20_000}])
+def test_size_filter_matches_the_sdk(client, bounds):
+    query = et.Query.size(**bounds)
+    flags = et.Request.FULL_PATH_AND_FILE_NAME | et.Request.SIZE | et.Request.ATTRIBUTES
+    rows = list(client.search('', flags=flags))
+    pushed = [row.full_path for row in client.find(query, flags=flags)]
+    assert pushed == [row.full_path for row in rows if query.test(row)]
+    assert pushed
+
+
+def test_size_without_max_has_no_upper_bound():
+    row = et.SearchResult(size=et.INVALID_FILETIME, attributes='A')
+    assert et.Query.size(min=0).test(row)
+    assert not et.Query.size(max=10).test(row)
+    assert not et.Query.size(min=0).test(et.SearchResult(size=5, attributes='D'))
+    with pytest.raises(ValueError):
+        et.Query.size()
@@ -0,0 +1,38 @@
+import threading
+
+import everything_tool as et
+
+
+class ThreadRecordingBackend(et.SyntheticBackend):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.threads = set()
+
+    def Everything_QueryW(self, wait):
+        self.threads.add(threading.current_thread().name)
+        return super().Everything_QueryW(wait)
+
+
+def test_windows_match_search(client):
+    expected = list(client.search('', offset=123, limit=4_567))
+    assert list(client.search_stream('', offset=123, limit=4_567, chunk_size=1_000)) == expected
+    assert list(client.search_stream('data', chunk_size=100)) == list(client.search('data'))
+
+
+def test_queries_run_on_the_consuming_thread():
+    backend = ThreadRecordingBackend(5_000, seed=2)
+    with et.Client(dll=backend) as client:
+        assert len(list(client.search_stream('', chunk_size=500))) == backend.count
+    assert backend.threads == {threading.current_thread().name}
+    with et.QueryExecutor(dll=backend) as executor:
+        backend.threads.clear()
+        assert len(list(executor.stream('', method='search_stream', chunk_size=500))) == backend.count
+    assert len(backend.threads) == 1 and next(iter(backend.threads)).startswith('everything-query')
+
+
+def test_other_queries_between_reads_do_not_disturb_the_stream(client):
+    stream = client.search_stream('', chunk_size=100)
+    rows = [next(stream) for _ in range(150)]
+    client.count('data')  # the current window is already materialized; the next one is re-queried
+    rows.extend(stream)
+    assert rows == list(client.search(''))
@@ -0,0 +1,52 @@
+import pytest
+
+import everything_tool as et
+
+FLAGS = (et.Request.FULL_PATH_AND_FILE_NAME | et.Request.FILE_NAME | et.Request.PATH | et.Request.EXTENSION
+         | et.Request.SIZE | et.Request.DATE_MODIFIED)
+FIELDS = {
+    'name': lambda row: row.name.lower(),
+    'path': lambda row: row.path.lower(),
+    'full_path': lambda row: row.full_path.lower(),
+    'extension': lambda row: (row.extension or '').lower(),
+    'size': lambda row: row.size,
+    'modified_time': lambda row: row.modified_ticks,
+}
+
+
+def brute_force(rows, keys, k):
+    for key in reversed(keys):  # stable sorts, least significant key first
+        rows = sorted(rows, key=FIELDS[key.lstrip('-')], reverse=key.startswith('-'))
+    return rows[:k]
+
+
+@pytest.mark.parametrize('keys', [['-size', 'full_path'], ['size', 'full_path'], ['-modified_time', 'full_path'],
+                                  ['name', '-modified_time', 'full_path'], ['full_path']])
+@pytest.mark.parametrize('keywords', ['', 'data'])
+def test_top_k_matches_a_full_sort(client, keys, keywords):
+    rows = list(client.search(keywords, flags=FLAGS, lazy=True))
+    expected = brute_force(rows, keys, 25)
+    found = client.top_k(keywords, keys, k=25, flags=FLAGS, lazy=True, chunk_size=7)
+    assert [row.full_path for row in found] == [row.full_path for row in expected]
+
+
+def test_per_group_matches_a_full_sort(client):
+    rows = list(client.search('report', flags=FLAGS, lazy=True))
+    found = client.top_k('report', ['-size', 'full_path'], k=3, per_group='extension', flags=FLAGS, lazy=True)
+    groups = {}
+    for row in rows:
+        groups.setdefault(FIELDS['extension'](row), []).append(row)
+    assert set(found) == set(groups)
+    for group, members in groups.items():
+        expected = brute_force(members, ['-size', 'full_path'], 3)
+        assert [row.full_path for row in found[group]] == [row.full_path for row in expected]
+
+
+def test_query_filters_and_small_result_sets(client):
+    query = et.Query.ext('py') & et.Query.where(lambda row: row.size % 2 == 0, et.Request.SIZE)
+    rows = [row for row in client.search('ext:py', flags=FLAGS, lazy=True) if row.size % 2 == 0]
+    found = client.top_k(query, ['-size', 'full_path'], k=10, flags=FLAGS, lazy=True)
+    assert [row.full_path for row in found] == [row.full_path for row in brute_force(rows, ['-size', 'full_path'], 10)]
+    assert client.top_k('nothing-matches-this', 'size') == []
+    with pytest.raises(ValueError):
+        client.top_k('', 'owner')